@@ -19,6 +19,36 @@ class CaptureResponse(BaseModel):
     message: str
     file_path: Optional[str] = None
     classification: Optional[Dict[str, Any]] = None
+    capture_id: Optional[str] = Field(default=None, description="Set for queued captures")
+    status: Optional[str] = Field(default=None, description="Queued capture status")
+
+
+class BatchCaptureRequest(BaseModel):
+    """Request model for capturing many inputs at once"""
+    items: List[CaptureRequest] = Field(..., description="Captures to classify and save")
+
+
+class BatchCaptureItem(BaseModel):
+    """Outcome of one item in a batch capture"""
+    index: int
+    success: bool
+    file_path: Optional[str] = None
+    classification: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BatchCaptureResponse(BaseModel):
+    """Response model for batch capture"""
+    total: int
+    succeeded: int
+    failed: int
+    items: List[BatchCaptureItem]
+
+
+class DailyLogEntryRequest(BaseModel):
+    """Request model for adding an entry to today's daily log"""
+    content: str = Field(..., description="The entry to append")
+    section: Optional[str] = Field(default=None, description="Heading line to append under (default: work log)")
 
 
 class ChatMessage(BaseModel):
@@ -57,6 +87,7 @@ class TimelineResponse(BaseModel):
     items: List[NoteItem]
     total: int
     has_more: bool
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
 
 
 class DashboardStats(BaseModel):
@@ -66,6 +97,7 @@ class DashboardStats(BaseModel):
     active_projects: int
     active_articles: int
     week_entries: int
+    projects_by_status: Dict[str, int] = Field(default_factory=dict)
 
 
 class ProjectSummary(BaseModel):
@@ -93,3 +125,22 @@ class DashboardResponse(BaseModel):
     active_projects: List[ProjectSummary]
     active_articles: List[ArticleSummary]
     recent_items: List[NoteItem]
+    snapshot_age: float = 0.0  # seconds since the aggregates were last read
+
+
+class SearchResult(BaseModel):
+    """Single full-text search hit"""
+    file_path: str
+    title: str
+    score: float
+    snippet: str = Field(..., description="HTML-escaped excerpt with <mark> highlights")
+    tags: List[str] = Field(default_factory=list)
+    modified: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    """Response model for full-text search"""
+    query: str
+    items: List[SearchResult]
+    total: int
+    took_ms: float
@@ -1,32 +1,43 @@
 """
 OpenAI GPT-4 Integration for intelligent processing
+All calls go through LLMGateway: one pooled async client with per-operation
+concurrency caps, a shared rate limit, jittered retries and deadlines
 """
-from openai import OpenAI
-from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI, AsyncStream, APIConnectionError, APIStatusError, RateLimitError
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator, TypeVar
 from .config import settings
+from .audio import link_or_copy, split_audio, stitch_transcripts
+from .cache import TieredCache, content_key
+from .local_classifier import LocalClassifier
+from .tokenizer import normalize, estimate_tokens
+from pathlib import Path
+import asyncio
+import contextlib
+import httpx
 import json
+import os
+import random
+import shutil
+import tempfile
+import time
 
 
-class AIProcessor:
-    """Handles all OpenAI API interactions"""
+T = TypeVar("T")
 
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
-        self.model = settings.openai_model
-        self.temperature = settings.openai_temperature
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUSES = {408, 409, 429}
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
 
-    def classify_input(self, content: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """
-        Classify user input into categories and extract intent
+# Trained by scripts/train_local_classifier.py into the cache dir
+LOCAL_CLASSIFIER_FILE = "local_classifier.json"
 
-        Args:
-            content: The user's input text
-            context: Optional context (current time, recent notes, etc.)
+TRANSCRIBE_MODEL = "whisper-1"
 
-        Returns:
-            Dict with classification results
-        """
-        system_prompt = """你是一个智能知识管理助理。你的任务是分析用户输入并分类。
+# Bump whenever the classification prompt or output schema changes; part of the cache key
+CLASSIFY_PROMPT_VERSION = "classify-v1"
+
+CLASSIFY_SYSTEM_PROMPT = """你是一个智能知识管理助理。你的任务是分析用户输入并分类。
 
 可能的分类:
 - work_log: 工作日志、完成的任务、进展更新
@@ -49,39 +60,466 @@ class AIProcessor:
 }
 """
 
+# Appended to the classification prompt when several captures share one call
+CLASSIFY_BATCH_INSTRUCTIONS = """
+用户会一次提供多条输入，格式为JSON数组，每条包含 id 和 content。
+请逐条分析，以JSON格式返回，每条输入对应一个结果并带上原 id:
+{
+  "results": [
+    {"id": 0, "category": "分类名称", "confidence": 0.95, "title": "...", "suggested_tags": [], "target_folder": "...", "summary": "..."}
+  ]
+}
+"""
+
+# Estimated prompt tokens per batched item beyond its content (id, JSON punctuation)
+CLASSIFY_BATCH_ITEM_OVERHEAD = 12
+
+CHAT_SYSTEM_PROMPT = """你是一个友好的知识管理AI助理。你帮助用户管理他们的Obsidian知识库。
+
+你的能力包括:
+- 记录和分类信息
+- 回答关于知识库内容的问题
+- 提供建议和洞察
+- 帮助用户反思和规划
+
+请用简洁、友好的语气回复。如果用户想记录内容，确认你理解了他们的意图。
+"""
+
+SUMMARIZE_SYSTEM_PROMPT = "你是一个擅长总结的助理。"
+
+# Rolling summaries of compacted chat history: cache file, entries, TTL and summary length
+HISTORY_SUMMARY_FILE = "history_summary_cache.sqlite"
+HISTORY_SUMMARY_CACHE_SIZE = 256
+HISTORY_SUMMARY_TTL = 7 * 86400
+HISTORY_SUMMARY_LENGTH = 300
+HISTORY_SUMMARY_VERSION = "history-v1"
+
+HISTORY_ROLE_NAMES = {"user": "用户", "assistant": "助理"}
+
+
+def normalize_capture(content: str) -> str:
+    """Canonical form of captured text for cache keys: NFKC, case-folded, whitespace collapsed"""
+    return " ".join(normalize(content).split())
+
+
+class TokenBucket:
+    """Async token bucket: refills at rate tokens/sec up to capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it (no-op when rate <= 0)"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LLMGateway:
+    """Shared async OpenAI access with concurrency, rate, retry and deadline control"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_connections: int = 20,
+        requests_per_minute: float = 120.0,
+        burst: int = 10,
+        max_retries: int = 4,
+        concurrency: Optional[Dict[str, int]] = None,
+        deadlines: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            api_key: OpenAI API key
+            base_url: API base URL (None for OpenAI; point at a stub server for testing)
+            max_connections: Size of the shared HTTP connection pool
+            requests_per_minute: Sustained request rate across all operations (0 disables)
+            burst: Requests allowed back to back before the rate applies
+            max_retries: Retries after the first attempt for retryable failures
+            concurrency: Maximum in-flight calls per operation
+            deadlines: Seconds each operation may take in total, retries included
+        """
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(None, connect=10.0)  # bounded by the per-call deadline instead
+        )
+        # Retries are done here, where they respect the rate limit and the deadline
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=self.http, max_retries=0)
+        self.max_retries = max_retries
+        self.deadlines = deadlines or {}
+        self._concurrency = concurrency or {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._bucket = TokenBucket(requests_per_minute / 60.0, burst)
+
+    async def call(self, operation: str, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run one API request under the operation's limits
+
+        Args:
+            operation: classify, chat, summarize or transcribe
+            request: Issues the API request; called again for each retry
+
+        Returns:
+            The request's result
+
+        Raises:
+            asyncio.TimeoutError: If the operation's deadline passes
+            openai.APIError: If the request fails and is not retryable, or retries run out
+        """
+        deadline = self.deadlines.get(operation)
+        try:
+            return await asyncio.wait_for(self._call(operation, request), timeout=deadline)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"{operation} call exceeded its {deadline:g}s deadline")
+
+    async def stream(self, operation: str, request: Callable[[], Awaitable[AsyncStream]]) -> AsyncIterator[Any]:
+        """
+        Run one streamed API request under the operation's limits, yielding its chunks
+
+        The concurrency slot is held until the stream ends. Retries only
+        happen while opening the stream; the deadline bounds the wait for
+        the stream to open and each gap between chunks, not the whole
+        generation. Closing the generator (e.g. when the client
+        disconnects) closes the upstream response.
+
+        Raises:
+            asyncio.TimeoutError: If the stream does not open or stalls within the deadline
+            openai.APIError: If the request fails and is not retryable, or retries run out
+        """
+        deadline = self.deadlines.get(operation)
+        async with self._semaphore(operation):
+            try:
+                response = await asyncio.wait_for(self._with_retries(request), timeout=deadline)
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"{operation} stream did not start within its {deadline:g}s deadline")
+            try:
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=deadline)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise asyncio.TimeoutError(f"{operation} stream stalled for {deadline:g}s")
+                    yield chunk
+            finally:
+                await response.close()
+
+    async def close(self) -> None:
+        """Close the shared connection pool"""
+        await self.http.aclose()
+
+    async def _call(self, operation: str, request: Callable[[], Awaitable[T]]) -> T:
+        async with self._semaphore(operation):
+            return await self._with_retries(request)
+
+    def _semaphore(self, operation: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(operation)
+        if semaphore is None:
+            semaphore = self._semaphores[operation] = asyncio.Semaphore(self._concurrency.get(operation, 4))
+        return semaphore
+
+    async def _with_retries(self, request: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            await self._bucket.acquire()
+            try:
+                return await request()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._retryable(e):
+                    raise
+                attempt += 1
+                await asyncio.sleep(self._retry_delay(e, attempt))
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        if isinstance(error, (RateLimitError, APIConnectionError)):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code in RETRYABLE_STATUSES or error.status_code >= 500
+        return False
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+        if isinstance(error, APIStatusError):
+            try:
+                delay = max(delay, float(error.response.headers.get("retry-after", 0)))
+            except ValueError:
+                pass
+        return delay
+
+
+class AIProcessor:
+    """Handles all OpenAI API interactions"""
+
+    def __init__(self):
+        self.gateway = LLMGateway(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            max_connections=settings.llm_max_connections,
+            requests_per_minute=settings.llm_requests_per_minute,
+            burst=settings.llm_burst,
+            max_retries=settings.llm_max_retries,
+            concurrency=settings.llm_concurrency,
+            deadlines=settings.llm_deadlines
+        )
+        self.client = self.gateway.client
+        self.classification_cache = TieredCache(
+            settings.full_cache_path / "classification_cache.sqlite",
+            memory_size=settings.classification_cache_size,
+            ttl=settings.classification_cache_ttl,
+            max_bytes=settings.classification_cache_max_bytes
+        )
+        self.transcript_cache = TieredCache(
+            settings.full_cache_path / "transcript_cache.sqlite",
+            memory_size=settings.transcript_cache_size,
+            ttl=settings.transcript_cache_ttl,
+            max_bytes=settings.transcript_cache_max_bytes
+        )
+        # Audio hash -> transcription in flight, shared by identical uploads
+        self._transcriptions: Dict[str, asyncio.Future] = {}
+        self.transcripts_deduplicated = 0
+        self.local_classifier = LocalClassifier.load(
+            settings.full_cache_path / LOCAL_CLASSIFIER_FILE,
+            threshold=settings.local_classifier_threshold
+        )
+        self.capture_routes = {"local": 0, "model": 0}
+        self.history_summary_cache = TieredCache(
+            settings.full_cache_path / HISTORY_SUMMARY_FILE,
+            memory_size=HISTORY_SUMMARY_CACHE_SIZE,
+            ttl=HISTORY_SUMMARY_TTL,
+            max_bytes=10 * 1024 * 1024
+        )
+        self.model = settings.openai_model
+        self.temperature = settings.openai_temperature
+
+    async def classify_capture(self, content: str) -> Dict[str, Any]:
+        """
+        Classify a capture, answering locally when the local classifier is confident
+
+        Args:
+            content: The user's input text
+
+        Returns:
+            Dict with classification results (see classify_input)
+        """
+        if settings.local_classifier_enabled:
+            local = self.local_classifier.classify(content)
+            if local is not None:
+                self.capture_routes["local"] += 1
+                return local
+        self.capture_routes["model"] += 1
+        return await self.classify_input(content)
+
+    async def classify_input(self, content: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Classify user input into categories and extract intent
+
+        Results are cached by normalized content, prompt version, model and
+        context, so repeated captures skip the model call.
+
+        Args:
+            content: The user's input text
+            context: Optional context (recent notes, etc.); keep it stable
+                across calls, as it is part of the cache key
+
+        Returns:
+            Dict with classification results
+        """
         user_prompt = f"用户输入: {content}"
         if context:
             user_prompt += f"\n\n上下文: {json.dumps(context, ensure_ascii=False)}"
 
+        cache_key = self._classification_key(content, context)
+        cached = await asyncio.to_thread(self._cache_get, self.classification_cache, cache_key)
+        if cached is not None:
+            return {"success": True, **cached}
+
         try:
-            response = self.client.chat.completions.create(
+            response = await self.gateway.call("classify", lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": CLASSIFY_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=self.temperature,
                 response_format={"type": "json_object"}
-            )
+            ))
 
             result = json.loads(response.choices[0].message.content)
-            return {
-                "success": True,
-                **result
-            }
+        except Exception as e:
+            return self._classification_fallback(content, e)
 
+        await asyncio.to_thread(self._cache_set, self.classification_cache, cache_key, result)
+        return {
+            "success": True,
+            **result
+        }
+
+    async def classify_batch(self, contents: List[str]) -> List[Dict[str, Any]]:
+        """
+        Classify many captures in as few model calls as possible
+
+        Confident local answers and cached results are used first; the rest
+        are deduplicated and packed into JSON-mode prompts of at most
+        classify_batch_token_budget estimated tokens, which run concurrently
+        under the classify limits. Items a batch answer leaves out are
+        classified on their own.
+
+        Args:
+            contents: The captured texts
+
+        Returns:
+            One classify_input-shaped dict per content, in order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(contents)
+        pending: Dict[str, List[int]] = {}  # cache key -> indexes of the same capture
+        for i, content in enumerate(contents):
+            if settings.local_classifier_enabled:
+                local = self.local_classifier.classify(content)
+                if local is not None:
+                    self.capture_routes["local"] += 1
+                    results[i] = local
+                    continue
+            self.capture_routes["model"] += 1
+            pending.setdefault(self._classification_key(content), []).append(i)
+
+        keys = list(pending)
+        cached = await asyncio.to_thread(lambda: [self._cache_get(self.classification_cache, key) for key in keys])
+        uncached = []
+        for key, hit in zip(keys, cached):
+            if hit is not None:
+                for i in pending[key]:
+                    results[i] = {"success": True, **hit}
+            else:
+                uncached.append((key, contents[pending[key][0]]))
+
+        answers = await asyncio.gather(*(
+            self._classify_packed(batch) for batch in self._pack_classifications(uncached)
+        ))
+        for batch_answers in answers:
+            for key, result in batch_answers.items():
+                for i in pending[key]:
+                    results[i] = result
+        return results
+
+    @staticmethod
+    def _pack_classifications(items: List[tuple]) -> List[List[tuple]]:
+        """Split (key, content) items into batches under the token and item limits"""
+        batches: List[List[tuple]] = []
+        batch: List[tuple] = []
+        used = 0
+        for key, content in items:
+            cost = estimate_tokens(content) + CLASSIFY_BATCH_ITEM_OVERHEAD
+            if batch and (used + cost > settings.classify_batch_token_budget
+                          or len(batch) >= settings.classify_batch_max_items):
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append((key, content))
+            used += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _classify_packed(self, batch: List[tuple]) -> Dict[str, Dict[str, Any]]:
+        """Classify one packed batch with a single call; returns results by cache key"""
+        if len(batch) == 1:
+            key, content = batch[0]
+            return {key: await self.classify_input(content)}
+
+        payload = json.dumps(
+            [{"id": n, "content": content} for n, (_, content) in enumerate(batch)],
+            ensure_ascii=False
+        )
+        try:
+            response = await self.gateway.call("classify", lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": CLASSIFY_SYSTEM_PROMPT + CLASSIFY_BATCH_INSTRUCTIONS},
+                    {"role": "user", "content": payload}
+                ],
+                temperature=self.temperature,
+                response_format={"type": "json_object"}
+            ))
+            entries = json.loads(response.choices[0].message.content).get("results", [])
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "category": "note",  # fallback
-                "confidence": 0.5,
-                "title": content[:50],
-                "suggested_tags": [],
-                "target_folder": "01_Execution/Daily_Operations/Ideas"
-            }
+            return {key: self._classification_fallback(content, e) for key, content in batch}
+
+        answered: Dict[int, Dict[str, Any]] = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, dict) and "category" in entry:
+                try:
+                    answered[int(entry.pop("id"))] = entry
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+        fresh = {key: answered[n] for n, (key, _) in enumerate(batch) if n in answered}
+        await asyncio.to_thread(lambda: [
+            self._cache_set(self.classification_cache, key, result) for key, result in fresh.items()
+        ])
+        results = {key: {"success": True, **result} for key, result in fresh.items()}
+
+        # The model occasionally drops or garbles an item; ask for those one by one
+        missing = [(key, content) for key, content in batch if key not in results]
+        retried = await asyncio.gather(*(self.classify_input(content) for _, content in missing))
+        results.update((key, result) for (key, _), result in zip(missing, retried))
+        return results
+
+    def _classification_key(self, content: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key of a classification: prompt version, model, normalized content and context"""
+        return content_key(
+            CLASSIFY_PROMPT_VERSION,
+            self.model,
+            normalize_capture(content),
+            json.dumps(context or {}, ensure_ascii=False, sort_keys=True, default=str)
+        )
+
+    @staticmethod
+    def _cache_get(cache: TieredCache, key: str) -> Optional[Any]:
+        """Cached value, or None on a miss or when the cache cannot be read (locked, corrupt)"""
+        try:
+            return cache.get(key)
+        except Exception as e:
+            print(f"Warning: Could not read {cache.path.name}: {e}")
+            return None
 
-    def chat_response(self, message: str, conversation_history: List[Dict[str, str]], vault_context: Optional[str] = None) -> str:
+    @staticmethod
+    def _cache_set(cache: TieredCache, key: str, value: Any) -> None:
+        """Store a result; a failed write only costs a later cache miss"""
+        try:
+            cache.set(key, value)
+        except Exception as e:
+            print(f"Warning: Could not write {cache.path.name}: {e}")
+
+    @staticmethod
+    def _classification_fallback(content: str, error: Exception) -> Dict[str, Any]:
+        """Result returned when a capture could not be classified"""
+        return {
+            "success": False,
+            "error": str(error),
+            "category": "note",  # fallback
+            "confidence": 0.5,
+            "title": content[:50],
+            "suggested_tags": [],
+            "target_folder": "01_Execution/Daily_Operations/Ideas"
+        }
+
+    async def chat_response(self, message: str, conversation_history: List[Dict[str, str]], vault_context: Optional[str] = None) -> str:
         """
         Generate a chat response based on conversation history
 
@@ -93,128 +531,280 @@ class AIProcessor:
         Returns:
             AI's response string
         """
-        system_prompt = """你是一个友好的知识管理AI助理。你帮助用户管理他们的Obsidian知识库。
-
-你的能力包括:
-- 记录和分类信息
-- 回答关于知识库内容的问题
-- 提供建议和洞察
-- 帮助用户反思和规划
-
-请用简洁、友好的语气回复。如果用户想记录内容，确认你理解了他们的意图。
-"""
-
-        if vault_context:
-            system_prompt += f"\n\n相关知识库内容:\n{vault_context}"
-
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": message})
+        history = await self.compact_history(conversation_history)
+        messages = self._chat_messages(message, history, vault_context)
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.gateway.call("chat", lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=self.temperature
-            )
+            ))
 
             return response.choices[0].message.content
 
         except Exception as e:
             return f"抱歉，我遇到了一些问题: {str(e)}"
 
-    def summarize_text(self, text: str, max_length: int = 200) -> str:
+    async def chat_stream(
+        self,
+        message: str,
+        conversation_history: List[Dict[str, str]],
+        vault_context: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Generate a summary of the given text
+        Stream a chat response as it is generated
+
+        Closing the generator early (client gone) stops the upstream request.
 
         Args:
-            text: Text to summarize
-            max_length: Maximum length of summary
+            message: User's current message
+            conversation_history: Previous messages (see chat_response)
+            vault_context: Optional context from the knowledge base
 
-        Returns:
-            Summary string
+        Yields:
+            {"type": "token", "content": ...} per content delta, then one
+            {"type": "done", ...} with finish_reason, usage, time to first
+            token and total time (ms), or {"type": "error", "message": ...}
         """
-        prompt = f"请用{max_length}字以内总结以下内容:\n\n{text}"
+        started = time.perf_counter()
+        history = await self.compact_history(conversation_history)
+        messages = self._chat_messages(message, history, vault_context)
+        first_token = None
+        finish_reason = None
+        usage = None
+        reply = []
 
         try:
-            response = self.client.chat.completions.create(
+            async for chunk in self.gateway.stream("chat", lambda: self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "你是一个擅长总结的助理。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
-
-            return response.choices[0].message.content
-
+                messages=messages,
+                temperature=self.temperature,
+                stream=True,
+                extra_body={"stream_options": {"include_usage": True}}
+            )):
+                # Sent in a final chunk without choices; openai 1.12 keeps it as an untyped extra
+                chunk_usage = getattr(chunk, "usage", None)
+                if chunk_usage is not None:
+                    usage = chunk_usage if isinstance(chunk_usage, dict) else chunk_usage.model_dump()
+                for choice in chunk.choices:
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+                    if choice.delta.content:
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                        reply.append(choice.delta.content)
+                        yield {"type": "token", "content": choice.delta.content}
         except Exception as e:
-            return text[:max_length] + "..."
+            yield {"type": "error", "message": f"抱歉，我遇到了一些问题: {str(e)}"}
+            return
+
+        if usage is None:
+            # Servers without stream usage support: estimate locally
+            prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+            completion_tokens = estimate_tokens("".join(reply))
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "estimated": True
+            }
+        finished = time.perf_counter()
+        yield {
+            "type": "done",
+            "finish_reason": finish_reason,
+            "usage": usage,
+            "ttft_ms": round((first_token - started) * 1000, 1) if first_token else None,
+            "duration_ms": round((finished - started) * 1000, 1)
+        }
+
+    @staticmethod
+    def _chat_messages(
+        message: str,
+        conversation_history: List[Dict[str, str]],
+        vault_context: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """System prompt (with vault context), history and the new message"""
+        system_prompt = CHAT_SYSTEM_PROMPT
+        if vault_context:
+            system_prompt += f"\n\n相关知识库内容:\n{vault_context}"
+
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": message})
+        return messages
 
-    def suggest_related_notes(self, current_note_content: str, all_notes_titles: List[str]) -> List[str]:
+    async def compact_history(self, conversation_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """
-        Suggest related notes based on content
+        Fit conversation history into the chat_history_token_budget setting
+
+        History under the budget (estimated locally) is returned unchanged.
+        Past it, the most recent chat_history_keep_turns turns stay verbatim
+        and everything before a segment boundary is replaced by one system
+        message holding a rolling summary. The boundary only moves every
+        chat_history_segment_turns turns and each summary is cached by the
+        history it covers, so a long session pays one summarize call per
+        segment and its prompt stays roughly constant in size.
 
         Args:
-            current_note_content: Content of the current note
-            all_notes_titles: List of all note titles in the vault
+            conversation_history: Previous messages (see chat_response)
 
         Returns:
-            List of suggested note titles
+            Messages to send in place of the history
         """
-        if len(all_notes_titles) < 2:
-            return []
+        total = sum(estimate_tokens(m.get("content") or "") for m in conversation_history)
+        if total <= settings.chat_history_token_budget:
+            return conversation_history
 
-        prompt = f"""基于以下笔记内容，从给定的标题列表中选择最相关的3-5篇笔记。
+        keep = 2 * max(settings.chat_history_keep_turns, 1)
+        segment = 2 * max(settings.chat_history_segment_turns, 1)
+        boundary = (len(conversation_history) - keep) // segment * segment
+        if boundary <= 0:
+            return conversation_history
 
-当前笔记内容:
-{current_note_content[:500]}
+        try:
+            summary = await self._history_summary(conversation_history, boundary, segment)
+        except Exception as e:
+            # Better to forget old turns than to overflow the context window
+            print(f"Warning: Could not summarize chat history: {e}")
+            return conversation_history[boundary:]
 
-可用的笔记标题:
-{json.dumps(all_notes_titles[:100], ensure_ascii=False)}
+        return [{"role": "system", "content": f"之前对话的摘要:\n{summary}"}] + conversation_history[boundary:]
 
-请返回JSON格式: {{"related_notes": ["标题1", "标题2", ...]}}
-"""
+    async def _history_summary(self, history: List[Dict[str, str]], boundary: int, segment: int) -> str:
+        """
+        Summary of history[:boundary], built from the summary one segment back
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "你是一个知识关联专家。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                response_format={"type": "json_object"}
-            )
+        Raises on model errors so that a fallback is never cached.
+        """
+        key = content_key(
+            HISTORY_SUMMARY_VERSION, self.model,
+            json.dumps(history[:boundary], ensure_ascii=False, sort_keys=True)
+        )
+        cached = await asyncio.to_thread(self._cache_get, self.history_summary_cache, key)
+        if cached is not None:
+            return cached
+
+        previous = await self._history_summary(history, boundary - segment, segment) if boundary > segment else None
+        transcript = "\n".join(
+            f"{HISTORY_ROLE_NAMES.get(m.get('role'), m.get('role'))}: {m.get('content') or ''}"
+            for m in history[boundary - segment:boundary]
+        )
+        text = f"之前的摘要:\n{previous}\n\n后续对话:\n{transcript}" if previous else transcript
+        summary = await self._summarize(text, HISTORY_SUMMARY_LENGTH)
+
+        await asyncio.to_thread(self._cache_set, self.history_summary_cache, key, summary)
+        return summary
+
+    async def summarize_text(self, text: str, max_length: int = 200) -> str:
+        """
+        Generate a summary of the given text
 
-            result = json.loads(response.choices[0].message.content)
-            return result.get("related_notes", [])
+        Args:
+            text: Text to summarize
+            max_length: Maximum length of summary
+
+        Returns:
+            Summary string
+        """
+        try:
+            return await self._summarize(text, max_length)
 
         except Exception as e:
-            print(f"Error suggesting related notes: {e}")
-            return []
+            return text[:max_length] + "..."
 
-    def transcribe_audio(self, audio_file_path: str) -> Dict[str, Any]:
+    async def _summarize(self, text: str, max_length: int) -> str:
+        prompt = f"请用{max_length}字以内总结以下内容:\n\n{text}"
+        response = await self.gateway.call("summarize", lambda: self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SUMMARIZE_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3
+        ))
+        return response.choices[0].message.content
+
+    async def transcribe_audio(self, audio_file_path: str, audio_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Transcribe audio file to text using Whisper API
 
+        Recordings longer than the voice_segment_seconds setting (or over the
+        API size limit) are cut at pauses and the segments transcribed
+        concurrently, then joined in order.
+
+        With audio_hash, transcripts are cached by audio content and
+        identical recordings being transcribed at the same time (client
+        retries) share one transcription.
+
         Args:
             audio_file_path: Path to audio file
+            audio_hash: Content hash of the file (see core.audio.spool_upload)
 
         Returns:
-            Dict with transcription result
+            Dict with transcription result, the number of segments and
+            whether it came from the cache
         """
+        if audio_hash is None:
+            return await self._transcribe_segments(audio_file_path)
+
+        cache_key = content_key(TRANSCRIBE_MODEL, audio_hash)
+        cached = await asyncio.to_thread(self._cache_get, self.transcript_cache, cache_key)
+        if cached is not None:
+            return {"success": True, **cached, "cached": True}
+
+        task = self._transcriptions.get(cache_key)
+        if task is None:
+            # The shared transcription reads its own name for the file: this
+            # caller deletes its upload as soon as its own wait ends, which may
+            # be long before the transcription does. The name is made off the
+            # event loop (without hard links it is a full copy), and the task
+            # is registered before any await so no other waiter can slip in.
+            naming = asyncio.ensure_future(asyncio.to_thread(link_or_copy, audio_file_path))
+            task = asyncio.ensure_future(self._transcribe_and_cache(naming, cache_key))
+            self._transcriptions[cache_key] = task
+            task.add_done_callback(lambda _: self._transcriptions.pop(cache_key, None))
+            try:
+                await asyncio.wait([naming])
+            except asyncio.CancelledError:
+                # Keep the upload until the task has its own name for it
+                await asyncio.wait([naming])
+                raise
+        else:
+            self.transcripts_deduplicated += 1
+        # A waiter going away must not cancel the transcription for the others
+        return await asyncio.shield(task)
+
+    async def _transcribe_and_cache(self, naming: "asyncio.Future[str]", cache_key: str) -> Dict[str, Any]:
+        """Transcribe and cache a success; deletes the file naming resolves to, which the task owns"""
+        audio_file_path = await naming
         try:
-            with open(audio_file_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="json"
-                )
+            result = await self._transcribe_segments(audio_file_path)
+        finally:
+            with contextlib.suppress(OSError):
+                os.unlink(audio_file_path)
+        if result["success"]:
+            await asyncio.to_thread(
+                self._cache_set, self.transcript_cache, cache_key,
+                {"text": result["text"], "segments": result["segments"]}
+            )
+        return result
+
+    async def _transcribe_segments(self, audio_file_path: str) -> Dict[str, Any]:
+        workdir = tempfile.mkdtemp(prefix="voice-")
+        tasks = []
+        try:
+            segments = await asyncio.to_thread(
+                split_audio, audio_file_path, workdir, settings.voice_segment_seconds
+            )
+            tasks = [asyncio.ensure_future(self._transcribe_file(Path(segment))) for segment in segments]
+            texts = await asyncio.gather(*tasks)
 
             return {
                 "success": True,
-                "text": transcript.text
+                "text": stitch_transcripts(texts),
+                "segments": len(segments),
+                "cached": False
             }
 
         except Exception as e:
@@ -223,6 +813,20 @@ class AIProcessor:
                 "error": str(e),
                 "text": ""
             }
+        finally:
+            # One failed segment fails the recording; stop the others
+            for task in tasks:
+                task.cancel()
+            await asyncio.to_thread(shutil.rmtree, workdir, True)
+
+    async def _transcribe_file(self, audio_path: Path) -> str:
+        audio_bytes = await asyncio.to_thread(audio_path.read_bytes)
+        transcript = await self.gateway.call("transcribe", lambda: self.client.audio.transcriptions.create(
+            model=TRANSCRIBE_MODEL,
+            file=(audio_path.name, audio_bytes),
+            response_format="json"
+        ))
+        return transcript.text
 
 
 # Global instance
@@ -0,0 +1,256 @@
+"""
+Voice recording handling for transcription
+Uploads are spooled to disk in chunks under a size cap, and long
+recordings are cut into segments at pauses so they can be transcribed
+concurrently and stay under the transcription API's file size limit.
+WAV is split natively; other formats are decoded with ffmpeg when it is
+installed and they need splitting, and sent whole otherwise.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple
+
+import numpy as np
+
+
+# Whisper API upload limit
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Compressed uploads smaller than this are sent as they are
+DECODE_MIN_BYTES = 512 * 1024
+
+# Decoded format for splitting: 16 kHz mono 16-bit PCM (32 KB per second)
+DECODE_RATE = 16000
+
+# A cut is placed in the last SEARCH_FRACTION of a segment window, at the
+# quietest stretch of SMOOTH_MS (loudness measured per BLOCK_MS)
+SEARCH_FRACTION = 0.3
+BLOCK_MS = 20
+SMOOTH_MS = 200
+
+SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured size cap"""
+
+
+def spool_upload(source: BinaryIO, max_bytes: int, suffix: str = ".webm") -> Tuple[str, str]:
+    """
+    Copy an upload to a temp file in chunks, never holding it in memory,
+    hashing it on the way
+
+    Args:
+        source: Readable binary file (e.g. UploadFile.file)
+        max_bytes: Largest accepted upload
+        suffix: Temp file suffix; transcription detects the format from it
+
+    Returns:
+        Path of the temp file (the caller deletes it) and the SHA-256 hex
+        digest of its content
+
+    Raises:
+        UploadTooLarge: The upload is over max_bytes (nothing is left on disk)
+    """
+    written = 0
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        try:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f"Recording is larger than {max_bytes} bytes")
+                temp_file.write(chunk)
+                digest.update(chunk)
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_file.name)
+            raise
+        return temp_file.name, digest.hexdigest()
+
+
+def link_or_copy(path: str) -> str:
+    """
+    Give a recording a second name next to it: a hard link, or a copy where
+    links are not supported
+
+    Returns:
+        The new path; deleting either name leaves the other readable
+    """
+    directory, name = os.path.split(path)
+    stem, suffix = os.path.splitext(name)
+    fd, target = tempfile.mkstemp(prefix=f"{stem}-", suffix=suffix, dir=directory)
+    os.close(fd)
+    try:
+        os.unlink(target)
+        os.link(path, target)
+    except OSError:
+        shutil.copyfile(path, target)
+    return target
+
+
+def split_audio(path: str, workdir: str, segment_seconds: float, max_bytes: int = WHISPER_MAX_BYTES) -> List[str]:
+    """
+    Cut a recording into segments for separate transcription
+
+    Each segment is at most segment_seconds long and max_bytes large and
+    ends at the quietest moment near its end, so words are not cut in half.
+
+    Args:
+        path: Recording to split
+        workdir: Directory for segment files (the caller deletes it)
+        segment_seconds: Longest segment
+        max_bytes: Largest segment file
+
+    Returns:
+        Segment paths in order; [path] when the recording needs no split
+
+    Raises:
+        ValueError: The recording is over max_bytes and cannot be split here
+    """
+    source = path
+    size = os.path.getsize(path)
+    if (
+        not _is_wav(path) and size > DECODE_MIN_BYTES and shutil.which("ffmpeg")
+        and _needs_split(path, size, segment_seconds, max_bytes)
+    ):
+        try:
+            source = _decode_to_wav(path, workdir)
+        except (subprocess.SubprocessError, OSError) as e:
+            # Sent whole if the API takes it as it is
+            print(f"Warning: Could not decode {path} for splitting: {e}")
+
+    if _is_wav(source):
+        segments = _split_wav(source, workdir, segment_seconds, max_bytes)
+        if segments is not None:
+            return segments
+        if source != path and os.path.getsize(source) <= max_bytes:
+            return [source]
+
+    if size > max_bytes:
+        raise ValueError(
+            f"Recording is larger than the {max_bytes // (1024 * 1024)} MB transcription limit "
+            "and cannot be split (install ffmpeg to split compressed audio)"
+        )
+    return [path]
+
+
+def stitch_transcripts(texts: List[str]) -> str:
+    """Join segment transcripts in order; no space between CJK text"""
+    result = ""
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            continue
+        if result and not (_no_space(result[-1]) or _no_space(text[0])):
+            result += " "
+        result += text
+    return result
+
+
+def _no_space(char: str) -> bool:
+    # CJK scripts and full-width punctuation are written without spaces
+    return ord(char) >= 0x3000
+
+
+def _is_wav(path: str) -> bool:
+    try:
+        with wave.open(path, "rb"):
+            return True
+    except (wave.Error, EOFError, OSError):
+        return False
+
+
+def _needs_split(path: str, size: int, segment_seconds: float, max_bytes: int) -> bool:
+    """Whether a compressed recording is too large or too long to send whole"""
+    if size > max_bytes:
+        return True
+    duration = _probe_duration(path)
+    return duration is None or duration > segment_seconds
+
+
+def _probe_duration(path: str) -> Optional[float]:
+    """Length in seconds as reported by ffprobe, or None if unknown"""
+    if not shutil.which("ffprobe"):
+        return None
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", path],
+            check=True, capture_output=True, text=True, timeout=60
+        )
+        return float(result.stdout.strip())
+    except (subprocess.SubprocessError, OSError, ValueError):
+        return None
+
+
+def _decode_to_wav(path: str, workdir: str) -> str:
+    target = str(Path(workdir) / "decoded.wav")
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", path,
+         "-vn", "-ac", "1", "-ar", str(DECODE_RATE), "-c:a", "pcm_s16le", target],
+        check=True, capture_output=True, timeout=600
+    )
+    return target
+
+
+def _split_wav(path: str, workdir: str, segment_seconds: float, max_bytes: int) -> Optional[List[str]]:
+    """Split PCM WAV at pauses; None for sample formats it cannot measure"""
+    with wave.open(path, "rb") as reader:
+        params = reader.getparams()
+        if params.sampwidth not in SAMPLE_DTYPES or params.comptype != "NONE":
+            return None
+        frame_bytes = params.sampwidth * params.nchannels
+        window = int(min(segment_seconds * params.framerate, (max_bytes - 1024) // frame_bytes))
+        if params.nframes <= window:
+            return [path]
+
+        segments = []
+        position = 0
+        while position < params.nframes:
+            end = params.nframes
+            if end - position > window:
+                end = position + _quietest_cut(reader, params, position, window)
+            reader.setpos(position)
+            frames = reader.readframes(end - position)
+
+            segment = str(Path(workdir) / f"segment-{len(segments):04d}.wav")
+            with wave.open(segment, "wb") as writer:
+                writer.setparams(params)
+                writer.writeframes(frames)
+            segments.append(segment)
+            position = end
+        return segments
+
+
+def _quietest_cut(reader: wave.Wave_read, params, position: int, window: int) -> int:
+    """Offset from position, within the search region of the window, of the quietest moment"""
+    search_start = int(window * (1 - SEARCH_FRACTION))
+    reader.setpos(position + search_start)
+    samples = np.frombuffer(
+        reader.readframes(window - search_start), dtype=SAMPLE_DTYPES[params.sampwidth]
+    ).astype(np.float32)
+    if params.sampwidth == 1:
+        samples -= 128
+    samples = samples.reshape(-1, params.nchannels).mean(axis=1)
+
+    block = max(params.framerate * BLOCK_MS // 1000, 1)
+    blocks = len(samples) // block
+    if blocks < 2:
+        return window
+    energy = (samples[:blocks * block].reshape(blocks, block) ** 2).mean(axis=1)
+    smooth = max(SMOOTH_MS // BLOCK_MS, 1)
+    if blocks > smooth:
+        energy = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+    quietest = int(np.argmin(energy))
+    return search_start + quietest * block + block // 2
@@ -0,0 +1,142 @@
+"""
+BM25 postings shared by search and retrieval
+Documents (notes for search, chunks for retrieval) are numbered in the
+order they are added. Deleting one only marks it dead; compact() drops the
+dead ones and renumbers the rest once enough have piled up.
+"""
+from array import array
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+MAX_TF = 65535
+
+
+class BM25Postings:
+    """Term postings and document lengths with BM25 scoring over live documents"""
+
+    def __init__(self, k1: float, b: float):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: How much document length normalizes scores (0 to 1)
+        """
+        self.k1 = k1
+        self.b = b
+        self.reset()
+
+    def __len__(self) -> int:
+        """Documents numbered so far, dead ones included"""
+        return len(self.lengths)
+
+    @property
+    def live(self) -> int:
+        return len(self.lengths) - self.dead
+
+    def reset(self) -> None:
+        # term -> (doc ids, term frequencies); doc ids are only ever appended
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.lengths = array("f")
+        self.alive = bytearray()
+        self.total_len = 0.0
+        self.dead = 0
+
+    def add(self, counts: Counter) -> int:
+        """
+        Add a document
+
+        Args:
+            counts: Term frequencies of the document
+
+        Returns:
+            The new document's id
+        """
+        doc = len(self.lengths)
+        postings = self.postings
+        for term, tf in counts.items():
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = (array("I"), array("H"))
+            posting[0].append(doc)
+            posting[1].append(tf if tf < MAX_TF else MAX_TF)
+        length = sum(counts.values())
+        self.lengths.append(length)
+        self.alive.append(1)
+        self.total_len += length
+        return doc
+
+    def remove(self, doc: int) -> None:
+        """Mark a document dead; its postings stay until compact()"""
+        self.alive[doc] = 0
+        self.total_len -= self.lengths[doc]
+        self.dead += 1
+
+    def score(self, terms: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 scores of every document for a query
+
+        Args:
+            terms: Distinct query terms
+
+        Returns:
+            (scores, matched) arrays indexed by doc id: the score and the
+            number of query terms the document contains, both 0 for dead docs
+        """
+        n_docs = len(self.lengths)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = np.zeros(n_docs, dtype=np.int16)
+        live = self.live
+        if not live:
+            return scores, matched
+
+        k1 = self.k1
+        lengths = np.frombuffer(self.lengths, dtype=np.float32)
+        avgdl = self.total_len / live or 1.0
+        norm = k1 * (1 - self.b + self.b * lengths / avgdl)
+        alive = np.frombuffer(self.alive, dtype=bool)
+
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            ids = np.frombuffer(posting[0], dtype=np.uint32)
+            tfs = np.frombuffer(posting[1], dtype=np.uint16).astype(np.float32)
+            df = int(alive[ids].sum())
+            if not df:
+                continue
+            idf = np.log(1 + (live - df + 0.5) / (df + 0.5))
+            scores[ids] += idf * tfs * (k1 + 1) / (tfs + norm[ids])
+            matched[ids] += 1
+
+        scores[~alive] = 0
+        matched[~alive] = 0
+        return scores, matched
+
+    def compact(self) -> List[int]:
+        """
+        Drop dead documents from the postings and renumber the rest
+
+        Returns:
+            Old ids of the kept documents, in order; the new id of each is
+            its position, so callers can renumber their per-document data
+        """
+        keep = [doc for doc, flag in enumerate(self.alive) if flag]
+        remap = np.full(len(self.lengths), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        postings = {}
+        for term, (ids, tfs) in self.postings.items():
+            new_ids = remap[np.frombuffer(ids, dtype=np.uint32)]
+            mask = new_ids >= 0
+            if mask.any():
+                postings[term] = (
+                    array("I", new_ids[mask].astype(np.uint32).tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[mask].tobytes())
+                )
+        self.postings = postings
+        self.lengths = array("f", (self.lengths[doc] for doc in keep))
+        self.alive = bytearray(b"\x01" * len(keep))
+        self.dead = 0
+        return keep
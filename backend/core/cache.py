@@ -0,0 +1,141 @@
+"""
+Two-tier result cache
+An in-memory LRU in front of a SQLite file with TTL and size-based eviction,
+for results that are expensive to recompute (model calls)
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+
+def content_key(*parts: str) -> str:
+    """Stable cache key for a sequence of strings"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TieredCache:
+    """LRU memory tier backed by a SQLite tier; values must be JSON-serializable"""
+
+    def __init__(self, path: Path, memory_size: int = 1024, ttl: float = 30 * 86400, max_bytes: int = 50 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite file for the disk tier
+            memory_size: Entries kept in the memory tier
+            ttl: Seconds an entry stays valid (both tiers)
+            max_bytes: Disk tier budget; least recently used entries are evicted past it
+        """
+        self.path = path
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss or an expired entry"""
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if cached[1] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return cached[0]
+                del self._memory[key]
+
+            row = self._db.execute("SELECT value, created, size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            raw, created, size = row
+            if created + self.ttl <= now:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._disk_bytes -= size
+                self._stats["misses"] += 1
+                return None
+
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            value = json.loads(raw)
+            self._remember(key, value, created + self.ttl)
+            self._stats["disk_hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in both tiers"""
+        now = time.time()
+        raw = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(raw.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, now + self.ttl)
+            old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, raw, now, now, size)
+            )
+            self._disk_bytes += size - (old[0] if old else 0)
+            self._stats["writes"] += 1
+            if self._disk_bytes > self.max_bytes:
+                self._evict(now)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes
+            }
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM entries")
+            self._disk_bytes = 0
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones down to 90% of the budget"""
+        evicted = self._db.execute("DELETE FROM entries WHERE created <= ?", (now - self.ttl,)).rowcount
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        target = self.max_bytes * 0.9
+        while self._disk_bytes > target:
+            rows = self._db.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 100").fetchall()
+            if not rows:
+                break
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in rows])
+            for key, size in rows:
+                self._disk_bytes -= size
+                self._memory.pop(key, None)
+            evicted += len(rows)
+        self._stats["evictions"] += evicted
@@ -0,0 +1,344 @@
+"""
+Capture filing: folder and frontmatter for classified captures, and the
+write-first capture queue
+
+In queued mode a capture is written to the inbox as-is and journaled, so
+the API answers without waiting for the model. Background workers then
+classify each capture, move the note to the folder its category maps to,
+and patch its frontmatter, retrying with backoff while the model fails.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set, Tuple
+from .config import settings
+from .obsidian import obsidian
+from .ai_processor import ai_processor
+from .executor import run_in_vault
+
+
+# Capture states: pending (waiting in the queue), processing, retrying (waiting
+# out a backoff), filed (moved to its folder) and failed (left in the inbox)
+FINISHED = ("filed", "failed")
+RETRY_MAX_DELAY = 300.0
+
+
+def prepare_capture(
+    content: str,
+    classification: Dict[str, Any],
+    input_type: str = "text",
+    metadata: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """
+    Turn a capture and its classification into create_note arguments
+
+    Args:
+        content: The captured text
+        classification: Result of AIProcessor.classify_capture
+        input_type: text or voice
+        metadata: Caller-supplied frontmatter, applied last
+
+    Returns:
+        (category, classification, note kwargs); the classification is
+        replaced by a fallback when the AI classification failed
+    """
+    if not classification.get("success"):
+        # Fallback if AI classification fails
+        classification = {
+            "category": "note",
+            "title": content[:50],
+            "target_folder": settings.ideas_path,
+            "suggested_tags": []
+        }
+
+    # Determine target folder based on category
+    category = classification.get("category", "note")
+    folder_map = {
+        "work_log": settings.daily_logs_path,
+        "idea": settings.ideas_path,
+        "task": settings.tasks_path,
+        "project_update": settings.projects_path,
+        "article": settings.writing_path,
+    }
+
+    target_folder = folder_map.get(category, settings.ideas_path)
+
+    # Prepare metadata
+    front = {
+        "type": category,
+        "tags": classification.get("suggested_tags", []),
+        "ai_confidence": classification.get("confidence", 0),
+        "input_type": input_type
+    }
+
+    if metadata:
+        front.update(metadata)
+
+    note = {
+        "content": content,
+        "title": classification.get("title", content[:50]),
+        "folder": target_folder,
+        "metadata": front
+    }
+    return category, classification, note
+
+
+class CaptureQueue:
+    """Durable queue of inbox captures waiting to be classified and filed"""
+
+    def __init__(self, manager, ai, journal_path: Path, workers: int = 2, max_attempts: int = 5,
+                 retry_delay: float = 5.0, history: int = 1000):
+        """
+        Args:
+            manager: ObsidianManager that writes and moves the notes
+            ai: AIProcessor that classifies captures
+            journal_path: Append-only JSONL journal of capture states
+            workers: Captures classified concurrently
+            max_attempts: Classification attempts before a capture is left in the inbox
+            retry_delay: Seconds before the first retry; doubles per attempt
+            history: Finished captures kept for status lookups
+        """
+        self.manager = manager
+        self.ai = ai
+        self.journal_path = journal_path
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.history = history
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._journal_lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._backoffs: Set[asyncio.Task] = set()
+
+    async def start(self) -> int:
+        """
+        Replay the journal and start the workers
+
+        Returns:
+            Number of unfinished captures re-queued from the journal
+        """
+        self._queue = asyncio.Queue()
+        jobs = await run_in_vault(self._load_journal)
+        for job in jobs:
+            self._jobs[job["id"]] = job
+            if job["status"] not in FINISHED:
+                job["status"] = "pending"
+                self._queue.put_nowait(job["id"])
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self._queue.qsize()
+
+    async def stop(self) -> None:
+        """Stop the workers; unfinished captures resume from the journal on next start"""
+        tasks = self._tasks + list(self._backoffs)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, content: str, input_type: str = "text",
+                     metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Write a capture to the inbox and queue it for filing
+
+        Returns once the note and its journal record are on disk.
+
+        Returns:
+            The capture's status record (see status)
+        """
+        if self._queue is None:
+            raise RuntimeError("Capture queue is not running")
+
+        capture_id = uuid.uuid4().hex
+        job = {
+            "id": capture_id,
+            "status": "pending",
+            "attempts": 0,
+            "file_path": None,
+            "category": None,
+            "error": None,
+            "input_type": input_type,
+            "metadata": metadata or {},
+            "created": time.time(),
+            "updated": time.time()
+        }
+        job["file_path"] = await run_in_vault(self._write_inbox_note, job, content)
+        self._remember(job)
+        self._queue.put_nowait(capture_id)
+        return self.status(capture_id)
+
+    def status(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Current state of a capture
+
+        Returns:
+            Dict with id, status, attempts, file_path (where the note is now),
+            category, error and timestamps, or None for unknown ids
+        """
+        job = self._jobs.get(capture_id)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if key != "metadata"}
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and capture counts by status"""
+        counts = {"pending": 0, "processing": 0, "retrying": 0, "filed": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "running": bool(self._tasks),
+            "workers": self.workers,
+            "depth": counts["pending"] + counts["processing"] + counts["retrying"],
+            "retries": sum(max(0, job["attempts"] - 1) for job in self._jobs.values()),
+            **counts
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            capture_id = await self._queue.get()
+            job = self._jobs.get(capture_id)
+            if job is not None and job["status"] == "pending":
+                try:
+                    await self._process(job)
+                except Exception as e:
+                    print(f"Warning: Capture {capture_id} could not be filed: {e}")
+                    await self._update(job, status="failed", error=str(e))
+            self._queue.task_done()
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        await self._update(job, status="processing", attempts=job["attempts"] + 1)
+        try:
+            note = await run_in_vault(self.manager.read_note, job["file_path"])
+        except FileNotFoundError:
+            await self._update(job, status="failed", error="Inbox note was deleted")
+            return
+
+        classification = await self.ai.classify_capture(note["content"])
+        if not classification.get("success"):
+            error = classification.get("error", "classification failed")
+            if job["attempts"] >= self.max_attempts:
+                await run_in_vault(self.manager.update_note, job["file_path"], metadata={"capture_status": "failed"})
+                await self._update(job, status="failed", error=error)
+            else:
+                await self._update(job, status="retrying", error=error)
+                delay = min(RETRY_MAX_DELAY, self.retry_delay * 2 ** (job["attempts"] - 1))
+                backoff = asyncio.create_task(self._requeue(job["id"], delay))
+                self._backoffs.add(backoff)
+                backoff.add_done_callback(self._backoffs.discard)
+            return
+
+        category, classification, filed = prepare_capture(
+            note["content"], classification, job["input_type"], job["metadata"]
+        )
+        filed["metadata"].update({"capture_id": job["id"], "capture_status": "filed"})
+        moved = await run_in_vault(
+            self.manager.move_note,
+            job["file_path"],
+            folder=filed["folder"],
+            title=filed["title"],
+            metadata=filed["metadata"]
+        )
+        await self._update(job, status="filed", file_path=moved["file_path"], category=category, error=None)
+
+    async def _requeue(self, capture_id: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        job = self._jobs.get(capture_id)
+        if job is not None and job["status"] == "retrying":
+            job["status"] = "pending"
+            self._queue.put_nowait(capture_id)
+
+    async def _update(self, job: Dict[str, Any], **changes: Any) -> None:
+        job.update(changes, updated=time.time())
+        await run_in_vault(self._append, job)
+        if job["status"] in FINISHED:
+            self._jobs.move_to_end(job["id"])
+            self._trim()
+
+    def _remember(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = job
+        self._trim()
+
+    def _trim(self) -> None:
+        """Forget the oldest finished captures beyond the history size"""
+        finished = [key for key, job in self._jobs.items() if job["status"] in FINISHED]
+        for key in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[key]
+
+    def _write_inbox_note(self, job: Dict[str, Any], content: str) -> str:
+        """Write the raw capture to the inbox and journal it; runs on the vault pool"""
+        first_line = content.strip().splitlines()[0] if content.strip() else "capture"
+        front = dict(job["metadata"])
+        front.update({
+            "type": "inbox",
+            "capture_id": job["id"],
+            "capture_status": "pending",
+            "input_type": job["input_type"]
+        })
+        result = self.manager.create_note(
+            content=content,
+            title=first_line[:50],
+            folder=settings.inbox_path,
+            metadata=front,
+            unique=True
+        )
+        job["file_path"] = result["file_path"]
+        self._append(job)
+        return result["file_path"]
+
+    def _append(self, job: Dict[str, Any]) -> None:
+        """Append a capture's state to the journal and flush it to disk"""
+        line = json.dumps(job, ensure_ascii=False, default=str) + "\n"
+        with self._journal_lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _load_journal(self) -> List[Dict[str, Any]]:
+        """
+        Fold the journal into the latest state per capture and compact it
+
+        Keeps every unfinished capture and the newest finished ones, and
+        rewrites the journal with just those states.
+        """
+        latest: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        job = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash
+                    latest.pop(job["id"], None)
+                    latest[job["id"]] = job
+        except FileNotFoundError:
+            return []
+
+        finished = [job for job in latest.values() if job["status"] in FINISHED][-self.history:] if self.history else []
+        kept = [job for job in latest.values() if job["status"] not in FINISHED or job in finished]
+
+        tmp_path = self.journal_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for job in kept:
+                f.write(json.dumps(job, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        return kept
+
+
+# Global instance
+capture_queue = CaptureQueue(
+    obsidian,
+    ai_processor,
+    settings.full_cache_path / "capture_queue.jsonl",
+    workers=settings.capture_queue_workers,
+    max_attempts=settings.capture_queue_max_attempts,
+    retry_delay=settings.capture_queue_retry_delay,
+    history=settings.capture_queue_history
+)
@@ -3,7 +3,7 @@ Configuration management for the Knowledge Management API
 """
 import os
 from pathlib import Path
-from typing import Optional, Union
+from typing import Optional, Union, Dict
 from pydantic_settings import BaseSettings
 from pydantic import Field, field_validator
 
@@ -37,6 +37,73 @@ class Settings(BaseSettings):
     openai_api_key: str = Field(validation_alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4-turbo-preview", validation_alias="OPENAI_MODEL")
     openai_temperature: float = Field(default=0.7, validation_alias="OPENAI_TEMPERATURE")
+    openai_base_url: Optional[str] = Field(default=None, validation_alias="OPENAI_BASE_URL")
+
+    # LLM gateway: connection pool, rate limit, retries, and per-operation
+    # concurrency caps and deadlines (seconds); the dicts accept JSON from the env
+    llm_max_connections: int = Field(default=20, validation_alias="LLM_MAX_CONNECTIONS")
+    llm_requests_per_minute: float = Field(default=120.0, validation_alias="LLM_REQUESTS_PER_MINUTE")
+    llm_burst: int = Field(default=10, validation_alias="LLM_BURST")
+    llm_max_retries: int = Field(default=4, validation_alias="LLM_MAX_RETRIES")
+    llm_concurrency: Dict[str, int] = Field(
+        default={"classify": 8, "chat": 4, "summarize": 4, "transcribe": 2},
+        validation_alias="LLM_CONCURRENCY"
+    )
+    llm_deadlines: Dict[str, float] = Field(
+        default={"classify": 20.0, "chat": 60.0, "summarize": 30.0, "transcribe": 120.0},
+        validation_alias="LLM_DEADLINES"
+    )
+
+    # Local classifier: minimum confidence for answering a capture without the model
+    local_classifier_enabled: bool = Field(default=True, validation_alias="LOCAL_CLASSIFIER_ENABLED")
+    local_classifier_threshold: float = Field(default=0.9, validation_alias="LOCAL_CLASSIFIER_THRESHOLD")
+
+    # Classification cache: memory LRU entries, disk TTL (seconds) and disk budget (bytes)
+    classification_cache_size: int = Field(default=1024, validation_alias="CLASSIFICATION_CACHE_SIZE")
+    classification_cache_ttl: float = Field(default=30 * 86400, validation_alias="CLASSIFICATION_CACHE_TTL")
+    classification_cache_max_bytes: int = Field(
+        default=50 * 1024 * 1024, validation_alias="CLASSIFICATION_CACHE_MAX_BYTES"
+    )
+
+    # Chat context retrieval: most chunks per message and their total size (estimated tokens)
+    retrieval_top_k: int = Field(default=8, validation_alias="RETRIEVAL_TOP_K")
+    retrieval_token_budget: int = Field(default=1500, validation_alias="RETRIEVAL_TOKEN_BUDGET")
+
+    # Chat history: sent verbatim while under the token budget (estimated tokens); past
+    # it, the last turns are kept and older ones are replaced by a rolling summary that
+    # advances a segment (in turns) at a time
+    chat_history_token_budget: int = Field(default=2000, validation_alias="CHAT_HISTORY_TOKEN_BUDGET")
+    chat_history_keep_turns: int = Field(default=4, validation_alias="CHAT_HISTORY_KEEP_TURNS")
+    chat_history_segment_turns: int = Field(default=4, validation_alias="CHAT_HISTORY_SEGMENT_TURNS")
+
+    # Voice uploads: largest accepted recording (bytes) and longest segment sent to
+    # transcription in one call (seconds); segments are transcribed concurrently
+    voice_max_upload_bytes: int = Field(default=200 * 1024 * 1024, validation_alias="VOICE_MAX_UPLOAD_BYTES")
+    voice_segment_seconds: float = Field(default=300.0, validation_alias="VOICE_SEGMENT_SECONDS")
+
+    # Transcript cache, keyed by audio content: memory LRU entries, disk TTL (seconds)
+    # and disk budget (bytes)
+    transcript_cache_size: int = Field(default=256, validation_alias="TRANSCRIPT_CACHE_SIZE")
+    transcript_cache_ttl: float = Field(default=30 * 86400, validation_alias="TRANSCRIPT_CACHE_TTL")
+    transcript_cache_max_bytes: int = Field(
+        default=20 * 1024 * 1024, validation_alias="TRANSCRIPT_CACHE_MAX_BYTES"
+    )
+
+    # Batch capture: items per request, prompt size (estimated tokens) and items per
+    # classification call, and how many notes are written at once
+    capture_batch_max_items: int = Field(default=1000, validation_alias="CAPTURE_BATCH_MAX_ITEMS")
+    classify_batch_token_budget: int = Field(default=3000, validation_alias="CLASSIFY_BATCH_TOKEN_BUDGET")
+    classify_batch_max_items: int = Field(default=25, validation_alias="CLASSIFY_BATCH_MAX_ITEMS")
+    capture_write_concurrency: int = Field(default=8, validation_alias="CAPTURE_WRITE_CONCURRENCY")
+
+    # Capture mode: sync classifies before writing; queued writes the raw capture to
+    # the inbox at once and files it from a background queue (workers, attempts,
+    # first retry delay in seconds, finished captures kept for status lookups)
+    capture_mode: str = Field(default="sync", validation_alias="CAPTURE_MODE")
+    capture_queue_workers: int = Field(default=2, validation_alias="CAPTURE_QUEUE_WORKERS")
+    capture_queue_max_attempts: int = Field(default=5, validation_alias="CAPTURE_QUEUE_MAX_ATTEMPTS")
+    capture_queue_retry_delay: float = Field(default=5.0, validation_alias="CAPTURE_QUEUE_RETRY_DELAY")
+    capture_queue_history: int = Field(default=1000, validation_alias="CAPTURE_QUEUE_HISTORY")
 
     # Obsidian Vault Configuration
     vault_path: Path = Field(validation_alias="OBSIDIAN_VAULT_PATH")
@@ -50,6 +117,7 @@ class Settings(BaseSettings):
     daily_logs_path: str = "01_Execution/Daily_Operations/Logs"
     ideas_path: str = "01_Execution/Daily_Operations/Ideas"
     tasks_path: str = "01_Execution/Daily_Operations/Tasks"
+    inbox_path: str = "01_Execution/Daily_Operations/Inbox"
 
     # Projects and Writing
     projects_path: str = "01_Execution/Projects"
@@ -58,6 +126,22 @@ class Settings(BaseSettings):
     # Workflows
     workflows_file: str = "00_Foundation/Templates/WORKFLOWS.md"
 
+    # Local caches (note index etc.), relative to the backend working directory
+    cache_dir: Path = Field(default=Path(".cache"), validation_alias="BACKEND_CACHE_DIR")
+    index_refresh_interval: float = Field(default=5.0, validation_alias="INDEX_REFRESH_INTERVAL")
+
+    # Threads serving blocking vault I/O for async request handlers
+    vault_io_workers: int = Field(default=8, validation_alias="VAULT_IO_WORKERS")
+
+    # Full-vault scans: parser processes (0 = one per CPU) and files per batch
+    scan_workers: int = Field(default=0, validation_alias="SCAN_WORKERS")
+    scan_chunk_size: int = Field(default=256, validation_alias="SCAN_CHUNK_SIZE")
+
+    # Vault watcher: auto (inotify on Linux, else polling), inotify, polling or off
+    watcher_backend: str = Field(default="auto", validation_alias="WATCHER_BACKEND")
+    watcher_debounce: float = Field(default=0.5, validation_alias="WATCHER_DEBOUNCE")
+    watcher_poll_interval: float = Field(default=2.0, validation_alias="WATCHER_POLL_INTERVAL")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -68,6 +152,13 @@ class Settings(BaseSettings):
         """Get the full path to the Obsidian vault"""
         return Path(self.vault_path).expanduser().resolve()
 
+    @property
+    def full_cache_path(self) -> Path:
+        """Get the full path to the backend cache directory"""
+        path = Path(self.cache_dir).expanduser().resolve()
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
     def get_full_path(self, relative_path: str) -> Path:
         """Get full path for a relative vault path"""
         return self.full_vault_path / relative_path
@@ -0,0 +1,245 @@
+"""
+Dashboard aggregates
+Counters and summaries behind /api/dashboard, kept up to date from note
+index change notifications so a dashboard read never rescans the vault
+"""
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from .config import settings
+from .obsidian import obsidian, ObsidianManager
+from .tokenizer import CJK_RANGES
+
+
+# Each CJK character counts as a word, as do runs of letters/digits in other scripts
+WORD_RE = re.compile(rf"[{CJK_RANGES}]|(?:(?![{CJK_RANGES}])[^\W_])+")
+
+WEEK_DAYS = 7
+DASHBOARD_ITEMS = 5
+RECENT_ITEMS = 10
+
+
+def count_words(text: str) -> int:
+    """Count words in mixed Chinese/Latin text"""
+    return sum(1 for _ in WORD_RE.finditer(text))
+
+
+class DashboardStore:
+    """Materialized dashboard aggregates, updated per changed note"""
+
+    def __init__(self, manager: ObsidianManager, projects_path: str, writing_path: str):
+        """
+        Args:
+            manager: Vault manager whose note index drives the aggregates
+            projects_path: Folder holding project notes
+            writing_path: Folder holding articles
+        """
+        self.manager = manager
+        self.note_index = manager.index
+        self._projects_prefix = str(Path(projects_path)) + os.sep
+        self._writing_prefix = str(Path(writing_path)) + os.sep
+
+        self._created_day: Dict[str, int] = {}  # path -> ordinal of its created day
+        self._created_per_day: Counter = Counter()
+        self._projects: Dict[str, Dict[str, Any]] = {}  # every project note, any status
+        self._project_status: Counter = Counter()
+        self._articles: Dict[str, Dict[str, Any]] = {}
+        self._daily_log: Optional[Dict[str, Any]] = None
+
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_at = 0.0
+        self._snapshot_day: Optional[date] = None
+
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        self._refreshing = False
+        self._built = False
+        self._lock = threading.RLock()
+        self.note_index.add_listener(self._on_note_changed)
+
+    def build(self) -> None:
+        """Compute every aggregate from scratch"""
+        self.note_index.ensure_fresh(parse=False)
+        with self._lock:
+            with self._dirty_lock:
+                self._dirty.clear()
+            self._created_day = {}
+            self._created_per_day = Counter()
+            self._projects = {}
+            self._project_status = Counter()
+            self._articles = {}
+            self._daily_log = None
+            for file_path in self.note_index.paths():
+                self._add(file_path)
+            self._built = True
+            self._take_snapshot()
+
+    def snapshot(self, fast: bool = False) -> Tuple[Dict[str, Any], float]:
+        """
+        Get the dashboard data
+
+        Args:
+            fast: Return the last snapshot as is, without applying pending
+                note changes (they are applied in the background)
+
+        Returns:
+            (dashboard data, age of the snapshot in seconds)
+        """
+        if fast and self._snapshot is not None:
+            snapshot, taken_at = self._snapshot, self._snapshot_at
+            if self._dirty or self._snapshot_day != date.today():
+                self._refresh_in_background()
+            return snapshot, time.time() - taken_at
+
+        with self._lock:
+            if not self._built:
+                self.build()
+            elif self._apply_dirty() or self._snapshot_day != date.today():
+                self._take_snapshot()
+            return self._snapshot, time.time() - self._snapshot_at
+
+    def _refresh_in_background(self) -> None:
+        with self._dirty_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh() -> None:
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"Warning: Dashboard refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name="dashboard-refresh", daemon=True).start()
+
+    def _take_snapshot(self) -> None:
+        today = date.today()
+        ordinal = today.toordinal()
+        week_entries = sum(self._created_per_day[ordinal - i] for i in range(WEEK_DAYS))
+
+        active_projects = self._newest(
+            project for project in self._projects.values() if project["status"] != "completed"
+        )
+        active_articles = self._newest(
+            article for article in self._articles.values() if article["status"] != "completed"
+        )
+
+        # A new day has a different daily log file
+        if self._daily_log is None or self._snapshot_day != today:
+            self._daily_log = self.manager.get_daily_log()
+
+        recent, _ = self.note_index.page(RECENT_ITEMS, sort_by="modified")
+
+        self._snapshot = {
+            "stats": {
+                "today_entries": self._created_per_day[ordinal],
+                "today_work_time": 0.0,  # TODO: Calculate from logs
+                "active_projects": len(active_projects),
+                "active_articles": len(active_articles),
+                "week_entries": week_entries,
+                "projects_by_status": dict(self._project_status)
+            },
+            "daily_log": self._daily_log,
+            "active_projects": [project["summary"] for project in active_projects[:DASHBOARD_ITEMS]],
+            "active_articles": [article["summary"] for article in active_articles[:DASHBOARD_ITEMS]],
+            "recent_items": [note.to_dict() for note in recent]
+        }
+        self._snapshot_at = time.time()
+        self._snapshot_day = today
+
+    @staticmethod
+    def _newest(records) -> List[Dict[str, Any]]:
+        return sorted(records, key=lambda record: record["sort_key"], reverse=True)
+
+    def _on_note_changed(self, file_path: str) -> None:
+        # Called under the note index lock: only record the path, recount on the next read
+        with self._dirty_lock:
+            self._dirty.add(file_path)
+
+    def _apply_dirty(self) -> bool:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        for file_path in dirty:
+            self._remove(file_path)
+            self._add(file_path)
+        return bool(dirty)
+
+    def _add(self, file_path: str) -> None:
+        summary = self.note_index.get(file_path)
+        if summary is None:
+            return
+        metadata = summary.metadata
+
+        created = self.note_index.sort_key(file_path, "created")
+        try:
+            day = date.fromtimestamp(created).toordinal()
+        except (OverflowError, OSError, ValueError):
+            day = None
+        if day is not None:
+            self._created_day[file_path] = day
+            self._created_per_day[day] += 1
+
+        modified_key = self.note_index.sort_key(file_path, "modified")
+        if file_path.startswith(self._projects_prefix):
+            status = str(metadata.get("status", "active"))
+            self._projects[file_path] = {
+                "status": status,
+                "sort_key": modified_key,
+                "summary": {
+                    "name": summary.title,
+                    "status": status,
+                    "progress": metadata.get("progress", 0),
+                    "last_update": summary.modified,
+                    "folder_path": file_path
+                }
+            }
+            self._project_status[status] += 1
+        elif file_path.startswith(self._writing_prefix):
+            try:
+                word_count = count_words(summary.content)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not count words in {file_path}: {e}")
+                word_count = 0
+            status = str(metadata.get("status", "draft"))
+            self._articles[file_path] = {
+                "status": status,
+                "sort_key": modified_key,
+                "summary": {
+                    "title": summary.title,
+                    "word_count": word_count,
+                    "status": status,
+                    "last_update": summary.modified,
+                    "folder_path": file_path
+                }
+            }
+
+    def _remove(self, file_path: str) -> None:
+        day = self._created_day.pop(file_path, None)
+        if day is not None:
+            self._created_per_day[day] -= 1
+            if not self._created_per_day[day]:
+                del self._created_per_day[day]
+
+        project = self._projects.pop(file_path, None)
+        if project is not None:
+            self._project_status[project["status"]] -= 1
+            if not self._project_status[project["status"]]:
+                del self._project_status[project["status"]]
+
+        self._articles.pop(file_path, None)
+
+        # Re-read the daily log on the next snapshot if it changed
+        if self._daily_log is not None and self._daily_log.get("file_path") == file_path:
+            self._daily_log = None
+
+
+# Global instance
+dashboard_store = DashboardStore(obsidian, settings.projects_path, settings.writing_path)
@@ -0,0 +1,29 @@
+"""
+Bounded executor for blocking vault work
+Async request handlers hand ObsidianManager, index and file calls to this
+pool so the event loop keeps serving other requests while disk I/O runs
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from .config import settings
+
+
+async def run_in_vault(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking vault call on the bounded vault pool
+
+    Args:
+        func: Blocking callable (e.g. obsidian.list_notes)
+        *args, **kwargs: Passed to func
+
+    Returns:
+        Whatever func returns; exceptions propagate to the awaiting handler
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(vault_executor, functools.partial(func, *args, **kwargs))
+
+
+# Global instance
+vault_executor = ThreadPoolExecutor(max_workers=settings.vault_io_workers, thread_name_prefix="vault-io")
@@ -0,0 +1,259 @@
+"""
+Local capture classifier
+Keyword rules plus a multinomial naive Bayes model over character n-grams,
+trained from the `type` frontmatter of existing vault notes. Confident
+predictions answer captures without a model call. Kept free of app imports
+so training can run on scan worker processes.
+"""
+import json
+import math
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from . import note_codec
+from .tokenizer import TOKEN_RE, CJK_RE, normalize
+
+
+# Categories classify_input can return; notes with other types are not used for training
+CATEGORIES = ("work_log", "idea", "task", "reflection", "article", "project_update", "question", "note")
+
+MODEL_VERSION = 2
+MAX_TEXT_LENGTH = 2000
+MIN_FEATURE_COUNT = 2
+SMOOTHING = 0.5
+RULE_CONFIDENCE = 0.97
+
+# Held-out precision the model at its threshold, and each keyword rule,
+# need before they may answer without the LLM
+MIN_PRECISION = 0.9
+
+# Capture shapes checked before the statistical model
+RULES = [
+    ("task", re.compile(r"^\s*(?:[-*]\s*\[ \]|todo\b|待办|to-do\b)", re.IGNORECASE)),
+    ("work_log", re.compile(r"^\s*\[?\d{1,2}[:：]\d{2}\]?\s")),
+    ("idea", re.compile(r"^\s*(?:idea|想法|灵感)\s*[:：]", re.IGNORECASE)),
+    ("question", re.compile(r"^[^\n]{0,200}[?？]\s*$")),
+]
+
+
+def extract_features(text: str) -> Counter:
+    """
+    Character n-gram features of a capture
+
+    CJK runs contribute character unigrams and bigrams; other words
+    contribute the word itself and its padded character trigrams.
+    """
+    features: Counter = Counter()
+    for run in TOKEN_RE.findall(normalize(text[:MAX_TEXT_LENGTH])):
+        if CJK_RE.match(run):
+            features.update(run)
+            features.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            features["w:" + run] += 1
+            padded = f" {run} "
+            features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def labeled_examples(texts: List[str]) -> List[Optional[Tuple[str, Counter, Optional[str]]]]:
+    """
+    (label, features, matching rule) for each note text, or None for notes
+    without a usable type; runs in scan worker processes
+
+    The title is prepended to the body, as it is the closest stand-in
+    for what the user originally typed.
+    """
+    examples = []
+    for text in texts:
+        try:
+            post = note_codec.loads(text)
+        except Exception:
+            examples.append(None)
+            continue
+        label = post.metadata.get("type")
+        if label not in CATEGORIES:
+            examples.append(None)
+            continue
+        text = f"{post.metadata.get('title', '')}\n{post.content}"
+        examples.append((label, extract_features(text), match_rules(text)))
+    return examples
+
+
+def match_rules(text: str) -> Optional[str]:
+    """Category of the first keyword rule matching text, if any"""
+    for category, pattern in RULES:
+        if pattern.search(text):
+            return category
+    return None
+
+
+class LocalClassifier:
+    """Naive Bayes capture classifier with keyword-rule shortcuts"""
+
+    def __init__(self, threshold: float = 0.9):
+        """
+        Args:
+            threshold: Minimum confidence for answering without the model
+        """
+        self.threshold = threshold
+        self.class_docs: Dict[str, int] = {}
+        self.feature_counts: Dict[str, Dict[str, int]] = {}
+        self.feature_totals: Dict[str, int] = {}
+        self.vocabulary_size = 0
+        self.trained_at: Optional[float] = None
+        # Held-out precision of model answers at the threshold and of each
+        # keyword rule (by category), measured by the training script
+        self.precision: Optional[float] = None
+        self.rule_precision: Dict[str, float] = {}
+
+    @property
+    def trained(self) -> bool:
+        return bool(self.class_docs)
+
+    def fit(self, examples: Iterable[Tuple[str, Counter, Any]]) -> "LocalClassifier":
+        """
+        Train from labeled_examples output
+
+        Returns:
+            self
+        """
+        class_docs: Counter = Counter()
+        counts: Dict[str, Counter] = {}
+        for label, features, _ in examples:
+            class_docs[label] += 1
+            counts.setdefault(label, Counter()).update(features)
+
+        # Drop rare features to keep the model small
+        totals: Counter = Counter()
+        for features in counts.values():
+            totals.update(features)
+        vocabulary = {feature for feature, count in totals.items() if count >= MIN_FEATURE_COUNT}
+
+        self.class_docs = dict(class_docs)
+        self.feature_counts = {
+            label: {f: c for f, c in features.items() if f in vocabulary}
+            for label, features in counts.items()
+        }
+        self.feature_totals = {label: sum(features.values()) for label, features in self.feature_counts.items()}
+        self.vocabulary_size = len(vocabulary)
+        self.trained_at = time.time()
+        return self
+
+    def predict(self, text: str) -> Tuple[Optional[str], float, str]:
+        """
+        Classify text
+
+        Returns:
+            (category, confidence, source) where source is "rule" or "model";
+            category is None if no rule matches and the classifier is untrained
+        """
+        rule = match_rules(text)
+        if rule is not None:
+            return rule, RULE_CONFIDENCE, "rule"
+        return self.score(extract_features(text))
+
+    def score(self, features: Counter, rule: Optional[str] = None) -> Tuple[Optional[str], float, str]:
+        """Classify pre-extracted features; a matching rule wins (see predict)"""
+        if rule is not None:
+            return rule, RULE_CONFIDENCE, "rule"
+        if not self.trained:
+            return None, 0.0, "model"
+
+        total_docs = sum(self.class_docs.values())
+        scores = {}
+        for label, docs in self.class_docs.items():
+            counts = self.feature_counts[label]
+            denominator = math.log(self.feature_totals[label] + SMOOTHING * (self.vocabulary_size + 1))
+            score = math.log(docs / total_docs)
+            for feature, n in features.items():
+                score += n * (math.log(counts.get(feature, 0) + SMOOTHING) - denominator)
+            scores[label] = score
+
+        best = max(scores, key=scores.get)
+        # Softmax over the class log-likelihoods
+        normalizer = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / normalizer, "model"
+
+    def classify(self, content: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a capture locally when confident enough
+
+        Model predictions, and each keyword rule, are only used once the
+        training script has measured at least MIN_PRECISION for them on
+        held-out notes; without a trained model nothing is answered locally.
+
+        Returns:
+            A classify_input-shaped result, or None to defer to the model
+        """
+        category, confidence, source = self.predict(content)
+        if category is None or confidence < self.threshold:
+            return None
+        if source == "model":
+            precision = self.precision or 0.0
+        else:
+            precision = self.rule_precision.get(category, 0.0)
+        if precision < MIN_PRECISION:
+            return None  # not proven accurate enough on held-out notes
+        first_line = next((line.strip(" #-*>\t") for line in content.splitlines() if line.strip()), "")
+        return {
+            "success": True,
+            "category": category,
+            "confidence": round(confidence, 4),
+            "title": first_line[:50] or content[:50],
+            "suggested_tags": [],
+            "summary": "",
+            "source": f"local_{source}"
+        }
+
+    def save(self, path: Path) -> None:
+        """Write the model atomically as JSON"""
+        data = {
+            "version": MODEL_VERSION,
+            "trained_at": self.trained_at,
+            "precision": self.precision,
+            "rule_precision": self.rule_precision,
+            "class_docs": self.class_docs,
+            "feature_counts": self.feature_counts,
+            "vocabulary_size": self.vocabulary_size,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: Path, threshold: float = 0.9) -> "LocalClassifier":
+        """
+        Load a saved model; an unreadable or missing file gives an untrained
+        classifier, which answers nothing locally
+        """
+        classifier = cls(threshold)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return classifier
+        except Exception as e:
+            print(f"Warning: Could not load local classifier {path}: {e}")
+            return classifier
+
+        if data.get("version") != MODEL_VERSION:
+            return classifier
+        classifier.class_docs = data["class_docs"]
+        classifier.feature_counts = data["feature_counts"]
+        classifier.feature_totals = {label: sum(c.values()) for label, c in classifier.feature_counts.items()}
+        classifier.vocabulary_size = data["vocabulary_size"]
+        classifier.trained_at = data.get("trained_at")
+        classifier.precision = data.get("precision")
+        classifier.rule_precision = data.get("rule_precision", {})
+        return classifier
@@ -0,0 +1,72 @@
+"""
+MinHash signatures of note term sets
+The fraction of equal signature slots between two notes estimates the
+Jaccard similarity of their terms. Kept free of app imports so scan
+worker processes can load it cheaply.
+"""
+import zlib
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from . import note_codec
+from .tokenizer import tokenize
+
+
+NUM_PERM = 64
+
+# LSH banding: notes sharing all ROWS slots of any band become candidates.
+# 32 bands of 2 rows find most pairs above ~0.2 Jaccard.
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Universal hashing (a * x + b) mod P over 32-bit term hashes; fits in uint64
+PRIME = np.uint64(4294967291)
+_rng = np.random.RandomState(20240611)
+_A = _rng.randint(1, 2 ** 32 - 5, size=NUM_PERM, dtype=np.uint64)[:, None]
+_B = _rng.randint(0, 2 ** 32 - 5, size=NUM_PERM, dtype=np.uint64)[:, None]
+
+
+def signature(terms: Iterable[str]) -> Optional[np.ndarray]:
+    """
+    MinHash signature of a set of terms
+
+    Returns:
+        uint32 array of NUM_PERM slots, or None for an empty set
+    """
+    hashes = np.fromiter(
+        {zlib.crc32(term.encode("utf-8")) for term in terms}, dtype=np.uint64
+    )
+    if not len(hashes):
+        return None
+    return ((_A * hashes[None, :] + _B) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def note_terms(text: str) -> List[str]:
+    """Terms of a note's title and body (frontmatter otherwise ignored)"""
+    post = note_codec.loads(text)
+    return tokenize(f"{post.metadata.get('title', '')}\n{post.content}")
+
+
+def note_signatures(texts: List[str]) -> List[Optional[np.ndarray]]:
+    """
+    Signatures of full note texts; runs in scan worker processes
+
+    Returns:
+        One signature (or None for notes without terms) per text
+    """
+    return [signature(note_terms(text)) for text in texts]
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """
+    LSH band keys: each band's two slots (ROWS is 2) packed into one uint64
+
+    Args:
+        signatures: (n, NUM_PERM) uint32 signatures
+
+    Returns:
+        (n, BANDS) uint64 keys
+    """
+    bands = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    return (bands[:, :, 0] << np.uint64(32)) | bands[:, :, 1]
@@ -0,0 +1,239 @@
+"""
+Fast frontmatter codec
+Drop-in replacements for frontmatter.load/loads/dumps that give the same
+results as python-frontmatter: the header is split with a string scan
+instead of a regex split of the whole note, and the flat key/value
+headers this app writes are decoded and encoded without the YAML
+machinery. Anything else goes through YAML with the same loader and
+dumper python-frontmatter uses (libyaml's when available). Kept free of
+app imports so scan worker processes can use it.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import frontmatter
+import yaml
+from frontmatter.default_handlers import SafeLoader, SafeDumper
+from yaml.constructor import SafeConstructor
+from yaml.nodes import ScalarNode
+from yaml.resolver import Resolver
+
+
+# Same boundary rule python-frontmatter uses for YAML headers
+FM_BOUNDARY = re.compile(r"^-{3,}\s*$", re.MULTILINE)
+
+STR_TAG = "tag:yaml.org,2002:str"
+
+# Flat headers: "key: scalar" lines and "- scalar" items under a bare "key:"
+FLAT_KEY_RE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*):(?: (.*))?")
+
+# Plain scalars that cannot be anything but a plain scalar: no indicator at
+# the start, no ": ", " #" or flow characters inside
+PLAIN_START_INDICATORS = "-?:,[]{}#&*!|>'\"%@`"
+
+# Strings the dumper writes as they are (plain) or in single quotes, on one line
+DUMP_PLAIN_RE = re.compile(r"\w(?:[\w .,/()+-]*[\w.)])?")
+DUMP_QUOTED_RE = re.compile(r"[\w.:+-](?:[\w .:+-]*[\w.:+-])?")
+
+# The dumper's line width; longer scalars with spaces get folded
+DUMP_WIDTH = 80
+
+_resolver = Resolver()
+_constructor = SafeConstructor()
+_handler = frontmatter.YAMLHandler()
+
+
+def loads(text: str) -> frontmatter.Post:
+    """Parse note text; same result as frontmatter.loads"""
+    stripped = text.strip()
+    if not FM_BOUNDARY.match(stripped):
+        # No YAML header: other formats (JSON) or none at all
+        return frontmatter.loads(text)
+
+    parts = split(stripped)
+    if parts is None:
+        return frontmatter.Post(stripped, _handler)
+    header, content = parts
+    metadata = parse_yaml(header)
+    if not isinstance(metadata, dict):
+        metadata = {}
+    return frontmatter.Post(content.strip(), _handler, **metadata)
+
+
+def load(f) -> frontmatter.Post:
+    """Parse an open note file; same result as frontmatter.load"""
+    return loads(f.read())
+
+
+def dumps(post: frontmatter.Post) -> str:
+    """Serialize a post; same text as frontmatter.dumps"""
+    metadata = dump_flat(post.metadata)
+    if metadata is None:
+        metadata = yaml.dump(
+            post.metadata, Dumper=SafeDumper, default_flow_style=False, allow_unicode=True
+        ).strip()
+    return f"---\n{metadata}\n---\n\n{post.content}".strip()
+
+
+def split(text: str) -> Optional[Tuple[str, str]]:
+    """
+    Split stripped note text that opens with a boundary line into
+    (header, rest), as python-frontmatter's boundary split does
+
+    Returns:
+        None if the header is never closed
+    """
+    opening = FM_BOUNDARY.match(text)
+    position = opening.end()
+    # Closing boundary: the next line made of dashes; only lines starting with
+    # "---" can match, so find those with a plain string search
+    if text[position - 1:position] == "\n" and FM_BOUNDARY.match(text, position):
+        closing = FM_BOUNDARY.match(text, position)
+    else:
+        closing = None
+        while closing is None:
+            position = text.find("\n---", position)
+            if position < 0:
+                return None
+            position += 1
+            closing = FM_BOUNDARY.match(text, position)
+    return text[opening.end():closing.start()], text[closing.end():]
+
+
+def parse_yaml(text: str) -> Any:
+    """Load a YAML header, taking the flat fast path when it applies"""
+    flat = parse_flat(text)
+    if flat is not None:
+        return flat
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def parse_flat(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a flat header (scalar values and lists of scalars) without YAML
+
+    Returns:
+        The mapping, or None if the header uses anything else
+    """
+    result: Dict[str, Any] = {}
+    items: Optional[List[Any]] = None
+    key = None
+    for line in text.split("\n"):
+        if line.endswith("\r"):
+            line = line[:-1]
+        if not line.strip(" "):
+            continue
+        if line.startswith("- "):
+            if key is None or (items is None and result[key] is not None):
+                return None
+            value = _flat_scalar(line[2:])
+            if value is _NOT_FLAT:
+                return None
+            if items is None:
+                items = result[key] = []
+            items.append(value)
+            continue
+
+        match = FLAT_KEY_RE.fullmatch(line)
+        if match is None or _resolver.resolve(ScalarNode, match.group(1), (True, False)) != STR_TAG:
+            return None
+        key, items = match.group(1), None
+        raw = match.group(2)
+        if raw is None or not raw.strip(" "):
+            result[key] = None  # a list if "- " items follow
+            continue
+        value = _flat_scalar(raw)
+        if value is _NOT_FLAT:
+            return None
+        result[key] = value
+        key = None
+    return result or None
+
+
+_NOT_FLAT = object()
+
+
+def _flat_scalar(raw: str) -> Any:
+    value = raw.strip(" ")
+    if not value or not value.isprintable() or "\t" in value:
+        return _NOT_FLAT
+
+    if value[0] == "'":
+        inner = value[1:-1]
+        if len(value) < 2 or value[-1] != "'" or "'" in inner.replace("''", ""):
+            return _NOT_FLAT
+        return inner.replace("''", "'")
+    if value == "[]":
+        return []
+
+    if value[0] in PLAIN_START_INDICATORS and not (
+        value[0] == "-" and len(value) > 1 and (value[1].isdigit() or value[1] == ".")
+    ):
+        return _NOT_FLAT
+    if ": " in value or " #" in value or value.endswith(":"):
+        return _NOT_FLAT
+
+    tag = _resolver.resolve(ScalarNode, value, (True, False))
+    if tag == STR_TAG:
+        return value
+    return SafeConstructor.yaml_constructors[tag](_constructor, ScalarNode(tag, value))
+
+
+def dump_flat(metadata: Dict[str, Any]) -> Optional[str]:
+    """
+    Dump a flat mapping exactly as the YAML dumper would
+
+    Returns:
+        The YAML text, or None if a key or value needs the real dumper
+    """
+    if not metadata:
+        return None
+    lines = []
+    for key in sorted(metadata):
+        if type(key) is not str or not FLAT_KEY_RE.fullmatch(f"{key}:") or \
+                _resolver.resolve(ScalarNode, key, (True, False)) != STR_TAG:
+            return None
+        value = metadata[key]
+        if type(value) is list:
+            if not value:
+                lines.append(f"{key}: []")
+                continue
+            lines.append(f"{key}:")
+            for item in value:
+                text = _dump_scalar(item, 2)
+                if text is None:
+                    return None
+                lines.append(f"- {text}")
+        else:
+            text = _dump_scalar(value, len(key) + 2)
+            if text is None:
+                return None
+            lines.append(f"{key}: {text}")
+    return "\n".join(lines)
+
+
+def _dump_scalar(value: Any, column: int) -> Optional[str]:
+    """Scalar as the dumper writes it at this column, or None if unsure"""
+    if value is None:
+        return "null"
+    # Exact types only: subclasses go through the dumper's own representers
+    if type(value) is bool:
+        return "true" if value else "false"
+    if type(value) is int:
+        return str(value)
+    if type(value) is float:
+        text = repr(value).lower()
+        return text if "." in text and "e" not in text and text not in ("nan", "inf", "-inf") else None
+    if type(value) is not str:
+        return None
+
+    if value == "":
+        return "''"
+    if _resolver.resolve(ScalarNode, value, (True, False)) == STR_TAG:
+        text = value if DUMP_PLAIN_RE.fullmatch(value) else None
+    else:
+        # Would read back as another type (a date, a number): single-quoted
+        text = f"'{value}'" if DUMP_QUOTED_RE.fullmatch(value) else None
+    if text is None or (" " in text and column + len(text) > DUMP_WIDTH):
+        return None
+    return text
@@ -0,0 +1,702 @@
+"""
+Persistent note metadata index
+Caches parsed note summaries keyed by path and (mtime, size) so listings
+only re-parse files whose stat changed since the last scan
+"""
+import base64
+import bisect
+import heapq
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+from .note_reader import NoteSummary, timestamp_of
+
+
+# Bump whenever the shape of cached summaries changes
+INDEX_VERSION = 4
+
+# Frontmatter timestamps are written just before the file, so they should never
+# be later than the file's mtime by more than this many seconds
+MTIME_SKEW_TOLERANCE = 2.0
+
+
+class IndexEntry:
+    """Stat and (possibly not yet parsed) summary for a single note"""
+
+    __slots__ = ("mtime_ns", "size", "summary", "parsed")
+
+    def __init__(self, mtime_ns: int, size: int, summary: Optional[NoteSummary] = None, parsed: bool = False):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.summary = summary  # None if unparsed or unparseable
+        self.parsed = parsed
+
+    def __getstate__(self):
+        return (self.mtime_ns, self.size, self.summary, self.parsed)
+
+    def __setstate__(self, state):
+        self.mtime_ns, self.size, self.summary, self.parsed = state
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+    def sort_key(self, sort_by: str) -> float:
+        """Frontmatter timestamp for sort_by, falling back to the file's mtime"""
+        if self.summary is not None:
+            value = timestamp_of(self.summary.get(sort_by))
+            if value is not None:
+                return value
+        return self.mtime
+
+
+class _Ordering:
+    """Parsed notes sorted ascending by (sort key, path), kept in step with the index"""
+
+    __slots__ = ("items", "keys", "pending")
+
+    def __init__(self, keys: Dict[str, float]):
+        self.keys = keys
+        self.items: List[Tuple[float, str]] = sorted((key, path) for path, key in keys.items())
+        self.pending: set = set()  # paths changed since they were last placed
+
+    def add(self, file_path: str, key: float) -> None:
+        self.keys[file_path] = key
+        bisect.insort(self.items, (key, file_path))
+
+    def discard(self, file_path: str) -> None:
+        key = self.keys.pop(file_path, None)
+        if key is not None:
+            del self.items[bisect.bisect_left(self.items, (key, file_path))]
+
+
+class _DateBuckets:
+    """Parsed notes grouped by the local calendar day of their sort key"""
+
+    __slots__ = ("buckets", "days", "day_of", "pending")
+
+    def __init__(self, keys: Dict[str, float]):
+        self.buckets: Dict[int, Dict[str, float]] = {}  # day ordinal -> {path: sort key}
+        self.days: List[int] = []  # sorted ordinals of non-empty buckets
+        self.day_of: Dict[str, int] = {}
+        self.pending: set = set()
+        for file_path, key in keys.items():
+            self.add(file_path, key)
+
+    def add(self, file_path: str, key: float) -> None:
+        try:
+            day = date.fromtimestamp(key).toordinal()
+        except (OverflowError, OSError, ValueError):
+            day = date.min.toordinal()
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            bucket = self.buckets[day] = {}
+            bisect.insort(self.days, day)
+        bucket[file_path] = key
+        self.day_of[file_path] = day
+
+    def discard(self, file_path: str) -> None:
+        day = self.day_of.pop(file_path, None)
+        if day is None:
+            return
+        bucket = self.buckets[day]
+        del bucket[file_path]
+        if not bucket:
+            del self.buckets[day]
+            del self.days[bisect.bisect_left(self.days, day)]
+
+    def between(self, start: Optional[date], end: Optional[date]) -> Iterator[Tuple[float, str]]:
+        """Yield (sort key, path) for notes dated start..end inclusive (either may be open)"""
+        lo = 0 if start is None else bisect.bisect_left(self.days, start.toordinal())
+        hi = len(self.days) if end is None else bisect.bisect_right(self.days, end.toordinal())
+        for day in self.days[lo:hi]:
+            for file_path, key in self.buckets[day].items():
+                yield key, file_path
+
+
+def encode_cursor(position: Tuple[float, str]) -> str:
+    """Encode a (sort key, file_path) position as an opaque page cursor"""
+    raw = json.dumps(list(position), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decode a page cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, file_path = json.loads(raw.decode("utf-8"))
+        return float(key), str(file_path)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class NoteIndex:
+    """Incrementally maintained metadata index over the vault's Markdown files"""
+
+    def __init__(
+        self,
+        root: Path,
+        cache_file: Path,
+        parser: Callable[[Path], NoteSummary],
+        refresh_interval: float = 5.0,
+        bulk_parser: Optional[Callable[[List[str]], Iterator[Tuple[str, Optional[NoteSummary]]]]] = None
+    ):
+        """
+        Args:
+            root: Vault root directory
+            cache_file: Where the index is persisted between runs
+            parser: Turns an absolute note path into a NoteSummary
+            refresh_interval: Seconds a scan result is trusted before re-statting
+            bulk_parser: Optional batch form of parser taking paths relative to
+                root and yielding (file_path, summary or None); used when many
+                notes need parsing at once
+        """
+        self.root = root
+        self.cache_file = cache_file
+        self.parser = parser
+        self.bulk_parser = bulk_parser
+        self.refresh_interval = refresh_interval
+        self.watched = False
+
+        self._entries: Dict[str, IndexEntry] = {}
+        # Parsed notes whose frontmatter timestamps run ahead of their mtime
+        self._skewed: Dict[str, set] = {"modified": set(), "created": set()}
+        # Sort orders (per sort field and folder) and date buckets (per sort
+        # field), built on first use
+        self._views: Dict[Tuple[type, str, Optional[str]], Any] = {}
+        self._refreshed_at: Dict[Optional[str], float] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """
+        Register a callback invoked with a note's path whenever it is added,
+        changed on disk or removed
+
+        Callbacks run while the index lock is held, so they must be cheap
+        (typically: remember the path and do the real work later).
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def paths(self, folder: Optional[str] = None) -> List[str]:
+        """Get the paths of all indexed notes under folder"""
+        with self._lock:
+            return [file_path for file_path, _ in self._iter_entries(folder)]
+
+    def load(self) -> bool:
+        """
+        Load the persisted index from disk
+
+        Returns:
+            True if a compatible index was loaded
+        """
+        with self._lock:
+            self._loaded = True
+            try:
+                with open(self.cache_file, "rb") as f:
+                    data = pickle.load(f)
+            except FileNotFoundError:
+                return False
+            except Exception as e:
+                print(f"Warning: Could not load note index {self.cache_file}: {e}")
+                return False
+
+            if data.get("version") != INDEX_VERSION or data.get("root") != str(self.root):
+                return False
+
+            self._entries = data["entries"]
+            for skewed in self._skewed.values():
+                skewed.clear()
+            for file_path, entry in self._entries.items():
+                self._track_skew(file_path, entry)
+            self._views = {}
+            self._dirty = False
+            return True
+
+    def save(self) -> None:
+        """Persist the index atomically if it changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": INDEX_VERSION,
+                "root": str(self.root),
+                "entries": self._entries,
+            }
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.cache_file)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self._dirty = False
+
+    def build(self) -> Dict[str, int]:
+        """
+        Cold-build the index by parsing every note in the vault
+
+        Returns:
+            Scan statistics (see refresh)
+        """
+        with self._lock:
+            for file_path in self._entries:
+                self._notify(file_path)
+            self._entries = {}
+            for skewed in self._skewed.values():
+                skewed.clear()
+            self._views = {}
+            self._refreshed_at = {}
+            self._loaded = True
+            self._dirty = True
+            return self.refresh()
+
+    def rebuild(self) -> Dict[str, int]:
+        """Discard the in-memory and persisted index and build from scratch"""
+        with self._lock:
+            try:
+                self.cache_file.unlink()
+            except FileNotFoundError:
+                pass
+            return self.build()
+
+    def refresh(self, folder: Optional[str] = None, parse: bool = True) -> Dict[str, int]:
+        """
+        Re-stat notes and re-parse only those whose (mtime, size) changed
+
+        Args:
+            folder: Limit the scan to this folder (None for the whole vault)
+            parse: Parse changed notes now; otherwise they are parsed on first use
+
+        Returns:
+            Dict with counts of scanned, added, updated and removed notes
+        """
+        with self._lock:
+            prefix = self._prefix(folder)
+            seen = set()
+            to_parse: List[Tuple[str, IndexEntry]] = []
+            stats = {"scanned": 0, "added": 0, "updated": 0, "removed": 0}
+
+            for file_path, mtime_ns, size in self._scan(folder):
+                seen.add(file_path)
+                stats["scanned"] += 1
+                cached = self._entries.get(file_path)
+                if cached is not None and cached.mtime_ns == mtime_ns and cached.size == size:
+                    continue
+                entry = IndexEntry(mtime_ns, size)
+                self._set_entry(file_path, entry)
+                # An mtime moving backwards (restored or synced copy) may break the
+                # mtime bound top() relies on, so such notes are parsed right away
+                if parse or (cached is not None and mtime_ns < cached.mtime_ns):
+                    to_parse.append((file_path, entry))
+                stats["updated" if cached is not None else "added"] += 1
+            self._parse_entries(to_parse)
+
+            stale = [
+                path for path in self._entries
+                if path not in seen and (prefix is None or path.startswith(prefix))
+            ]
+            for path in stale:
+                self.remove_path(path)
+            stats["removed"] = len(stale)
+
+            if stats["added"] or stats["updated"] or stats["removed"]:
+                self._dirty = True
+            self._refreshed_at[folder] = time.monotonic()
+            self.save()
+            return stats
+
+    def ensure_fresh(self, folder: Optional[str] = None, parse: bool = True) -> None:
+        """
+        Load or refresh the index if the last scan covering folder is stale
+
+        Args:
+            folder: Folder the caller is about to read
+            parse: Whether changed notes should be parsed eagerly (see refresh)
+        """
+        with self._lock:
+            if not self._loaded and not self.load():
+                if parse:
+                    self.build()
+                else:
+                    self.refresh(parse=False)
+                return
+            if self.watched and None in self._refreshed_at:
+                return  # a vault watcher keeps the index current after one full scan
+            now = time.monotonic()
+            for scope in (None, folder):
+                refreshed_at = self._refreshed_at.get(scope)
+                if refreshed_at is not None and now - refreshed_at < self.refresh_interval:
+                    return
+            self.refresh(folder, parse=parse)
+
+    def update_path(self, file_path: str) -> None:
+        """Re-index a single note after it was written through the API"""
+        full_path = self.root / file_path
+        with self._lock:
+            try:
+                st = full_path.stat()
+            except FileNotFoundError:
+                self.remove_path(file_path)
+                return
+            entry = IndexEntry(st.st_mtime_ns, st.st_size)
+            self._set_entry(file_path, entry)
+            self._parse_entry(file_path, entry)
+            self._dirty = True
+
+    def remove_path(self, file_path: str) -> None:
+        """Drop a note from the index"""
+        with self._lock:
+            if self._entries.pop(file_path, None) is not None:
+                for skewed in self._skewed.values():
+                    skewed.discard(file_path)
+                for view in self._views.values():
+                    view.discard(file_path)
+                    view.pending.discard(file_path)
+                self._dirty = True
+                self._notify(file_path)
+
+    def parse_pending(self, batch_size: int = 200) -> int:
+        """
+        Parse every note that was indexed by stat only
+
+        With a bulk parser the parsing happens outside the lock and results
+        are applied one by one; otherwise it works in batches. Either way
+        concurrent readers are not locked out for the whole pass. Once done,
+        the skew set used by top() is complete.
+
+        Returns:
+            Number of notes parsed
+        """
+        if self.bulk_parser is not None:
+            with self._lock:
+                pending = {
+                    file_path: entry for file_path, entry in self._entries.items()
+                    if not entry.parsed
+                }
+            for file_path, summary in self.bulk_parser(list(pending)):
+                with self._lock:
+                    entry = pending[file_path]
+                    # Skip notes that changed or were parsed on demand meanwhile
+                    if self._entries.get(file_path) is entry and not entry.parsed:
+                        self._apply_summary(file_path, entry, summary)
+                        self._dirty = True
+            self.save()
+            return len(pending)
+
+        parsed = 0
+        while True:
+            with self._lock:
+                pending = [
+                    (file_path, entry) for file_path, entry in self._entries.items()
+                    if not entry.parsed
+                ][:batch_size]
+                for file_path, entry in pending:
+                    self._ensure_parsed(file_path, entry)
+            if not pending:
+                break
+            parsed += len(pending)
+        self.save()
+        return parsed
+
+    def apply_events(self, events: List[Any]) -> None:
+        """
+        Apply a batch of vault watcher events (see core.watcher.VaultEvent)
+
+        File events update single entries; directory events (moves, deletes
+        or an inotify overflow) fall back to re-statting the affected folders.
+        """
+        with self._lock:
+            for event in events:
+                if event.is_directory:
+                    for folder in (event.file_path, event.dest_path):
+                        if folder is not None:
+                            self.refresh(folder or None, parse=False)
+                elif event.kind == "deleted":
+                    self.remove_path(event.file_path)
+                elif event.kind == "moved":
+                    self.remove_path(event.file_path)
+                    self.update_path(event.dest_path)
+                else:
+                    self.update_path(event.file_path)
+
+    def get(self, file_path: str) -> Optional[NoteSummary]:
+        """Get the summary for a single note, parsing it if needed"""
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None:
+                return None
+            return self._ensure_parsed(file_path, entry)
+
+    def sort_key(self, file_path: str, sort_by: str) -> Optional[float]:
+        """Get a note's frontmatter timestamp for sort_by, falling back to its mtime"""
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None or self._ensure_parsed(file_path, entry) is None:
+                return None
+            return entry.sort_key(sort_by)
+
+    def notes(self, folder: Optional[str] = None) -> List[NoteSummary]:
+        """
+        Get summaries for all parseable notes under folder, parsing any pending ones
+
+        Args:
+            folder: Folder path relative to vault root (None for all)
+
+        Returns:
+            List of note summaries (unordered)
+        """
+        with self._lock:
+            return [
+                entry.summary
+                for file_path, entry in self._iter_entries(folder)
+                if self._ensure_parsed(file_path, entry) is not None
+            ]
+
+    def top(self, limit: int, folder: Optional[str] = None, sort_by: str = "modified") -> List[NoteSummary]:
+        """
+        Get the limit most recent notes by a frontmatter timestamp
+
+        Candidates are visited newest-mtime first and parsed lazily. Because a
+        note's "modified"/"created" timestamp is written no later than the file
+        itself, the scan stops as soon as the k-th best key beats the mtime of
+        every unvisited note. Parsed notes known to violate that assumption
+        (e.g. copied with an old mtime) are always considered up front.
+
+        Args:
+            limit: Number of notes to return
+            folder: Folder path relative to vault root (None for all)
+            sort_by: Frontmatter field to sort on: "modified" or "created"
+
+        Returns:
+            Up to limit note summaries, newest first
+        """
+        with self._lock:
+            prefix = self._prefix(folder)
+            best: List[Tuple[float, str]] = []  # min-heap of the current top candidates
+
+            def offer(file_path: str, entry: IndexEntry) -> None:
+                if self._ensure_parsed(file_path, entry) is None:
+                    return
+                item = (entry.sort_key(sort_by), file_path)
+                if len(best) < limit:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+
+            skewed = {
+                path for path in self._skewed.get(sort_by, ())
+                if prefix is None or path.startswith(prefix)
+            }
+            for file_path in skewed:
+                offer(file_path, self._entries[file_path])
+
+            by_mtime = [
+                (-entry.mtime_ns, file_path)
+                for file_path, entry in self._iter_entries(folder)
+                if file_path not in skewed
+            ]
+            heapq.heapify(by_mtime)
+            while by_mtime:
+                neg_mtime_ns, file_path = heapq.heappop(by_mtime)
+                if len(best) == limit and best[0][0] >= -neg_mtime_ns / 1e9 + MTIME_SKEW_TOLERANCE:
+                    break
+                offer(file_path, self._entries[file_path])
+
+            return [self._entries[path].summary for _, path in sorted(best, reverse=True)]
+
+    def page(
+        self,
+        limit: int,
+        folder: Optional[str] = None,
+        sort_by: str = "modified",
+        after: Optional[Tuple[float, str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Tuple[List[NoteSummary], Optional[Tuple[float, str]]]:
+        """
+        Get one page of notes, newest first, by keyset on (sort key, file_path)
+
+        Without a date range, pages are sliced from a sorted order of the
+        folder maintained alongside the index, so a deep page costs the same
+        as the first one. Until that order exists, a first page comes from
+        top() instead, since building the order parses every note of the
+        folder; build_orderings() prepares it ahead of time. With a date
+        range, candidates come from per-day buckets, so the cost is
+        proportional to the notes in the range (building the buckets the
+        first time parses every note).
+
+        Args:
+            limit: Page size
+            folder: Folder path relative to vault root (None for all)
+            sort_by: Frontmatter field to sort and date on: "modified" or "created"
+            after: Position of the last note of the previous page (None for the first page)
+            start: First local calendar day to include (None for no lower bound)
+            end: Last local calendar day to include (None for no upper bound)
+
+        Returns:
+            (notes, next_position) where next_position is None on the last page
+        """
+        with self._lock:
+            prefix = self._prefix(folder)
+            if start is None and end is None:
+                if after is None and (_Ordering, sort_by, prefix) not in self._views:
+                    # Bounded top-k for a first page: parses about limit notes
+                    page = [
+                        (self._entries[note.file_path].sort_key(sort_by), note.file_path)
+                        for note in self.top(limit + 1, folder=folder, sort_by=sort_by)
+                    ]
+                    next_position = page[limit - 1] if len(page) > limit else None
+                    return [self._entries[path].summary for _, path in page[:limit]], next_position
+                items = self._view(_Ordering, sort_by, prefix).items
+            else:
+                items = sorted(
+                    item for item in self._view(_DateBuckets, sort_by).between(start, end)
+                    if prefix is None or item[1].startswith(prefix)
+                )
+            i = len(items) if after is None else bisect.bisect_left(items, after)
+            page = items[max(i - limit - 1, 0):i][::-1]
+
+            next_position = page[limit - 1] if len(page) > limit else None
+            return [self._entries[path].summary for _, path in page[:limit]], next_position
+
+    def build_orderings(self, sort_by: str = "modified") -> None:
+        """
+        Build the whole-vault sort order page() slices cursor pages from
+
+        Cheap once every note is parsed, so it belongs after parse_pending in
+        a warm-up pass rather than in the first request that needs it.
+        """
+        with self._lock:
+            self._view(_Ordering, sort_by)
+
+    def _view(self, kind: type, sort_by: str, prefix: Optional[str] = None) -> Any:
+        """
+        Get the _Ordering or _DateBuckets for sort_by over the notes under
+        prefix, placing notes changed since the last call
+        """
+        view = self._views.get((kind, sort_by, prefix))
+        if view is None:
+            keys = {
+                file_path: entry.sort_key(sort_by)
+                for file_path, entry in self._entries.items()
+                if (prefix is None or file_path.startswith(prefix))
+                and self._ensure_parsed(file_path, entry) is not None
+            }
+            view = self._views[(kind, sort_by, prefix)] = kind(keys)
+        elif view.pending:
+            for file_path in view.pending:
+                entry = self._entries.get(file_path)
+                if prefix is not None and not file_path.startswith(prefix):
+                    continue
+                if entry is not None and self._ensure_parsed(file_path, entry) is not None:
+                    view.add(file_path, entry.sort_key(sort_by))
+            view.pending.clear()
+        return view
+
+    def _iter_entries(self, folder: Optional[str]) -> Iterator[Tuple[str, IndexEntry]]:
+        prefix = self._prefix(folder)
+        for file_path, entry in self._entries.items():
+            if prefix is None or file_path.startswith(prefix):
+                yield file_path, entry
+
+    def _set_entry(self, file_path: str, entry: IndexEntry) -> None:
+        self._entries[file_path] = entry
+        for skewed in self._skewed.values():
+            skewed.discard(file_path)
+        for view in self._views.values():
+            view.discard(file_path)
+            view.pending.add(file_path)
+        self._notify(file_path)
+
+    def _notify(self, file_path: str) -> None:
+        for callback in self._listeners:
+            try:
+                callback(file_path)
+            except Exception as e:
+                print(f"Warning: Note index listener failed for {file_path}: {e}")
+
+    def _ensure_parsed(self, file_path: str, entry: IndexEntry) -> Optional[NoteSummary]:
+        if not entry.parsed:
+            self._parse_entry(file_path, entry)
+            self._dirty = True
+        return entry.summary
+
+    def _parse_entry(self, file_path: str, entry: IndexEntry) -> None:
+        try:
+            summary = self.parser(self.root / file_path)
+        except Exception as e:
+            # Keep the stat so the file is not retried until it changes
+            print(f"Warning: Could not read {self.root / file_path}: {e}")
+            summary = None
+        self._apply_summary(file_path, entry, summary)
+
+    def _parse_entries(self, items: List[Tuple[str, IndexEntry]]) -> None:
+        if self.bulk_parser is None or len(items) < 2:
+            for file_path, entry in items:
+                self._parse_entry(file_path, entry)
+            return
+        entries = dict(items)
+        for file_path, summary in self.bulk_parser(list(entries)):
+            self._apply_summary(file_path, entries[file_path], summary)
+
+    def _apply_summary(self, file_path: str, entry: IndexEntry, summary: Optional[NoteSummary]) -> None:
+        entry.summary = summary
+        entry.parsed = True
+        self._track_skew(file_path, entry)
+
+    def _track_skew(self, file_path: str, entry: IndexEntry) -> None:
+        if entry.summary is None:
+            return
+        for sort_by, skewed in self._skewed.items():
+            if entry.sort_key(sort_by) > entry.mtime + MTIME_SKEW_TOLERANCE:
+                skewed.add(file_path)
+
+    def _scan(self, folder: Optional[str] = None) -> Iterator[Tuple[str, int, int]]:
+        """Yield (file_path, mtime_ns, size) for every Markdown file under folder"""
+        start = self.root if folder is None else self.root / folder
+        if not start.is_dir():
+            return
+        root_len = len(str(self.root)) + 1
+        stack = [str(start)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.name.endswith(".md") and entry.is_file():
+                                st = entry.stat()
+                                yield entry.path[root_len:], st.st_mtime_ns, st.st_size
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Warning: Could not scan {directory}: {e}")
+
+    @staticmethod
+    def _prefix(folder: Optional[str]) -> Optional[str]:
+        if folder is None:
+            return None
+        folder = str(Path(folder))
+        return "" if folder == "." else folder.rstrip(os.sep) + os.sep
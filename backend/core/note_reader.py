@@ -0,0 +1,296 @@
+"""
+Listing-mode note reader
+Reads only the YAML frontmatter and the first few hundred bytes of the body,
+so listing cost scales with the number of notes rather than their size
+"""
+import sys
+from datetime import datetime, date, time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+from . import note_codec
+from .note_codec import FM_BOUNDARY
+
+
+# Other frontmatter flavours python-frontmatter detects; these take the full-parse path
+OTHER_FORMAT_PREFIXES = ("{", "+++")
+
+READ_CHUNK_SIZE = 4096
+PREVIEW_LENGTH = 200
+
+# Frontmatter strings up to this length are interned in summaries
+INTERN_MAX_LENGTH = 40
+
+
+class NoteSummary:
+    """
+    Listing view of a note: frontmatter and preview now, body on demand
+
+    Kept compact for large indexes: slots instead of an instance dict, the
+    vault root shared with every other summary instead of a Path per note,
+    and the frontmatter stored as a tuple of values against a key layout
+    tuple shared by all notes with the same keys. Short strings (keys,
+    types, statuses, tags, timestamps) are interned so repeats cost nothing.
+    """
+
+    __slots__ = ("root", "file_path", "keys", "values", "preview")
+
+    # What to_dict (and the listing APIs' fields= selection) can return, in order
+    FIELDS = ("file_path", "title", "preview", "created", "modified", "tags", "metadata")
+
+    def __init__(self, root: Path, file_path: str, metadata: Dict[str, Any], preview: str):
+        self.root = root
+        self.file_path = file_path
+        self.keys = _shared_layout(tuple(_shared(key) for key in metadata))
+        self.values = tuple(_shared(value) for value in metadata.values())
+        self.preview = preview
+
+    def __getstate__(self):
+        # Pickling a non-ASCII str caches a UTF-8 copy on it for good, which
+        # for previews would be kept in memory twice after every index save
+        return (self.root, self.file_path, self.keys, self.values, self.preview.encode("utf-8"))
+
+    def __setstate__(self, state):
+        self.root, self.file_path, keys, self.values, preview = state
+        self.keys = _shared_layout(keys)
+        self.preview = preview.decode("utf-8")
+
+    @property
+    def path(self) -> Path:
+        return self.root / self.file_path
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Frontmatter as a new dict (values are shared with the summary)"""
+        return dict(zip(self.keys, self.values))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """One frontmatter value, without building the metadata dict"""
+        try:
+            return self.values[self.keys.index(key)]
+        except ValueError:
+            return default
+
+    @property
+    def title(self) -> str:
+        return self.get("title", self.path.stem)
+
+    @property
+    def created(self) -> Any:
+        return self.get("created")
+
+    @property
+    def modified(self) -> Any:
+        return self.get("modified")
+
+    @property
+    def tags(self) -> Any:
+        return self.get("tags", [])
+
+    @property
+    def content(self) -> str:
+        """Full note body, read from disk on every access (never cached on the summary)"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            return note_codec.load(f).content
+
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Convert to the note summary dict returned by listing APIs
+
+        Args:
+            fields: Names from FIELDS to include, in that order (None for all)
+
+        Returns:
+            Dict with the requested fields
+        """
+        return {field: getattr(self, field) for field in (fields or self.FIELDS)}
+
+
+# Key tuples shared between summaries; one per distinct frontmatter layout
+_layouts: Dict[Tuple, Tuple] = {}
+
+
+def _shared_layout(keys: Tuple) -> Tuple:
+    return _layouts.setdefault(keys, keys)
+
+
+def _shared(value: Any) -> Any:
+    """Intern short strings, also inside lists (tags)"""
+    if type(value) is str:
+        return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+    if type(value) is list:
+        return [_shared(item) for item in value]
+    return value
+
+
+def timestamp_of(value: Any) -> Optional[float]:
+    """
+    Convert a frontmatter date value to a POSIX timestamp
+
+    Args:
+        value: ISO string, datetime or date as loaded from YAML
+
+    Returns:
+        Seconds since the epoch, or None if the value is not a date
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime.combine(value, time()).timestamp()
+    return None
+
+
+def read_note_summary(root: Path, file_path: str, preview_length: int = PREVIEW_LENGTH) -> NoteSummary:
+    """
+    Read a note's frontmatter and preview without loading the whole file
+
+    Produces the same metadata and preview as frontmatter.load followed by
+    truncating the content to preview_length characters.
+
+    Args:
+        root: Vault root
+        file_path: Path relative to vault root
+        preview_length: Number of body characters to keep in the preview
+
+    Returns:
+        NoteSummary for the note
+    """
+    head = read_note_head(root / file_path, preview_length)
+    if head is None:
+        return read_full_summary(root, file_path, preview_length)
+    header, preview = head
+    return NoteSummary(root, file_path, parse_header(header), preview)
+
+
+def read_note_head(path: Path, preview_length: int = PREVIEW_LENGTH) -> Optional[Tuple[Optional[str], str]]:
+    """
+    Read a note's raw YAML header and preview, leaving the YAML unparsed
+
+    Split from parsing so a scan can do the I/O and the YAML work in
+    different pools (see core.scanner).
+
+    Returns:
+        (header, preview) where header is None for notes without frontmatter,
+        or None if the note needs read_full_summary instead
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        header, head, more = _read_head(f, preview_length)
+
+    if header is False:
+        return None
+
+    preview = head[:preview_length].strip()
+    if more:
+        preview += "..."
+    return header, preview
+
+
+def parse_header(header: Optional[str]) -> Dict[str, Any]:
+    """Parse a raw YAML header from read_note_head into note metadata"""
+    if header is None:
+        return {}
+    fm = note_codec.parse_yaml(header)
+    return fm if isinstance(fm, dict) else {}
+
+
+def parse_headers(heads: List[Optional[Tuple[Optional[str], str]]]) -> List[Any]:
+    """
+    Parse a batch of read_note_head results; runs in scan worker processes
+
+    Returns:
+        (metadata, preview) per input, the error message for headers that
+        fail to parse, or None where read_note_head returned None
+    """
+    parsed = []
+    for head in heads:
+        if head is None:
+            parsed.append(None)  # needs read_full_summary
+            continue
+        header, preview = head
+        try:
+            parsed.append((parse_header(header), preview))
+        except Exception as e:
+            parsed.append(str(e))
+    return parsed
+
+
+def read_full_summary(root: Path, file_path: str, preview_length: int = PREVIEW_LENGTH) -> NoteSummary:
+    """Summarize a note via a full python-frontmatter parse (non-YAML headers)"""
+    with open(root / file_path, "r", encoding="utf-8") as f:
+        post = note_codec.load(f)
+    preview = post.content[:preview_length].strip()
+    if len(post.content) > preview_length:
+        preview += "..."
+    return NoteSummary(root, file_path, post.metadata, preview)
+
+
+def _read_head(f, preview_length: int) -> Tuple[Any, str, bool]:
+    """
+    Incrementally read the header and the start of the body
+
+    Returns:
+        (header, body_head, has_more) where header is the raw YAML text (None
+        without frontmatter), body_head is the left-stripped body truncated
+        to what was read, and has_more tells whether the stripped body is
+        longer than preview_length. header is False when the note needs a
+        full frontmatter parse.
+    """
+    buf = ""
+    eof = False
+
+    def read_more() -> None:
+        nonlocal buf, eof
+        chunk = f.read(READ_CHUNK_SIZE)
+        if chunk:
+            buf += chunk
+        else:
+            eof = True
+
+    # Skip leading whitespace, as frontmatter strips the text before detecting a header
+    while True:
+        stripped = buf.lstrip()
+        if stripped or eof:
+            break
+        buf = ""
+        read_more()
+    buf = stripped
+
+    body_start = 0
+    header: Optional[str] = None
+    # The boundary regex swallows trailing blank lines, so look past them before matching
+    while not eof and ("\n" not in buf or not buf[buf.index("\n"):].strip()):
+        read_more()
+    opening = FM_BOUNDARY.match(buf)
+
+    if opening is not None:
+        # Find the closing boundary within complete lines only
+        search_from = opening.end()
+        while True:
+            complete = len(buf) if eof else buf.rfind("\n")
+            closing = FM_BOUNDARY.search(buf, search_from, complete) if complete >= search_from else None
+            if closing is not None:
+                header = buf[opening.end():closing.start()]
+                body_start = closing.end()
+                break
+            if eof:
+                # Unterminated header: python-frontmatter keeps the whole text as content
+                break
+            read_more()
+    elif buf.startswith(OTHER_FORMAT_PREFIXES):
+        return False, "", False
+
+    # Read until the body has a non-whitespace character past the preview cut-off
+    while True:
+        head = buf[body_start:].lstrip()
+        if eof or (len(head) > preview_length and head[preview_length:].strip()):
+            break
+        read_more()
+
+    if eof:
+        head = head.rstrip()
+    return header, head, len(head) > preview_length
@@ -2,11 +2,43 @@
 Obsidian vault file operations
 Handles reading and writing Markdown files with YAML frontmatter
 """
+import fcntl
+import os
+import re
+import shutil
+import tempfile
+import threading
 import frontmatter
+import yaml
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+from datetime import datetime, date
+from typing import Optional, Dict, Any, List, Iterator, Sequence, Tuple, BinaryIO
 from .config import settings
+from .note_index import NoteIndex, encode_cursor, decode_cursor
+from .note_reader import NoteSummary, read_note_summary
+from . import note_codec
+from .scanner import VaultScanner
+
+
+DAILY_LOG_TEMPLATE = """# Daily Log - {date}
+
+## 🎯 Today's Focus
+
+## 📝 Work Log
+
+## 💭 Thoughts and Ideas
+
+## 📊 Summary
+"""
+
+# Daily log section that append_daily_log writes to by default
+WORK_LOG_HEADING = "## 📝 Work Log"
+
+# Frontmatter boundary lines, on raw bytes
+HEADER_BOUNDARY_RE = re.compile(rb"^-{3,}[ \t]*\r?$", re.MULTILINE)
+HEADER_READ_SIZE = 4096
+FENCE_PREFIXES = (b"```", b"~~~")
 
 
 class ObsidianManager:
@@ -14,6 +46,18 @@ class ObsidianManager:
 
     def __init__(self):
         self.vault_path = settings.full_vault_path
+        self.scanner = VaultScanner(workers=settings.scan_workers, chunk_size=settings.scan_chunk_size)
+        self.index = NoteIndex(
+            root=self.vault_path,
+            cache_file=settings.full_cache_path / "note_index.pickle",
+            parser=self._summarize_note,
+            refresh_interval=settings.index_refresh_interval,
+            bulk_parser=self._summarize_notes
+        )
+        # (daily log path, section) -> (append offset, size, mtime_ns) as left by the
+        # last append, so the next one can skip re-scanning the file
+        self._log_offsets: Dict[Tuple[str, str], Tuple[int, int, int]] = {}
+        self._log_offsets_lock = threading.Lock()
 
     def create_note(
         self,
@@ -21,7 +65,8 @@ class ObsidianManager:
         title: str,
         folder: str,
         metadata: Optional[Dict[str, Any]] = None,
-        filename: Optional[str] = None
+        filename: Optional[str] = None,
+        unique: bool = False
     ) -> Dict[str, Any]:
         """
         Create a new note in the Obsidian vault
@@ -32,6 +77,7 @@ class ObsidianManager:
             folder: Folder path relative to vault root
             metadata: Additional metadata for frontmatter
             filename: Optional custom filename (without .md extension)
+            unique: Add a numeric suffix instead of overwriting an existing note
 
         Returns:
             Dict with file_path, title, and success status
@@ -48,6 +94,28 @@ class ObsidianManager:
         # Create full file path
         file_path = folder_path / f"{filename}.md"
 
+        text = self._note_text(content, title, metadata)
+
+        # Write to file
+        if unique:
+            file_path, filename = self._create_exclusive(folder_path, filename, text)
+        else:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+        self.index.update_path(str(file_path.relative_to(self.vault_path)))
+
+        return {
+            "success": True,
+            "file_path": str(file_path.relative_to(self.vault_path)),
+            "absolute_path": str(file_path),
+            "title": title,
+            "filename": f"{filename}.md"
+        }
+
+    @staticmethod
+    def _note_text(content: str, title: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Full text of a new note: frontmatter with title and timestamps, then the content"""
         # Prepare frontmatter
         front = metadata or {}
         front.update({
@@ -58,18 +126,22 @@ class ObsidianManager:
 
         # Create post with frontmatter
         post = frontmatter.Post(content, **front)
+        return note_codec.dumps(post)
 
-        # Write to file
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(frontmatter.dumps(post))
-
-        return {
-            "success": True,
-            "file_path": str(file_path.relative_to(self.vault_path)),
-            "absolute_path": str(file_path),
-            "title": title,
-            "filename": f"{filename}.md"
-        }
+    @staticmethod
+    def _create_exclusive(folder_path: Path, filename: str, text: str) -> Tuple[Path, str]:
+        """Write text to the first free name among filename, filename_2, filename_3, ..."""
+        candidate, n = filename, 1
+        while True:
+            file_path = folder_path / f"{candidate}.md"
+            try:
+                # Exclusive create, so concurrent writers never claim the same name
+                with open(file_path, "x", encoding="utf-8") as f:
+                    f.write(text)
+                return file_path, candidate
+            except FileExistsError:
+                n += 1
+                candidate = f"{filename}_{n}"
 
     def read_note(self, file_path: str) -> Dict[str, Any]:
         """
@@ -87,7 +159,7 @@ class ObsidianManager:
             raise FileNotFoundError(f"Note not found: {file_path}")
 
         with open(full_path, "r", encoding="utf-8") as f:
-            post = frontmatter.load(f)
+            post = note_codec.load(f)
 
         return {
             "content": post.content,
@@ -100,6 +172,11 @@ class ObsidianManager:
         """
         Update an existing note
 
+        When only metadata changes, the frontmatter is patched line by line:
+        key order, formatting and unknown fields are kept, the body is not
+        rewritten, and the header is written in place if its length is
+        unchanged (atomically replaced otherwise).
+
         Args:
             file_path: Path relative to vault root
             content: New content (None to keep existing)
@@ -113,9 +190,19 @@ class ObsidianManager:
         if not full_path.exists():
             raise FileNotFoundError(f"Note not found: {file_path}")
 
+        # Metadata-only changes rewrite just the frontmatter lines that change
+        updates = {**(metadata or {}), "modified": datetime.now().isoformat()}
+        if content is None and self._patch_frontmatter(full_path, updates):
+            self.index.update_path(file_path)
+            return {
+                "success": True,
+                "file_path": file_path,
+                "message": "Note updated successfully"
+            }
+
         # Read existing note
         with open(full_path, "r", encoding="utf-8") as f:
-            post = frontmatter.load(f)
+            post = note_codec.load(f)
 
         # Update content if provided
         if content is not None:
@@ -130,7 +217,9 @@ class ObsidianManager:
 
         # Write back
         with open(full_path, "w", encoding="utf-8") as f:
-            f.write(frontmatter.dumps(post))
+            f.write(note_codec.dumps(post))
+
+        self.index.update_path(file_path)
 
         return {
             "success": True,
@@ -138,11 +227,68 @@ class ObsidianManager:
             "message": "Note updated successfully"
         }
 
+    def move_note(
+        self,
+        file_path: str,
+        folder: str,
+        title: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Move a note to another folder, renaming it after its title
+
+        The new file is written before the old one is removed, so the note
+        exists on disk throughout. An existing note of the same name is never
+        overwritten; a numeric suffix is added instead.
+
+        Args:
+            file_path: Path relative to vault root
+            folder: Destination folder relative to vault root
+            title: New title (None to keep the existing one)
+            metadata: Metadata to update (merged with existing)
+
+        Returns:
+            Dict with the new file_path, title, and success status
+        """
+        full_path = self.vault_path / file_path
+
+        if not full_path.exists():
+            raise FileNotFoundError(f"Note not found: {file_path}")
+
+        with open(full_path, "r", encoding="utf-8") as f:
+            post = note_codec.load(f)
+
+        if metadata:
+            post.metadata.update(metadata)
+        if title:
+            post.metadata["title"] = title
+        post.metadata["modified"] = datetime.now().isoformat()
+
+        # Keep the creation date prefix, so filing a capture later does not re-date it
+        created = str(post.metadata.get("created", ""))[:10] or datetime.now().strftime("%Y-%m-%d")
+        filename = f"{created}_{self._sanitize_filename(str(post.metadata.get('title', full_path.stem)))}"
+        new_path, filename = self._create_exclusive(
+            settings.ensure_path_exists(folder), filename, note_codec.dumps(post)
+        )
+        full_path.unlink()
+
+        new_file_path = str(new_path.relative_to(self.vault_path))
+        self.index.update_path(file_path)
+        self.index.update_path(new_file_path)
+
+        return {
+            "success": True,
+            "file_path": new_file_path,
+            "title": post.metadata.get("title"),
+            "filename": f"{filename}.md"
+        }
+
     def list_notes(
         self,
         folder: Optional[str] = None,
         limit: Optional[int] = 50,
-        sort_by: str = "modified"
+        sort_by: str = "modified",
+        fields: Optional[Sequence[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         List notes from the vault
@@ -151,51 +297,108 @@ class ObsidianManager:
             folder: Folder path relative to vault root (None for all)
             limit: Maximum number of notes to return
             sort_by: Sort by "modified" or "created"
+            fields: Summary fields to return, from NoteSummary.FIELDS (None for all)
 
         Returns:
             List of note summaries
         """
-        search_path = self.vault_path if folder is None else self.vault_path / folder
-
-        if not search_path.exists():
+        if folder is not None and not (self.vault_path / folder).exists():
             return []
 
-        notes = []
-        for md_file in search_path.rglob("*.md"):
-            try:
-                with open(md_file, "r", encoding="utf-8") as f:
-                    post = frontmatter.load(f)
-
-                # Extract preview (first 200 chars of content)
-                preview = post.content[:200].strip()
-                if len(post.content) > 200:
-                    preview += "..."
-
-                notes.append({
-                    "file_path": str(md_file.relative_to(self.vault_path)),
-                    "title": post.metadata.get("title", md_file.stem),
-                    "preview": preview,
-                    "created": post.metadata.get("created"),
-                    "modified": post.metadata.get("modified"),
-                    "tags": post.metadata.get("tags", []),
-                    "metadata": post.metadata
-                })
-            except Exception as e:
-                # Skip files that can't be read
-                print(f"Warning: Could not read {md_file}: {e}")
-                continue
+        # Answer from the metadata index; only notes whose stat changed get re-parsed
+        self.index.ensure_fresh(folder, parse=False)
+
+        if sort_by in ("modified", "created"):
+            # Bounded top-k: parses roughly limit notes instead of the whole folder
+            notes = self.index.top(limit or len(self.index), folder=folder, sort_by=sort_by)
+        else:
+            notes = self.index.notes(folder)
+            if limit:
+                notes = notes[:limit]
 
-        # Sort notes (handle None values safely)
-        if sort_by == "modified":
-            notes.sort(key=lambda x: x.get("modified") or "", reverse=True)
-        elif sort_by == "created":
-            notes.sort(key=lambda x: x.get("created") or "", reverse=True)
+        return [note.to_dict(fields) for note in notes]
 
-        # Limit results
-        if limit:
-            notes = notes[:limit]
+    def list_notes_page(
+        self,
+        folder: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort_by: str = "modified",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List one page of notes, newest first, continuing from a cursor
 
-        return notes
+        Args:
+            folder: Folder path relative to vault root (None for all)
+            limit: Maximum number of notes to return
+            cursor: next_cursor from the previous page (None for the first page)
+            sort_by: Sort and date by "modified" or "created"
+            start: Only notes dated on or after this day (optional)
+            end: Only notes dated on or before this day (optional)
+            fields: Summary fields to return, from NoteSummary.FIELDS (None for all)
+
+        Returns:
+            (note summaries, next_cursor) where next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if folder is not None and not (self.vault_path / folder).exists():
+            return [], None
+
+        self.index.ensure_fresh(folder, parse=False)
+        notes, next_position = self.index.page(
+            limit, folder=folder, sort_by=sort_by, after=after, start=start, end=end
+        )
+        next_cursor = encode_cursor(next_position) if next_position is not None else None
+        return [note.to_dict(fields) for note in notes], next_cursor
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        """
+        Force a full rebuild of the note metadata index
+
+        Returns:
+            Dict with scan statistics, including parse throughput under "scan"
+        """
+        stats = self.index.rebuild()
+        return {**stats, "scan": self.scanner.last_stats}
+
+    def attach_watcher(self, watcher) -> None:
+        """
+        Keep the metadata index current from a running VaultWatcher
+
+        Once attached, listings stop re-statting the vault on a timer.
+        """
+        watcher.subscribe(self.index.apply_events)
+        self.index.watched = True
+
+    def warm_index(self) -> int:
+        """
+        Bring the metadata index fully up to date, parsing every pending note
+
+        Meant to run in the background after startup so later listings
+        (and the top-k skew fallback) see a completely parsed index, and
+        timeline cursor pages find their sort order already built.
+
+        Returns:
+            Number of notes parsed
+        """
+        self.index.ensure_fresh(parse=False)
+        parsed = self.index.parse_pending()
+        self.index.build_orderings()
+        return parsed
+
+    def _summarize_note(self, md_file: Path) -> NoteSummary:
+        """Read a note's header and preview for the metadata index"""
+        return read_note_summary(self.vault_path, str(md_file.relative_to(self.vault_path)))
+
+    def _summarize_notes(self, file_paths: List[str]) -> Iterator[Tuple[str, Optional[NoteSummary]]]:
+        """Summarize many notes at once on the parallel scanner"""
+        return self.scanner.summaries(self.vault_path, file_paths)
 
     def get_daily_log(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         """
@@ -211,18 +414,12 @@ class ObsidianManager:
             date = datetime.now()
 
         date_str = date.strftime("%Y-%m-%d")
-        year = date.strftime("%Y")
-        filename = f"{date_str}_daily_log"
-
-        # Path: 01_Execution/Logs/Journal_Entries/YYYY/
-        log_folder = f"01_Execution/Logs/Journal_Entries/{year}"
-        folder_path = settings.ensure_path_exists(log_folder)
-        file_path = folder_path / f"{filename}.md"
+        file_path = self._daily_log_path(date)
 
         # Check if log exists
-        if file_path.exists():
+        if not self._create_daily_log(date):
             with open(file_path, "r", encoding="utf-8") as f:
-                post = frontmatter.load(f)
+                post = note_codec.load(f)
             return {
                 "exists": True,
                 "content": post.content,
@@ -230,36 +427,311 @@ class ObsidianManager:
                 "file_path": str(file_path.relative_to(self.vault_path))
             }
 
-        # Create new log
-        template = f"""# Daily Log - {date_str}
+        return {
+            "exists": False,
+            "content": DAILY_LOG_TEMPLATE.format(date=date_str),
+            "metadata": {"type": "daily_log", "date": date_str},
+            "file_path": str(file_path.relative_to(self.vault_path))
+        }
 
-## 🎯 Today's Focus
+    def append_daily_log(
+        self,
+        entry: str,
+        date: Optional[datetime] = None,
+        section: str = WORK_LOG_HEADING
+    ) -> Dict[str, Any]:
+        """
+        Add a timestamped entry to the end of a daily log section
 
-## 📝 Work Log
+        Only the bytes after the insertion point are rewritten, and the
+        modified timestamp is patched in place, so appending costs the same
+        however long the log already is. Writers (threads or processes)
+        take an exclusive file lock, so concurrent appends are never lost.
 
-## 💭 Thoughts and Ideas
+        Args:
+            entry: Entry text; continuation lines are indented under it
+            date: The date of the log (defaults to today); created if missing
+            section: Heading line to append under; added at the end when absent
 
-## 📊 Summary
-"""
+        Returns:
+            Dict with file_path, the entry line written, and success status
+        """
+        now = datetime.now()
+        date = date or now
+        self._create_daily_log(date)
+        full_path = self._daily_log_path(date)
+        file_path = str(full_path.relative_to(self.vault_path))
+
+        lines = entry.strip().splitlines() or [""]
+        line = "\n".join([f"- {now.strftime('%H:%M')} {lines[0]}"] + [f"  {rest}" for rest in lines[1:]])
+        block = f"{line}\n".encode("utf-8")
+
+        with self._locked(full_path) as f:
+            stat = os.fstat(f.fileno())
+            with self._log_offsets_lock:
+                cached = self._log_offsets.get((file_path, section))
+            if cached is not None and cached[1:] == (stat.st_size, stat.st_mtime_ns):
+                offset = cached[0]
+            else:
+                # First append, or the log was edited elsewhere: find the section
+                data = f.read()
+                offset = self._section_end(data, section.encode("utf-8"))
+                if offset is None:
+                    offset = len(data)
+                    block = f"\n{section}\n".encode("utf-8") + block
+                if offset and not data[:offset].endswith(b"\n"):
+                    block = b"\n" + block
+
+            f.seek(offset)
+            tail = f.read()
+            f.seek(offset)
+            f.write(block + tail)
+
+            # Fixed-width timestamps keep the header length, so this is an in-place write
+            shift = 0
+            patch = self._header_patch(f, {"modified": now.isoformat(timespec="microseconds")})
+            if patch is not None:
+                start, end, header = patch
+                shift = len(header) - (end - start)
+                f.seek(end)
+                rest = f.read() if shift else b""
+                f.seek(start)
+                f.write(header + rest)
+                if shift < 0:
+                    f.truncate()
+            f.flush()
+
+            stat = os.fstat(f.fileno())
+            with self._log_offsets_lock:
+                self._log_offsets[(file_path, section)] = (offset + len(block) + shift, stat.st_size, stat.st_mtime_ns)
+
+        self.index.update_path(file_path)
 
-        result = self.create_note(
-            content=template,
+        return {
+            "success": True,
+            "file_path": file_path,
+            "entry": line
+        }
+
+    def _daily_log_path(self, date: datetime) -> Path:
+        # Path: 01_Execution/Logs/Journal_Entries/YYYY/
+        log_folder = f"01_Execution/Logs/Journal_Entries/{date.strftime('%Y')}"
+        return self.vault_path / log_folder / f"{date.strftime('%Y-%m-%d')}_daily_log.md"
+
+    def _create_daily_log(self, date: datetime) -> bool:
+        """Create the day's log from the template unless it exists; True if created"""
+        date_str = date.strftime("%Y-%m-%d")
+        year = date.strftime("%Y")
+        file_path = self._daily_log_path(date)
+        if file_path.exists():
+            return False
+
+        text = self._note_text(
+            content=DAILY_LOG_TEMPLATE.format(date=date_str),
             title=f"Daily Log - {date_str}",
-            folder=log_folder,
-            filename=filename,
             metadata={
                 "type": "daily_log",
                 "date": date_str,
                 "tags": ["daily-log", year]
             }
         )
+        settings.ensure_path_exists(str(file_path.parent.relative_to(self.vault_path)))
+        try:
+            # Exclusive create: a concurrent appender may have just created it
+            with open(file_path, "x", encoding="utf-8") as f:
+                f.write(text)
+        except FileExistsError:
+            return False
 
-        return {
-            "exists": False,
-            "content": template,
-            "metadata": {"type": "daily_log", "date": date_str},
-            "file_path": result["file_path"]
-        }
+        self.index.update_path(str(file_path.relative_to(self.vault_path)))
+        return True
+
+    @staticmethod
+    def _section_end(data: bytes, heading: bytes) -> Optional[int]:
+        """
+        Byte offset just past the last non-blank line of a section
+
+        The section runs from its heading line to the next heading of the
+        same or a higher level outside code fences.
+
+        Returns:
+            The offset, or None if the heading is not in data
+        """
+        level = len(heading) - len(heading.lstrip(b"#"))
+        offset = 0
+        end = None
+        in_fence = False
+        for line in data.splitlines(keepends=True):
+            stripped = line.strip()
+            if stripped.startswith(FENCE_PREFIXES):
+                in_fence = not in_fence
+            elif not in_fence and stripped.startswith(b"#"):
+                if end is not None and len(stripped) - len(stripped.lstrip(b"#")) <= level:
+                    break
+                if end is None and stripped == heading:
+                    end = offset + len(line)
+                    offset += len(line)
+                    continue
+            if end is not None and stripped:
+                end = offset + len(line)
+            offset += len(line)
+        return end
+
+    @staticmethod
+    @contextmanager
+    def _locked(full_path: Path) -> Iterator[BinaryIO]:
+        """Open a note for update under an exclusive lock shared with other processes"""
+        while True:
+            f = open(full_path, "r+b")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(full_path).st_ino:
+                    break
+            except FileNotFoundError:
+                f.close()
+                raise
+            # Atomically replaced while we waited for the lock: lock the new file
+            f.close()
+        try:
+            yield f
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+
+    def _patch_frontmatter(self, full_path: Path, updates: Dict[str, Any]) -> bool:
+        """
+        Apply metadata updates to a note's frontmatter without touching the body
+
+        Returns:
+            False if the header cannot be patched safely (no YAML frontmatter,
+            or a layout the line editor does not handle); nothing is written then
+        """
+        with self._locked(full_path) as f:
+            patch = self._header_patch(f, updates)
+            if patch is None:
+                return False
+            start, end, header = patch
+
+            if len(header) == end - start:
+                f.seek(start)
+                f.write(header)
+                return True
+
+            # Header length changed: write a new file and swap it in atomically
+            fd, temp_path = tempfile.mkstemp(dir=full_path.parent, prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    f.seek(0)
+                    out.write(f.read(start))
+                    out.write(header)
+                    f.seek(end)
+                    shutil.copyfileobj(f, out)
+                os.chmod(temp_path, os.fstat(f.fileno()).st_mode & 0o7777)
+                os.replace(temp_path, full_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            return True
+
+    @classmethod
+    def _header_patch(cls, f: BinaryIO, updates: Dict[str, Any]) -> Optional[Tuple[int, int, bytes]]:
+        """
+        Work out a frontmatter edit
+
+        Returns:
+            (start, end, replacement) byte range of the header's YAML lines and
+            their new text, or None if the note has no patchable YAML header
+        """
+        f.seek(0)
+        head = f.read(HEADER_READ_SIZE)
+        opening = HEADER_BOUNDARY_RE.match(head)
+        if opening is None:
+            return None
+        while True:
+            closing = HEADER_BOUNDARY_RE.search(head, opening.end() + 1)
+            # Only trust a closing line that is complete
+            if closing is not None and closing.end() < len(head):
+                break
+            more = f.read(HEADER_READ_SIZE)
+            if not more:
+                break
+            head += more
+        if closing is None:
+            return None
+
+        start = head.index(b"\n", opening.end()) + 1
+        end = closing.start()
+        try:
+            header = cls._edit_yaml(head[start:end].decode("utf-8"), updates)
+        except (UnicodeDecodeError, yaml.YAMLError):
+            return None
+        return None if header is None else (start, end, header.encode("utf-8"))
+
+    @staticmethod
+    def _edit_yaml(text: str, updates: Dict[str, Any]) -> Optional[str]:
+        """
+        Replace or append top-level keys in YAML mapping text, leaving every
+        other line as it is
+
+        Swapping one single-line entry for another cannot disturb the rest of
+        the mapping; any other edit is checked by loading the result.
+
+        Returns:
+            The new text, or None if the result would not load as the
+            existing mapping with the updates applied
+        """
+        newline = "\r\n" if "\r\n" in text else "\n"
+        lines = text.splitlines(keepends=True)
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += newline
+
+        entries = []
+        appended = []
+        simple = True
+        for key, value in updates.items():
+            # Same style python-frontmatter writes
+            entry = yaml.dump(
+                {key: value}, Dumper=yaml.SafeDumper, default_flow_style=False, allow_unicode=True
+            ).splitlines(keepends=True)
+            if newline != "\n":
+                entry = [line.replace("\n", newline) for line in entry]
+            entries.extend(entry)
+
+            prefix = f"{key}:"
+            found = next(
+                (i for i, line in enumerate(lines)
+                 if line.startswith(prefix) and line[len(prefix):len(prefix) + 1] in (" ", "\r", "\n", "")),
+                None
+            )
+            if found is None:
+                appended.append(key)
+                lines.extend(entry)
+                simple = False
+                continue
+            # The value runs on over indented lines and block sequence items
+            # (and blank lines between them, as in block scalars)
+            stop = end = found + 1
+            while stop < len(lines) and (lines[stop][:1] in (" ", "\t") or lines[stop].rstrip() == "-"
+                                         or lines[stop].startswith("- ") or not lines[stop].strip()):
+                stop += 1
+                if lines[stop - 1].strip():
+                    end = stop
+            stop = end
+            simple = simple and stop == found + 1 and len(entry) == 1
+            lines[found:stop] = entry
+
+        result = "".join(lines)
+        if simple:
+            return result
+
+        old = note_codec.parse_yaml(text) if text.strip() else {}
+        if not isinstance(old, dict) or any(key in old for key in appended):
+            # Not a mapping, or a key written in a form the line scan missed
+            return None
+        expected = {**old, **note_codec.parse_yaml("".join(entries))}
+        if note_codec.parse_yaml(result) != expected:
+            return None
+        return result
 
     @staticmethod
     def _sanitize_filename(filename: str) -> str:
@@ -0,0 +1,344 @@
+"""
+Related notes without a model call
+Every note gets a MinHash signature of its terms (core.minhash), stored in
+one NumPy matrix. Neighbours are found by LSH banding and ranked by
+estimated Jaccard similarity, all vectorized over the whole vault. Lists
+are precomputed at build time; a note change only marks the lists it can
+affect for recomputation.
+"""
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+import yaml
+
+from .note_index import NoteIndex
+from .obsidian import obsidian
+from .scanner import VaultScanner
+from .minhash import NUM_PERM, BANDS, signature, note_terms, note_signatures, band_keys
+
+
+# Neighbours kept per note; requests may ask for fewer
+MAX_NEIGHBORS = 20
+
+# Candidates (most shared LSH bands first) whose full signatures are compared
+MAX_CANDIDATES = 500
+
+# Estimated Jaccard similarity below which a note is not considered related
+MIN_SIMILARITY = 0.05
+
+# Notes whose neighbour lists are computed together during a build
+BUILD_BATCH = 1024
+
+# LSH buckets larger than this (e.g. many near-empty notes) are ignored during a build
+MAX_BUCKET = 1000
+
+
+class RelatedIndex:
+    """MinHash/LSH nearest-neighbour lists for every note, kept in sync with the note index"""
+
+    def __init__(self, note_index: NoteIndex, scanner: VaultScanner):
+        self.note_index = note_index
+        self.scanner = scanner
+
+        # Row-aligned matrices; rows of deleted notes are reused
+        self._sigs = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self._keys = np.zeros((0, BANDS), dtype=np.uint64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._nbr = np.zeros((0, MAX_NEIGHBORS), dtype=np.int32)  # -1 pads short lists
+        self._nbr_sim = np.zeros((0, MAX_NEIGHBORS), dtype=np.float32)
+        self._stale = np.zeros(0, dtype=bool)
+        self._paths: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        self._built = False
+        self._lock = threading.RLock()
+        note_index.add_listener(self._on_note_changed)
+
+    @property
+    def size(self) -> int:
+        return len(self._rows)
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Sign every note and precompute all neighbour lists
+
+        Returns:
+            Dict with note count and the time spent signing and linking
+        """
+        started = time.perf_counter()
+        self.note_index.ensure_fresh(parse=False)
+        with self._lock:
+            with self._dirty_lock:
+                self._dirty.clear()
+            paths, sigs = [], []
+            # Notes are read and signed on the parallel scanner
+            for file_path, sig in self.scanner.map(
+                self.note_index.paths(), self._read_text, note_signatures, label="notes for related"
+            ):
+                if isinstance(sig, Exception):
+                    print(f"Warning: Could not sign {file_path}: {sig}")
+                    continue
+                paths.append(file_path)
+                sigs.append(sig)
+            self._load(paths, sigs)
+            signed = time.perf_counter()
+
+            self._link_all()
+            self._built = True
+        finished = time.perf_counter()
+        return {
+            "notes": self.size,
+            "sign_seconds": round(signed - started, 3),
+            "link_seconds": round(finished - signed, 3)
+        }
+
+    def related(self, file_path: str, k: int = 10) -> Optional[Dict[str, Any]]:
+        """
+        Notes most similar to a note
+
+        Args:
+            file_path: Path relative to vault root
+            k: Number of neighbours (at most MAX_NEIGHBORS)
+
+        Returns:
+            Dict with items (file_path, title, similarity, tags, modified)
+            and the time taken, or None if the note is not indexed
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._ensure_built()
+            row = self._rows.get(file_path)
+            if row is None:
+                return None
+            if self._stale[row]:
+                self._link(np.array([row]))
+            neighbors = [
+                (self._paths[int(n)], float(s))
+                for n, s in zip(self._nbr[row], self._nbr_sim[row]) if n >= 0
+            ][:k]
+        return self._result(neighbors, started)
+
+    def similar_to_text(self, text: str, k: int = 10, exclude: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Notes most similar to arbitrary text, e.g. a capture not saved yet
+
+        Args:
+            text: Note text (frontmatter allowed)
+            k: Number of notes
+            exclude: Path to leave out of the results
+
+        Returns:
+            Same shape as related()
+        """
+        started = time.perf_counter()
+        sig = signature(note_terms(text))
+        with self._lock:
+            self._ensure_built()
+            neighbors = []
+            if sig is not None:
+                skip = self._rows.get(exclude, -1)
+                rows, sims = self._neighbors(sig, band_keys(sig[None, :])[0], skip, k)
+                neighbors = [(self._paths[int(n)], float(s)) for n, s in zip(rows, sims)]
+        return self._result(neighbors, started)
+
+    def _result(self, neighbors: List[tuple], started: float) -> Dict[str, Any]:
+        items = []
+        for file_path, similarity in neighbors:
+            summary = self.note_index.get(file_path)
+            if summary is None:
+                continue
+            items.append({
+                "file_path": file_path,
+                "title": str(summary.title),
+                "similarity": round(similarity, 4),
+                "tags": summary.tags,
+                "modified": summary.modified
+            })
+        return {"items": items, "took_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    def _neighbors(self, sig: np.ndarray, keys: np.ndarray, skip: int, k: int):
+        """Top-k rows by estimated similarity among LSH candidates of one signature"""
+        n = len(self._paths)
+        shared = (self._keys[:n] == keys).sum(axis=1, dtype=np.int32)
+        shared[~self._alive[:n]] = 0
+        if skip >= 0:
+            shared[skip] = 0
+        return self._rank(sig, shared, k)
+
+    def _rank(self, sig: np.ndarray, shared: np.ndarray, k: int):
+        candidates = np.flatnonzero(shared)
+        if len(candidates) > MAX_CANDIDATES:
+            candidates = candidates[np.argpartition(-shared[candidates], MAX_CANDIDATES)[:MAX_CANDIDATES]]
+        sims = (self._sigs[candidates] == sig).mean(axis=1, dtype=np.float32)
+        keep = sims >= MIN_SIMILARITY
+        candidates, sims = candidates[keep], sims[keep]
+        if len(candidates) > k:
+            top = np.argpartition(-sims, k)[:k]
+            candidates, sims = candidates[top], sims[top]
+        order = np.lexsort((candidates, -sims))
+        return candidates[order], sims[order]
+
+    def _link(self, rows: np.ndarray) -> None:
+        """Recompute the neighbour lists of a few rows, comparing band keys against every note"""
+        n = len(self._paths)
+        shared = (self._keys[rows][:, None, :] == self._keys[None, :n, :]).sum(axis=2, dtype=np.int32)
+        shared[:, ~self._alive[:n]] = 0
+        shared[np.arange(len(rows)), rows] = 0
+        for i, row in enumerate(rows):
+            found, sims = self._rank(self._sigs[row], shared[i], MAX_NEIGHBORS)
+            self._nbr[row] = -1
+            self._nbr_sim[row] = 0
+            self._nbr[row, :len(found)] = found
+            self._nbr_sim[row, :len(found)] = sims
+            self._stale[row] = False
+
+    def _link_all(self) -> None:
+        """
+        Compute every neighbour list after a build
+
+        Works from per-band sorted keys, so the cost follows the number of
+        candidate pairs rather than the square of the vault size. Rows are
+        processed in batches, each fully vectorized.
+        """
+        n = len(self._paths)
+        orders = [np.argsort(self._keys[:, band], kind="stable") for band in range(BANDS)]
+        sorted_keys = [self._keys[order, band] for band, order in enumerate(orders)]
+
+        for start in range(0, n, BUILD_BATCH):
+            rows = np.arange(start, min(n, start + BUILD_BATCH))
+            pair_rows, pair_cands = [], []
+            for band in range(BANDS):
+                keys = self._keys[rows, band]
+                lo = np.searchsorted(sorted_keys[band], keys, side="left")
+                sizes = np.searchsorted(sorted_keys[band], keys, side="right") - lo
+                sizes[sizes > MAX_BUCKET] = 0
+                # Every (row, bucket member) pair: ragged ranges lo[i]:lo[i] + sizes[i]
+                offsets = np.repeat(lo - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+                pair_rows.append(np.repeat(rows, sizes))
+                pair_cands.append(orders[band][offsets])
+
+            codes = np.concatenate(pair_rows).astype(np.int64) * n + np.concatenate(pair_cands)
+            codes, shared = np.unique(codes, return_counts=True)
+            pair_row, cand = codes // n, codes % n
+            keep = pair_row != cand
+            pair_row, cand, shared = pair_row[keep], cand[keep], shared[keep]
+
+            # At most MAX_CANDIDATES per row, those sharing the most bands
+            order = np.lexsort((-shared, pair_row))
+            pair_row, cand = pair_row[order], cand[order]
+            keep = _rank_in_groups(pair_row) < MAX_CANDIDATES
+            pair_row, cand = pair_row[keep], cand[keep]
+
+            sims = (self._sigs[pair_row] == self._sigs[cand]).mean(axis=1, dtype=np.float32)
+            keep = sims >= MIN_SIMILARITY
+            pair_row, cand, sims = pair_row[keep], cand[keep], sims[keep]
+            order = np.lexsort((cand, -sims, pair_row))
+            pair_row, cand, sims = pair_row[order], cand[order], sims[order]
+            rank = _rank_in_groups(pair_row)
+            keep = rank < MAX_NEIGHBORS
+
+            self._nbr[rows] = -1
+            self._nbr_sim[rows] = 0
+            self._nbr[pair_row[keep], rank[keep]] = cand[keep]
+            self._nbr_sim[pair_row[keep], rank[keep]] = sims[keep]
+            self._stale[rows] = False
+
+    def _ensure_built(self) -> None:
+        if not self._built:
+            self.build()
+        self._apply_dirty()
+
+    def _read_text(self, file_path: str) -> str:
+        with open(self.note_index.root / file_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _on_note_changed(self, file_path: str) -> None:
+        # Called under the note index lock: only record the path, re-sign at query time
+        with self._dirty_lock:
+            self._dirty.add(file_path)
+
+    def _apply_dirty(self) -> None:
+        """Re-sign changed notes and mark every neighbour list they can affect as stale"""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        for file_path in dirty:
+            row = self._rows.get(file_path)
+            if row is not None:
+                self._mark_affected(row)
+                self._drop(file_path)
+
+            sig = None
+            if self.note_index.get(file_path) is not None:
+                try:
+                    sig = signature(note_terms(self._read_text(file_path)))
+                except (OSError, ValueError, yaml.YAMLError) as e:
+                    print(f"Warning: Could not sign {file_path}: {e}")
+            if sig is not None:
+                row = self._add(file_path, sig)
+                self._mark_affected(row)
+
+    def _mark_affected(self, row: int) -> None:
+        """Stale: the row itself, lists that contain it, and notes it shares a band with"""
+        n = len(self._paths)
+        self._stale[row] = True
+        self._stale[:n] |= (self._nbr[:n] == row).any(axis=1)
+        self._stale[:n] |= (self._keys[:n] == self._keys[row]).any(axis=1) & self._alive[:n]
+
+    def _load(self, paths: List[str], sigs: List[Optional[np.ndarray]]) -> None:
+        kept = [(path, sig) for path, sig in zip(paths, sigs) if sig is not None]
+        n = len(kept)
+        self._paths = [path for path, _ in kept]
+        self._rows = {path: row for row, path in enumerate(self._paths)}
+        self._free = []
+        self._sigs = np.array([sig for _, sig in kept], dtype=np.uint32).reshape(n, NUM_PERM)
+        self._keys = band_keys(self._sigs)
+        self._alive = np.ones(n, dtype=bool)
+        self._nbr = np.full((n, MAX_NEIGHBORS), -1, dtype=np.int32)
+        self._nbr_sim = np.zeros((n, MAX_NEIGHBORS), dtype=np.float32)
+        self._stale = np.ones(n, dtype=bool)
+
+    def _add(self, file_path: str, sig: np.ndarray) -> int:
+        if self._free:
+            row = self._free.pop()
+            self._paths[row] = file_path
+        else:
+            row = len(self._paths)
+            self._paths.append(file_path)
+            if row >= len(self._sigs):
+                self._grow(max(64, 2 * len(self._sigs)))
+        self._rows[file_path] = row
+        self._sigs[row] = sig
+        self._keys[row] = band_keys(sig[None, :])[0]
+        self._alive[row] = True
+        self._nbr[row] = -1
+        self._stale[row] = True
+        return row
+
+    def _drop(self, file_path: str) -> None:
+        row = self._rows.pop(file_path)
+        self._paths[row] = None
+        self._alive[row] = False
+        self._free.append(row)
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - len(self._sigs)
+        self._sigs = np.vstack([self._sigs, np.zeros((extra, NUM_PERM), dtype=np.uint32)])
+        self._keys = np.vstack([self._keys, np.zeros((extra, BANDS), dtype=np.uint64)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        self._nbr = np.vstack([self._nbr, np.full((extra, MAX_NEIGHBORS), -1, dtype=np.int32)])
+        self._nbr_sim = np.vstack([self._nbr_sim, np.zeros((extra, MAX_NEIGHBORS), dtype=np.float32)])
+        self._stale = np.concatenate([self._stale, np.zeros(extra, dtype=bool)])
+
+
+def _rank_in_groups(groups: np.ndarray) -> np.ndarray:
+    """Position of each element within its run of equal values in a sorted array"""
+    return np.arange(len(groups)) - np.searchsorted(groups, groups, side="left")
+
+
+# Global instance
+related_index = RelatedIndex(obsidian.index, obsidian.scanner)
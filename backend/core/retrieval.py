@@ -0,0 +1,258 @@
+"""
+Local retrieval of note passages for chat context
+Notes are split into chunks at Markdown headings and indexed with BM25
+over the same terms as search (core.tokenizer). A query returns the best
+chunks that fit a token budget; nothing leaves the machine.
+"""
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+import yaml
+
+from .bm25 import BM25Postings
+from .config import settings
+from .note_index import NoteIndex
+from .obsidian import obsidian
+from .scanner import VaultScanner
+from .tokenizer import tokenize, estimate_tokens, split_sections, count_chunk_terms
+
+
+# BM25 parameters (chunks are short and similar in length, so length matters less)
+K1 = 1.2
+B = 0.5
+
+# Title and heading terms count as if repeated this many times in every chunk of the note
+HEADING_WEIGHT = 2
+
+
+class ChunkIndex:
+    """BM25 index over heading-delimited note chunks, kept in sync with the note index"""
+
+    def __init__(self, note_index: NoteIndex, scanner: VaultScanner):
+        self.note_index = note_index
+        self.scanner = scanner
+
+        self._bm25 = BM25Postings(K1, B)
+        self._chunk_paths: List[Optional[str]] = []  # None marks a deleted chunk
+        self._chunk_headings: List[Optional[str]] = []
+        self._chunk_spans = array("I")  # start, end offsets into the note body, interleaved
+        self._path_to_chunks: Dict[str, List[int]] = {}
+
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        self._built = False
+        self._lock = threading.RLock()
+        note_index.add_listener(self._on_note_changed)
+
+    @property
+    def size(self) -> int:
+        return self._bm25.live
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Chunk and index every note in the vault
+
+        Returns:
+            Dict with note and chunk counts and build time
+        """
+        started = time.perf_counter()
+        self.note_index.ensure_fresh(parse=False)
+        with self._lock:
+            self._reset()
+            with self._dirty_lock:
+                self._dirty.clear()
+            # Bodies are read, chunked and tokenized on the parallel scanner
+            for file_path, chunks in self.scanner.map(
+                self.note_index.paths(), self._read_text, count_chunk_terms, label="notes for retrieval"
+            ):
+                if isinstance(chunks, Exception):
+                    print(f"Warning: Could not index {file_path} for retrieval: {chunks}")
+                    continue
+                self._index_path(file_path, chunks)
+            self._built = True
+        return {
+            "notes": len(self._path_to_chunks),
+            "chunks": self.size,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+
+    def retrieve(self, query: str, k: int = 8, token_budget: int = 1500) -> Dict[str, Any]:
+        """
+        Find the note chunks most relevant to a query
+
+        Chunks are taken best first; one that would overflow the budget is
+        skipped in favour of smaller ones further down.
+
+        Args:
+            query: Free text, e.g. the user's chat message
+            k: Maximum number of chunks
+            token_budget: Maximum estimated tokens of chunk text in total
+
+        Returns:
+            Dict with items (file_path, title, heading, score, text, tokens),
+            the tokens used and the time taken
+        """
+        started = time.perf_counter()
+        terms = list(dict.fromkeys(tokenize(query)))
+
+        with self._lock:
+            if not self._built:
+                self.build()
+            self._apply_dirty()
+
+            items = []
+            used = 0
+            if terms:
+                scores, _ = self._bm25.score(terms)
+                candidates = np.flatnonzero(scores > 0)
+                # Enough candidates to fill k even when some are skipped for size
+                if len(candidates) > 4 * k:
+                    candidates = candidates[np.argpartition(-scores[candidates], 4 * k)[:4 * k]]
+                ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+                bodies: Dict[str, Optional[str]] = {}
+                for chunk in ranked:
+                    chunk = int(chunk)
+                    item = self._item(chunk, float(scores[chunk]), bodies)
+                    if item is None or used + item["tokens"] > token_budget:
+                        continue
+                    items.append(item)
+                    used += item["tokens"]
+                    if len(items) == k:
+                        break
+
+        return {
+            "items": items,
+            "tokens": used,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def context_for(self, query: str) -> Optional[str]:
+        """
+        Chat context for a message: the retrieved chunks under their note titles
+
+        Uses the retrieval_top_k and retrieval_token_budget settings.
+
+        Returns:
+            Text for the chat system prompt, or None if nothing matched
+        """
+        result = self.retrieve(query, k=settings.retrieval_top_k, token_budget=settings.retrieval_token_budget)
+        if not result["items"]:
+            return None
+        blocks = []
+        for item in result["items"]:
+            source = item["title"] + (f" › {item['heading']}" if item["heading"] else "")
+            blocks.append(f"### {source} ({item['file_path']})\n{item['text']}")
+        return "\n\n".join(blocks)
+
+    def _item(self, chunk: int, score: float, bodies: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        """Chunk text and source; bodies caches note bodies read during one query"""
+        file_path = self._chunk_paths[chunk]
+        if file_path not in bodies:
+            bodies[file_path] = self._read_body(file_path)
+        body = bodies[file_path]
+        if body is None:
+            return None
+        text = body[self._chunk_spans[2 * chunk]:self._chunk_spans[2 * chunk + 1]].strip()
+        summary = self.note_index.get(file_path)
+        return {
+            "file_path": file_path,
+            "title": str(summary.title) if summary else file_path,
+            "heading": self._chunk_headings[chunk],
+            "score": round(score, 4),
+            "text": text,
+            "tokens": estimate_tokens(text)
+        }
+
+    def _read_body(self, file_path: str) -> Optional[str]:
+        summary = self.note_index.get(file_path)
+        if summary is None:
+            return None
+        try:
+            return summary.content
+        except (OSError, ValueError, yaml.YAMLError):
+            return None
+
+    def _read_text(self, file_path: str) -> str:
+        with open(self.note_index.root / file_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _on_note_changed(self, file_path: str) -> None:
+        # Called under the note index lock: only record the path, re-chunk at query time
+        with self._dirty_lock:
+            self._dirty.add(file_path)
+
+    def _apply_dirty(self) -> None:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        with self._lock:
+            for file_path in dirty:
+                self._remove_path(file_path)
+                self._index_path(file_path)
+            if self._bm25.dead > 5000 and self._bm25.dead > len(self._chunk_paths) // 4:
+                self._compact()
+
+    def _index_path(self, file_path: str, chunks: Optional[List[Tuple[str, int, int, Counter]]] = None) -> None:
+        summary = self.note_index.get(file_path)
+        if summary is None:
+            return
+        if chunks is None:
+            try:
+                body = summary.content
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                print(f"Warning: Could not index {file_path} for retrieval: {e}")
+                return
+            chunks = [
+                (heading, start, end, Counter(tokenize(body[start:end])))
+                for heading, start, end in split_sections(body)
+            ]
+
+        title_terms = tokenize(str(summary.title))
+        ids = []
+        for heading, start, end, counts in chunks:
+            for term in title_terms + tokenize(heading):
+                counts[term] += HEADING_WEIGHT
+            ids.append(self._add_chunk(file_path, heading, start, end, counts))
+        if ids:
+            self._path_to_chunks[file_path] = ids
+
+    def _add_chunk(self, file_path: str, heading: str, start: int, end: int, counts: Counter) -> int:
+        chunk = self._bm25.add(counts)
+        self._chunk_paths.append(file_path)
+        self._chunk_headings.append(heading)
+        self._chunk_spans.extend((start, end))
+        return chunk
+
+    def _remove_path(self, file_path: str) -> None:
+        for chunk in self._path_to_chunks.pop(file_path, []):
+            self._chunk_paths[chunk] = None
+            self._chunk_headings[chunk] = None
+            self._bm25.remove(chunk)
+
+    def _compact(self) -> None:
+        """Drop deleted chunks from the postings and renumber the rest"""
+        keep = self._bm25.compact()
+        spans = np.frombuffer(self._chunk_spans, dtype=np.uint32).reshape(-1, 2)[keep]
+        self._chunk_paths = [self._chunk_paths[chunk] for chunk in keep]
+        self._chunk_headings = [self._chunk_headings[chunk] for chunk in keep]
+        self._chunk_spans = array("I", spans.tobytes())
+        self._path_to_chunks = {}
+        for chunk, path in enumerate(self._chunk_paths):
+            self._path_to_chunks.setdefault(path, []).append(chunk)
+
+    def _reset(self) -> None:
+        self._bm25.reset()
+        self._chunk_paths = []
+        self._chunk_headings = []
+        self._chunk_spans = array("I")
+        self._path_to_chunks = {}
+
+
+# Global instance
+retrieval_index = ChunkIndex(obsidian.index, obsidian.scanner)
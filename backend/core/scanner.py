@@ -0,0 +1,177 @@
+"""
+Parallel vault scan engine
+Full-vault passes (cold index build, search index build) read files on a
+thread pool and hand CPU-bound parsing to a process pool in chunks, so the
+per-item pickling cost is amortized and YAML/tokenizing runs on every core
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+
+from .note_reader import NoteSummary, read_note_head, parse_headers, read_full_summary
+
+
+# Below this many files a pass runs in-process; starting worker processes costs more
+MIN_PARALLEL_FILES = 1000
+
+
+class VaultScanner:
+    """Runs read-then-parse passes over many notes with thread and process pools"""
+
+    def __init__(self, workers: int = 0, chunk_size: int = 256, min_parallel: int = MIN_PARALLEL_FILES):
+        """
+        Args:
+            workers: Parser processes (0 for one per CPU); readers use twice as many threads
+            chunk_size: Files per batch sent to a parser process
+            min_parallel: Smallest pass worth starting worker processes for
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.min_parallel = min_parallel
+        self.last_stats: Dict[str, Any] = {}
+
+    def map(
+        self,
+        items: List[str],
+        read: Callable[[str], Any],
+        parse: Callable[[List[Any]], List[Any]],
+        label: str = "files"
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Read every item on a thread and parse the reads in chunks on worker processes
+
+        Args:
+            items: Inputs for read (typically note paths)
+            read: I/O step, run on reader threads
+            parse: CPU step over a list of reads, returning one result per read;
+                must be a picklable module-level function
+            label: What is being scanned, for the progress line
+
+        Yields:
+            (item, result) in input order; result is the exception when read
+            or parse failed for that item
+        """
+        started = time.perf_counter()
+        parallel = self.workers > 1 and len(items) >= self.min_parallel
+        done = 0
+        try:
+            if parallel:
+                for result in self._map_parallel(items, read, parse):
+                    done += 1
+                    yield result
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Warning: Parallel scan failed, continuing in-process: {e}")
+            parallel = False
+
+        if not parallel:
+            for item in items[done:]:
+                try:
+                    raw = read(item)
+                except Exception as e:
+                    yield item, e
+                    continue
+                yield item, parse_each(parse, [raw])[0]
+
+        seconds = time.perf_counter() - started
+        self.last_stats = {
+            "files": len(items),
+            "seconds": round(seconds, 3),
+            "files_per_sec": round(len(items) / seconds, 1) if seconds > 0 else 0.0,
+            "workers": self.workers if parallel else 1
+        }
+        if len(items) >= self.min_parallel:
+            print(
+                f"📚 Scanned {len(items)} {label} in {seconds:.1f}s "
+                f"({self.last_stats['files_per_sec']:.0f} files/sec, {self.last_stats['workers']} workers)"
+            )
+
+    def summaries(self, root: Path, file_paths: List[str]) -> Iterator[Tuple[str, Optional[NoteSummary]]]:
+        """
+        Summarize many notes; same results as note_reader.read_note_summary
+
+        Yields:
+            (file_path, summary) with summary None for unreadable notes
+        """
+        def read(file_path: str) -> Any:
+            return read_note_head(root / file_path)
+
+        for file_path, result in self.map(file_paths, read, parse_headers, label="notes"):
+            path = root / file_path
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                if isinstance(result, str):
+                    raise ValueError(result)
+                if result is None:
+                    # Not a plain YAML header; needs the full python-frontmatter parse
+                    yield file_path, read_full_summary(root, file_path)
+                else:
+                    metadata, preview = result
+                    yield file_path, NoteSummary(root, file_path, metadata, preview)
+            except Exception as e:
+                print(f"Warning: Could not read {path}: {e}")
+                yield file_path, None
+
+    def _map_parallel(
+        self,
+        items: List[str],
+        read: Callable[[str], Any],
+        parse: Callable[[List[Any]], List[Any]]
+    ) -> Iterator[Tuple[str, Any]]:
+        def safe_read(item: str) -> Any:
+            try:
+                return read(item)
+            except Exception as e:
+                return e
+
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        with ThreadPoolExecutor(self.workers * 2, thread_name_prefix="scan-read") as readers, \
+                ProcessPoolExecutor(self.workers, mp_context=context) as parsers:
+            in_flight = deque()
+            for start in range(0, len(items), self.chunk_size):
+                chunk = items[start:start + self.chunk_size]
+                reads = list(readers.map(safe_read, chunk))
+                ok = [raw for raw in reads if not isinstance(raw, Exception)]
+                in_flight.append((chunk, reads, parsers.submit(parse_each, parse, ok)))
+                # Bound the chunks held in memory while parsers catch up
+                if len(in_flight) > self.workers * 2:
+                    yield from self._collect(*in_flight.popleft())
+            while in_flight:
+                yield from self._collect(*in_flight.popleft())
+
+    @staticmethod
+    def _collect(chunk: List[str], reads: List[Any], future) -> Iterator[Tuple[str, Any]]:
+        parsed = iter(future.result())
+        for item, raw in zip(chunk, reads):
+            yield item, raw if isinstance(raw, Exception) else next(parsed)
+
+
+def parse_each(parse: Callable[[List[Any]], List[Any]], raws: List[Any]) -> List[Any]:
+    """
+    Run a parse step so one bad input cannot fail the others; runs in scan worker processes
+
+    The batch is parsed in one call; if that raises, it is parsed again one
+    input at a time to find the inputs that fail.
+
+    Returns:
+        One result per input, a ValueError describing the failure for inputs
+        that raised (the original exception may not survive pickling)
+    """
+    try:
+        return parse(raws)
+    except Exception:
+        pass
+    results = []
+    for raw in raws:
+        try:
+            results.append(parse([raw])[0])
+        except Exception as e:
+            results.append(ValueError(f"{type(e).__name__}: {e}"))
+    return results
@@ -0,0 +1,396 @@
+"""
+Full-text search over the vault
+In-process inverted index over note titles, tags and bodies with BM25
+ranking. Chinese text is tokenized into overlapping character bigrams
+plus single characters, everything else into lowercase words.
+"""
+import html
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+import yaml
+
+from .bm25 import BM25Postings
+from .note_index import NoteIndex
+from .obsidian import obsidian
+from .scanner import VaultScanner
+from .tokenizer import normalize, tokenize, phrase_keys, count_body_terms
+
+
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Field weights: title and tag terms count as if repeated this many times
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 2
+
+SNIPPET_LENGTH = 160
+
+# Bits per key in a note's phrase filter; with two probes about 1.4% of
+# the notes lacking a key still pass it
+PHRASE_FILTER_BITS = 16
+
+# Multiplier deriving the second probe from a key hash (Fibonacci hashing)
+SECOND_PROBE = np.uint64(0x9E3779B97F4A7C15)
+
+
+class SearchIndex:
+    """BM25 inverted index kept in sync with the note metadata index"""
+
+    def __init__(self, note_index: NoteIndex, scanner: VaultScanner):
+        self.note_index = note_index
+        self.scanner = scanner
+
+        self._bm25 = BM25Postings(K1, B)
+        self._doc_paths: List[Optional[str]] = []  # None marks a deleted doc
+        self._doc_meta: List[Optional[Tuple[str, List[str], Any]]] = []  # title, tags, modified
+        self._path_to_doc: Dict[str, int] = {}
+
+        # Per-doc Bloom filters over phrase keys (see phrase_keys), back to back
+        self._phrase_bits = bytearray()
+        self._phrase_offset = array("Q")
+        self._phrase_size = array("I")  # bytes; 0 for a doc without keys
+
+        self._mask_cache: Dict[Tuple, np.ndarray] = {}
+
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        self._built = False
+        self._lock = threading.RLock()
+        note_index.add_listener(self._on_note_changed)
+
+    @property
+    def size(self) -> int:
+        return len(self._path_to_doc)
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Build the index from every note in the vault
+
+        Returns:
+            Dict with document count and build time
+        """
+        started = time.perf_counter()
+        self.note_index.ensure_fresh(parse=False)
+        with self._lock:
+            self._reset()
+            with self._dirty_lock:
+                self._dirty.clear()
+            # Bodies are read and tokenized on the parallel scanner
+            for file_path, body_terms in self.scanner.map(
+                self.note_index.paths(), self._read_text, count_body_terms, label="notes for search"
+            ):
+                if isinstance(body_terms, Exception):
+                    print(f"Warning: Could not index {file_path}: {body_terms}")
+                    continue
+                self._index_path(file_path, body_terms)
+            self._built = True
+        return {"documents": self.size, "seconds": round(time.perf_counter() - started, 3)}
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        folder: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search notes
+
+        Args:
+            query: Free text; "quoted text" must appear verbatim, starting
+                and ending on whole words
+            limit: Maximum number of results
+            folder: Only notes under this folder (relative to vault root)
+            tag: Only notes carrying this tag
+
+        Returns:
+            Dict with ranked items (path, title, score, highlighted snippet),
+            the number of matching notes and the time taken
+        """
+        started = time.perf_counter()
+        phrases = [normalize(p).strip() for p in PHRASE_RE.findall(query)]
+        phrases = [p for p in phrases if p]
+        terms = list(dict.fromkeys(tokenize(query)))
+
+        with self._lock:
+            if not self._built:
+                self.build()
+            self._apply_dirty()
+
+            if not terms:
+                return self._result([], 0, started)
+
+            scores, matched = self._bm25.score(terms)
+
+            # Prefer notes containing every term; fall back to any term
+            candidates = np.flatnonzero(matched == len(terms))
+            if not len(candidates) and not phrases:
+                candidates = np.flatnonzero(matched > 0)
+            if folder or tag:
+                candidates = candidates[self._filter_mask(folder, tag)[candidates]]
+
+            items = []
+            if not phrases:
+                for doc in _ranked(candidates, scores, limit):
+                    doc = int(doc)
+                    items.append(self._item(doc, float(scores[doc]), self._read_body(doc), terms, phrases))
+                return self._result(items, len(candidates), started)
+
+            # Phrases are verified against the note text, best candidates first,
+            # after the phrase filters rule out most notes without reading them.
+            # Verification stops once the page is full, so total is then an upper bound.
+            candidates = candidates[self._may_contain(candidates, phrases)]
+            total = len(candidates)
+            for doc in _ranked(candidates, scores):
+                doc = int(doc)
+                if not self._contains_phrases(doc, phrases):
+                    continue
+                items.append(self._item(doc, float(scores[doc]), self._read_body(doc), terms, phrases))
+                if len(items) == limit:
+                    break
+            else:
+                total = len(items)
+
+            return self._result(items, total, started)
+
+    def _result(self, items: List[Dict[str, Any]], total: int, started: float) -> Dict[str, Any]:
+        return {
+            "items": items,
+            "total": total,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def _filter_mask(self, folder: Optional[str], tag: Optional[str]) -> np.ndarray:
+        """Boolean mask over doc ids for the folder/tag filters, cached until docs change"""
+        key = (folder, tag, len(self._doc_paths), self._bm25.dead)
+        mask = self._mask_cache.get(key)
+        if mask is not None:
+            return mask
+
+        prefix = folder.rstrip("/") + "/" if folder else None
+        tag = tag.lstrip("#") if tag else None
+        mask = np.fromiter(
+            (
+                path is not None
+                and (prefix is None or path.startswith(prefix))
+                and (tag is None or tag in self._doc_meta[doc][1])
+                for doc, path in enumerate(self._doc_paths)
+            ),
+            dtype=bool,
+            count=len(self._doc_paths)
+        )
+        if len(self._mask_cache) >= 32:
+            self._mask_cache.clear()
+        self._mask_cache[key] = mask
+        return mask
+
+    def _item(self, doc: int, score: float, text: Optional[str], terms: List[str], phrases: List[str]) -> Dict[str, Any]:
+        title, tags, modified = self._doc_meta[doc]
+        return {
+            "file_path": self._doc_paths[doc],
+            "title": title,
+            "score": round(score, 4),
+            "snippet": make_snippet(text or "", terms, phrases),
+            "tags": tags,
+            "modified": modified
+        }
+
+    def _may_contain(self, docs: np.ndarray, phrases: List[str]) -> np.ndarray:
+        """Boolean mask over docs, False where a phrase filter rules out a phrase"""
+        hashes = [h for phrase in phrases for h in phrase_keys(phrase)]
+        if not hashes:
+            return np.ones(len(docs), dtype=bool)
+
+        # A doc without keys has no phrase of more than one run or three characters
+        keep = np.frombuffer(self._phrase_size, dtype=np.uint32)[docs] > 0
+        bits = np.frombuffer(self._phrase_bits, dtype=np.uint8)
+        offset = np.frombuffer(self._phrase_offset, dtype=np.uint64)[docs[keep]]
+        size = np.frombuffer(self._phrase_size, dtype=np.uint32)[docs[keep]].astype(np.uint64) * np.uint64(8)
+        passed = np.ones(len(size), dtype=bool)
+        for probe in np.concatenate(_probes(np.array(hashes, dtype=np.uint64))):
+            position = probe % size
+            byte = bits[offset + position // np.uint64(8)]
+            passed &= ((byte >> (position % np.uint64(8)).astype(np.uint8)) & 1).astype(bool)
+        keep[keep] = passed
+        return keep
+
+    def _contains_phrases(self, doc: int, phrases: List[str]) -> bool:
+        try:
+            with open(os.path.join(self.note_index.root, self._doc_paths[doc]), "r", encoding="utf-8") as f:
+                text = normalize(f.read())
+        except (OSError, ValueError):
+            return False
+        return all(p in text for p in phrases)
+
+    def _read_body(self, doc: int) -> Optional[str]:
+        summary = self.note_index.get(self._doc_paths[doc])
+        if summary is None:
+            return None
+        try:
+            return summary.content
+        except (OSError, ValueError, yaml.YAMLError):
+            return None
+
+    def _on_note_changed(self, file_path: str) -> None:
+        # Called under the note index lock: only record the path, re-read at query time
+        with self._dirty_lock:
+            self._dirty.add(file_path)
+
+    def _apply_dirty(self) -> None:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        with self._lock:
+            for file_path in dirty:
+                self._remove_doc(file_path)
+                self._index_path(file_path)
+            if self._bm25.dead > 1000 and self._bm25.dead > len(self._doc_paths) // 4:
+                self._compact()
+
+    def _read_text(self, file_path: str) -> str:
+        with open(self.note_index.root / file_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _index_path(self, file_path: str, body_terms: Optional[Tuple[Counter, List[int]]] = None) -> None:
+        summary = self.note_index.get(file_path)
+        if summary is None:
+            return
+        if body_terms is None:
+            try:
+                content = summary.content
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                print(f"Warning: Could not index {file_path}: {e}")
+                return
+            body_terms = Counter(tokenize(content, chars=True)), phrase_keys(content)
+
+        tags = summary.tags
+        if isinstance(tags, str):
+            tags = [tags]
+        tags = [str(t) for t in (tags or [])]
+
+        counts, keys = body_terms
+        for term in tokenize(str(summary.title), chars=True):
+            counts[term] += TITLE_WEIGHT
+        for term in tokenize(" ".join(tags), chars=True):
+            counts[term] += TAG_WEIGHT
+        keys = set(keys).union(phrase_keys(str(summary.title)), phrase_keys(" ".join(tags)))
+        self._add_doc(file_path, (str(summary.title), tags, summary.modified), counts, keys)
+
+    def _add_doc(self, file_path: str, meta: Tuple[str, List[str], Any], counts: Counter, keys: set) -> None:
+        doc = self._bm25.add(counts)
+        self._doc_paths.append(file_path)
+        self._doc_meta.append(meta)
+        self._path_to_doc[file_path] = doc
+
+        self._phrase_offset.append(len(self._phrase_bits))
+        self._phrase_size.append(PHRASE_FILTER_BITS * len(keys) // 8)
+        if keys:
+            size = np.uint64(PHRASE_FILTER_BITS * len(keys))
+            bits = np.zeros(int(size), dtype=bool)
+            for probe in _probes(np.fromiter(keys, dtype=np.uint64, count=len(keys))):
+                bits[probe % size] = True
+            self._phrase_bits += np.packbits(bits, bitorder="little").tobytes()
+
+    def _remove_doc(self, file_path: str) -> None:
+        doc = self._path_to_doc.pop(file_path, None)
+        if doc is None:
+            return
+        self._doc_paths[doc] = None
+        self._doc_meta[doc] = None
+        self._bm25.remove(doc)
+
+    def _compact(self) -> None:
+        """Drop deleted documents from the postings and renumber the rest"""
+        keep = self._bm25.compact()
+        self._doc_paths = [self._doc_paths[doc] for doc in keep]
+        self._doc_meta = [self._doc_meta[doc] for doc in keep]
+        phrase_bits, self._phrase_bits = self._phrase_bits, bytearray()
+        phrase_offset, self._phrase_offset = self._phrase_offset, array("Q")
+        phrase_size = self._phrase_size
+        self._phrase_size = array("I", (phrase_size[doc] for doc in keep))
+        for doc in keep:
+            self._phrase_offset.append(len(self._phrase_bits))
+            self._phrase_bits += phrase_bits[phrase_offset[doc]:phrase_offset[doc] + phrase_size[doc]]
+        self._path_to_doc = {path: doc for doc, path in enumerate(self._doc_paths)}
+        # Doc ids changed; a cached mask's key can recur for the new numbering
+        self._mask_cache = {}
+
+    def _reset(self) -> None:
+        self._bm25.reset()
+        self._doc_paths = []
+        self._doc_meta = []
+        self._path_to_doc = {}
+        self._phrase_bits = bytearray()
+        self._phrase_offset = array("Q")
+        self._phrase_size = array("I")
+        self._mask_cache = {}
+
+
+def _ranked(docs: np.ndarray, scores: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+    """
+    Docs (ascending ids) by descending score, ties in id order, cut to limit
+
+    Only docs scoring at least the limit-th best score get sorted.
+    """
+    if limit is not None and 0 < limit < len(docs):
+        values = scores[docs]
+        threshold = np.partition(values, len(values) - limit)[len(values) - limit]
+        docs = docs[values >= threshold]
+    return docs[np.argsort(-scores[docs], kind="stable")][:limit]
+
+
+def _probes(hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """The two phrase filter probes of each key hash (uint64 arrays)"""
+    return hashes, (hashes * SECOND_PROBE) >> np.uint64(32)
+
+
+def make_snippet(text: str, terms: List[str], phrases: List[str], length: int = SNIPPET_LENGTH) -> str:
+    """
+    Cut a window of text around the first query hit and wrap hits in <mark>
+
+    Args:
+        text: Note body
+        terms: Query terms (as produced by tokenize)
+        phrases: Normalized quoted phrases from the query
+
+    Returns:
+        HTML-escaped snippet with highlighted matches
+    """
+    needles = sorted({n for n in phrases + terms if n}, key=len, reverse=True)
+    if not text or not needles:
+        return html.escape(text[:length])
+
+    pattern = re.compile("|".join(re.escape(n) for n in needles), re.IGNORECASE)
+    first = pattern.search(text)
+    start = 0 if first is None else max(0, first.start() - length // 4)
+    window = text[start:start + length]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        last = match.end()
+    parts.append(html.escape(window[last:]))
+
+    snippet = "".join(parts).replace("\n", " ").strip()
+    if start > 0:
+        snippet = "…" + snippet
+    if start + length < len(text):
+        snippet += "…"
+    return snippet
+
+
+# Global instance
+search_index = SearchIndex(obsidian.index, obsidian.scanner)
@@ -0,0 +1,202 @@
+"""
+Text tokenization shared by search, retrieval and prompt budgeting
+Chinese text is split into overlapping character bigrams, everything else
+into lowercase words. Kept free of app imports so scan worker processes can
+load it cheaply.
+"""
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+from . import note_codec
+
+
+CJK_RANGES = "㐀-䶿一-鿿豈-﫿"
+TOKEN_RE = re.compile(rf"[{CJK_RANGES}]+|(?:(?![{CJK_RANGES}])[^\W_])+")
+CJK_RE = re.compile(rf"[{CJK_RANGES}]")
+
+
+def normalize(text: str) -> str:
+    """Fold full-width forms and case so queries match regardless of input method"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text: str, chars: bool = False) -> List[str]:
+    """
+    Split text into index terms
+
+    Runs of CJK characters become overlapping bigrams (a lone character
+    stays a unigram); other scripts become lowercase words.
+
+    Args:
+        text: Text to split
+        chars: Also emit every character of longer CJK runs as a unigram,
+            so an index can answer one-character queries from one posting
+    """
+    terms = []
+    for run in TOKEN_RE.findall(normalize(text)):
+        if CJK_RE.match(run):
+            if len(run) == 1:
+                terms.append(run)
+            else:
+                terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+                if chars:
+                    terms.extend(run)
+        else:
+            terms.append(run)
+    return terms
+
+
+def phrase_keys(text: str) -> List[int]:
+    """
+    Hashes of what a phrase needs from the text around it, for phrase prefiltering
+
+    Keys are trigrams of CJK runs (their bigrams are index terms already)
+    and pairs of neighbouring runs, a run being a word or a run of CJK
+    characters: a pair joins the end of a run (the word, or its last
+    character) to the start of the next one (the word, or its first
+    character). Text containing a phrase that starts and ends on whole
+    words has every key of the phrase.
+
+    Returns:
+        CRC-32 of each key, stable across processes
+    """
+    runs = TOKEN_RE.findall(normalize(text))
+    hashes = []
+    for run in runs:
+        if len(run) > 2 and CJK_RE.match(run):
+            encoded = run.encode()  # three bytes per character in CJK_RANGES
+            hashes.extend(zlib.crc32(encoded[i:i + 9]) for i in range(0, len(encoded) - 6, 3))
+    for left, right in zip(runs, runs[1:]):
+        key = f"{left[-1] if CJK_RE.match(left) else left} {right[0] if CJK_RE.match(right) else right}"
+        hashes.append(zlib.crc32(key.encode()))
+    return hashes
+
+
+def count_body_terms(texts: List[str]) -> List[Tuple[Counter, List[int]]]:
+    """
+    Search term counts (CJK characters included) and phrase keys of each
+    note's body (frontmatter stripped); runs in scan worker processes
+
+    Args:
+        texts: Full note texts
+
+    Returns:
+        One (Counter, phrase_keys) tuple per text
+    """
+    result = []
+    for text in texts:
+        body = note_codec.loads(text).content
+        result.append((Counter(tokenize(body, chars=True)), phrase_keys(body)))
+    return result
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough LLM token count without a model tokenizer
+
+    Counts each CJK character as one token and other text at about four
+    characters per token, which errs on the high side for both.
+    """
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+# Markdown ATX heading; the closing #s are optional
+HEADING_RE = re.compile(r"(#{1,6})[ \t]+(.+?)(?:[ \t]+#+)?[ \t]*$")
+FENCE_PREFIXES = ("```", "~~~")
+
+# Target size of a retrieval chunk, in estimate_tokens units
+CHUNK_TOKENS = 400
+
+
+def split_sections(body: str, max_tokens: int = CHUNK_TOKENS) -> List[Tuple[str, int, int]]:
+    """
+    Split a note body into retrieval chunks at Markdown headings
+
+    Headings inside fenced code blocks are ignored. Sections longer than
+    max_tokens are split again at blank lines, and paragraphs that are
+    still too long at a fixed character count.
+
+    Returns:
+        (heading path such as "Plan > Risks", start, end) per chunk, as
+        character offsets into body; whitespace-only chunks are dropped
+    """
+    sections = []
+    stack: List[Tuple[int, str]] = []
+    heading = ""
+    start = pos = 0
+    in_fence = False
+    for line in body.splitlines(keepends=True):
+        if line.lstrip().startswith(FENCE_PREFIXES):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = HEADING_RE.match(line.rstrip("\r\n"))
+            if match:
+                if pos > start:
+                    sections.append((heading, start, pos))
+                level = len(match.group(1))
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, match.group(2).strip()))
+                heading = " > ".join(text for _, text in stack)
+                start = pos
+        pos += len(line)
+    if pos > start:
+        sections.append((heading, start, pos))
+
+    chunks = []
+    for heading, start, end in sections:
+        for chunk_start, chunk_end in _split_long(body, start, end, max_tokens):
+            if body[chunk_start:chunk_end].strip():
+                chunks.append((heading, chunk_start, chunk_end))
+    return chunks
+
+
+def _split_long(body: str, start: int, end: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Split body[start:end] into spans of at most max_tokens, preferring blank lines"""
+    if estimate_tokens(body[start:end]) <= max_tokens:
+        return [(start, end)]
+
+    # Paragraph boundaries: offsets just past each blank-line run
+    cuts = [m.end() for m in re.finditer(r"\n[ \t]*\n+", body[start:end])]
+    spans = []
+    span_start = prev = start
+    for cut in [start + c for c in cuts] + [end]:
+        if estimate_tokens(body[span_start:cut]) > max_tokens and prev > span_start:
+            spans.append((span_start, prev))
+            span_start = prev
+        prev = cut
+    spans.append((span_start, end))
+
+    # A single paragraph can still be too long; CJK text is about one token per character
+    result = []
+    for span_start, span_end in spans:
+        while estimate_tokens(body[span_start:span_end]) > max_tokens:
+            result.append((span_start, span_start + max_tokens))
+            span_start += max_tokens
+        result.append((span_start, span_end))
+    return result
+
+
+def count_chunk_terms(texts: List[str]) -> List[List[Tuple[str, int, int, Counter]]]:
+    """
+    Split each note body into chunks and count their terms; runs in scan worker processes
+
+    Args:
+        texts: Full note texts
+
+    Returns:
+        Per text, (heading, start, end, term counts) per chunk, with offsets
+        into the frontmatter-stripped body
+    """
+    result = []
+    for text in texts:
+        body = note_codec.loads(text).content
+        result.append([
+            (heading, start, end, Counter(tokenize(body[start:end])))
+            for heading, start, end in split_sections(body)
+        ])
+    return result
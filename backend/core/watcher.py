@@ -0,0 +1,437 @@
+"""
+Vault file watcher
+Watches the Obsidian vault (inotify on Linux, stat polling elsewhere),
+debounces and coalesces raw filesystem events and publishes typed
+created/modified/deleted/moved events to subscribers
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+from .config import settings
+
+
+@dataclass
+class VaultEvent:
+    """A coalesced change to a note (or a directory) in the vault"""
+    kind: str  # created, modified, deleted, moved
+    file_path: str  # path relative to vault root (source path for moves)
+    dest_path: Optional[str] = None  # destination for moves
+    is_directory: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# Longest a burst of changes is held back, in debounce windows
+MAX_DEBOUNCE_WINDOWS = 10
+
+EventCallback = Callable[[List[VaultEvent]], None]
+
+
+def _is_watched_dir(name: str) -> bool:
+    # .obsidian, .git, .trash etc. change constantly and hold no live notes
+    return not name.startswith(".")
+
+
+def _is_note(name: str) -> bool:
+    return name.endswith(".md")
+
+
+class InotifyBackend:
+    """Raw change source backed by Linux inotify (via libc, no extra dependencies)"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (
+        IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+        | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    )
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: Dict[int, str] = {}  # wd -> directory path relative to root
+        self._pending_moves: Dict[int, Tuple[str, bool, float]] = {}
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith("linux")
+
+    def start(self) -> None:
+        self._add_tree("")
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def poll(self, timeout: float) -> List[Tuple[str, str, Optional[str], bool]]:
+        """
+        Wait up to timeout seconds for raw events
+
+        Returns:
+            List of (kind, file_path, dest_path, is_directory) tuples
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        events = []
+        if readable:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                data = b""
+            events.extend(self._decode(data))
+
+        # A MOVED_FROM without its MOVED_TO means the file left the vault
+        now = time.monotonic()
+        for cookie, (path, is_dir, seen_at) in list(self._pending_moves.items()):
+            if now - seen_at > 0.5:
+                del self._pending_moves[cookie]
+                events.append(("deleted", path, None, is_dir))
+        return events
+
+    def _decode(self, data: bytes) -> Iterator[Tuple[str, str, Optional[str], bool]]:
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped; ask subscribers to rescan everything
+                yield ("modified", "", None, True)
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name) if directory else name
+            is_dir = bool(mask & self.IN_ISDIR)
+            if is_dir and not _is_watched_dir(name):
+                continue
+            if not is_dir and not _is_note(name):
+                continue
+
+            if mask & self.IN_MOVED_FROM:
+                self._pending_moves[cookie] = (path, is_dir, time.monotonic())
+            elif mask & self.IN_MOVED_TO:
+                source = self._pending_moves.pop(cookie, None)
+                if is_dir:
+                    yield from self._add_tree(path)
+                if source is not None:
+                    yield ("moved", source[0], path, is_dir)
+                else:
+                    yield ("created", path, None, is_dir)
+            elif mask & self.IN_CREATE:
+                if is_dir:
+                    # Files may land in the new directory before its watch exists
+                    yield from self._add_tree(path)
+                yield ("created", path, None, is_dir)
+            elif mask & self.IN_DELETE:
+                yield ("deleted", path, None, is_dir)
+            elif mask & (self.IN_MODIFY | self.IN_CLOSE_WRITE) and not is_dir:
+                yield ("modified", path, None, False)
+
+    def _add_tree(self, directory: str) -> Iterator[Tuple[str, str, Optional[str], bool]]:
+        """Watch directory and its subdirectories; yield notes already inside"""
+        stack = [directory]
+        found = []
+        while stack:
+            current = stack.pop()
+            full = self.root / current
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(full), self.WATCH_MASK)
+            if wd < 0:
+                print(f"Warning: Could not watch {full}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self._watches[wd] = current
+            try:
+                with os.scandir(full) as it:
+                    for entry in it:
+                        rel = os.path.join(current, entry.name) if current else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if _is_watched_dir(entry.name):
+                                stack.append(rel)
+                        elif _is_note(entry.name) and directory:
+                            found.append(("created", rel, None, False))
+            except OSError:
+                continue
+        return iter(found)
+
+
+class PollingBackend:
+    """Raw change source that diffs periodic stat snapshots of the vault"""
+
+    def __init__(self, root: Path, interval: float):
+        self.root = root
+        self.interval = interval
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._next_snapshot_at = 0.0
+
+    def start(self) -> None:
+        self._snapshot = self._take_snapshot()
+        self._next_snapshot_at = time.monotonic() + self.interval
+
+    def close(self) -> None:
+        pass
+
+    def poll(self, timeout: float) -> List[Tuple[str, str, Optional[str], bool]]:
+        wait = self._next_snapshot_at - time.monotonic()
+        if wait > 0:
+            time.sleep(min(timeout, wait))
+            return []
+        self._next_snapshot_at = time.monotonic() + self.interval
+        current = self._take_snapshot()
+        previous, self._snapshot = self._snapshot, current
+
+        deleted = {path: stat for path, stat in previous.items() if path not in current}
+        created = {path: stat for path, stat in current.items() if path not in previous}
+        events = [
+            ("modified", path, None, False)
+            for path, stat in current.items()
+            if path in previous and previous[path] != stat
+        ]
+
+        # A file that vanished and reappeared elsewhere with identical stat was moved
+        by_stat = {stat: path for path, stat in created.items()}
+        for path, stat in deleted.items():
+            dest = by_stat.pop(stat, None)
+            if dest is not None:
+                del created[dest]
+                events.append(("moved", path, dest, False))
+            else:
+                events.append(("deleted", path, None, False))
+        events.extend(("created", path, None, False) for path in created)
+        return events
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        root_len = len(str(self.root)) + 1
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if _is_watched_dir(entry.name):
+                                stack.append(entry.path)
+                        elif _is_note(entry.name):
+                            try:
+                                st = entry.stat()
+                            except OSError:
+                                continue
+                            snapshot[entry.path[root_len:]] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return snapshot
+
+
+class VaultWatcher:
+    """Debounces raw vault changes and publishes coalesced VaultEvents"""
+
+    def __init__(
+        self,
+        root: Path,
+        backend: str = "auto",
+        debounce: float = 0.5,
+        poll_interval: float = 2.0
+    ):
+        """
+        Args:
+            root: Vault root directory
+            backend: "inotify", "polling", "auto" (inotify when available) or "off"
+            debounce: Quiet period in seconds before pending events are published
+            poll_interval: Seconds between snapshots for the polling backend
+        """
+        self.root = root
+        self.backend_name = backend
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self._backend = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._subscribers: List[EventCallback] = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, callback: EventCallback) -> None:
+        """Register a callback receiving batches of events on the watcher thread"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: EventCallback) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def subscribe_queue(self, loop: asyncio.AbstractEventLoop, maxsize: int = 1000) -> Tuple[asyncio.Queue, EventCallback]:
+        """
+        Get an asyncio queue fed with events, for streaming endpoints
+
+        Events are dropped for a consumer whose queue is full rather than
+        blocking the watcher thread.
+
+        Returns:
+            (queue, callback); pass the callback to unsubscribe when done
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+        def put(events: List[VaultEvent]) -> None:
+            for event in events:
+                if queue.full():
+                    break
+                queue.put_nowait(event)
+
+        def callback(events: List[VaultEvent]) -> None:
+            loop.call_soon_threadsafe(put, events)
+
+        self.subscribe(callback)
+        return queue, callback
+
+    def start(self) -> bool:
+        """
+        Start watching in a background thread
+
+        Returns:
+            True if a backend was started
+        """
+        if self.running or self.backend_name == "off":
+            return self.running
+
+        self._backend = None
+        if self.backend_name in ("auto", "inotify") and InotifyBackend.available():
+            try:
+                self._backend = InotifyBackend(self.root)
+                self._backend.start()
+            except OSError as e:
+                print(f"Warning: inotify unavailable ({e}), falling back to polling")
+                self._backend = None
+        if self._backend is None:
+            self._backend = PollingBackend(self.root, self.poll_interval)
+            self._backend.start()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vault-watcher", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def _run(self) -> None:
+        pending: Dict[str, VaultEvent] = {}
+        first_event_at = last_event_at = 0.0
+        while not self._stop.is_set():
+            try:
+                raw = self._backend.poll(self.debounce / 2)
+            except Exception as e:
+                print(f"Warning: Vault watcher error: {e}")
+                time.sleep(self.poll_interval)
+                continue
+
+            for kind, path, dest, is_dir in raw:
+                if not pending:
+                    first_event_at = time.monotonic()
+                self._coalesce(pending, VaultEvent(kind, path, dest, is_dir))
+                last_event_at = time.monotonic()
+
+            # Publish once the vault has been quiet for the debounce window,
+            # or after a few windows of continuous activity (e.g. a sync burst)
+            now = time.monotonic()
+            if pending and (
+                now - last_event_at >= self.debounce
+                or now - first_event_at >= self.debounce * MAX_DEBOUNCE_WINDOWS
+            ):
+                events = list(pending.values())
+                pending.clear()
+                self._publish(events)
+
+    def _publish(self, events: List[VaultEvent]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(events)
+            except Exception as e:
+                print(f"Warning: Vault event subscriber failed: {e}")
+
+    @staticmethod
+    def _coalesce(pending: Dict[str, VaultEvent], event: VaultEvent) -> None:
+        """Merge event into pending (keyed by the path each event leaves behind)"""
+        path = event.file_path
+        previous = pending.get(path)
+
+        if event.kind == "created":
+            if previous is not None and previous.kind == "moved":
+                return  # moved onto an existing path; the move already re-reads it
+            if previous is not None and previous.kind == "deleted":
+                event.kind = "modified"
+            pending[path] = event
+        elif event.kind == "modified":
+            if previous is None or previous.kind == "deleted":
+                pending[path] = event
+        elif event.kind == "deleted":
+            if previous is not None and previous.kind == "created":
+                del pending[path]
+            elif previous is not None and previous.kind == "moved":
+                # The note was moved and then deleted: the original path is gone
+                del pending[path]
+                pending[previous.file_path] = VaultEvent(
+                    "deleted", previous.file_path, is_directory=previous.is_directory
+                )
+            else:
+                pending[path] = event
+        elif event.kind == "moved":
+            source = pending.pop(path, None)
+            dest = event.dest_path
+            if source is not None and source.kind == "created":
+                pending[dest] = VaultEvent("created", dest, is_directory=event.is_directory)
+            elif source is not None and source.kind == "moved":
+                pending[dest] = VaultEvent("moved", source.file_path, dest, event.is_directory)
+            else:
+                pending[dest] = event
+
+
+# Global instance
+vault_watcher = VaultWatcher(
+    root=settings.full_vault_path,
+    backend=settings.watcher_backend,
+    debounce=settings.watcher_debounce,
+    poll_interval=settings.watcher_poll_interval
+)
@@ -2,23 +2,38 @@
 FastAPI Main Application
 Knowledge Management API Server
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime, date, timedelta
 from typing import Optional, List
+import asyncio
+import json
 import os
-import tempfile
+import threading
 
 # Import core modules
 from core.config import settings
 from core.obsidian import obsidian
 from core.ai_processor import ai_processor
+from core.watcher import vault_watcher
+from core.search import search_index
+from core.retrieval import retrieval_index
+from core.related import related_index, MAX_NEIGHBORS
+from core.dashboard import dashboard_store
+from core.executor import run_in_vault, vault_executor
+from core.capture import capture_queue, prepare_capture
+from core.audio import spool_upload, UploadTooLarge
+from core.note_reader import NoteSummary
 from api.models.schemas import (
     CaptureRequest, CaptureResponse,
+    BatchCaptureRequest, BatchCaptureResponse, BatchCaptureItem,
+    DailyLogEntryRequest,
     ChatRequest, ChatResponse,
     TimelineResponse, NoteItem,
-    DashboardResponse, DashboardStats, ProjectSummary, ArticleSummary
+    DashboardResponse,
+    SearchResponse, SearchResult
 )
 
 
@@ -51,10 +66,16 @@ async def root():
         "vault": str(settings.full_vault_path),
         "endpoints": {
             "capture": "/api/capture",
+            "capture_batch": "/api/capture/batch",
+            "capture_queue": "/api/capture/queue",
             "chat": "/api/chat",
+            "chat_stream": "/api/chat/stream",
             "timeline": "/api/timeline",
+            "search": "/api/search",
+            "retrieve": "/api/retrieve",
             "dashboard": "/api/dashboard",
             "voice": "/api/voice",
+            "events": "/api/events",
             "docs": "/docs"
         }
     }
@@ -71,7 +92,7 @@ async def health_check():
 
 
 @app.post("/api/capture", response_model=CaptureResponse)
-async def capture_input(request: CaptureRequest):
+async def capture_input(request: CaptureRequest, queued: Optional[bool] = None):
     """
     Capture user input (text or voice) and save to appropriate location
 
@@ -80,53 +101,37 @@ async def capture_input(request: CaptureRequest):
     2. Determines the best storage location
     3. Creates a properly formatted note
     4. Returns confirmation with file location
+
+    In queued mode (CAPTURE_MODE=queued, or ?queued=true) the raw input is
+    written to the inbox and the call returns at once with a capture_id;
+    classification and filing happen in the background (see
+    /api/capture/{capture_id}).
     """
-    try:
-        # Classify the input using AI
-        classification = ai_processor.classify_input(
-            content=request.content,
-            context={"timestamp": datetime.now().isoformat()}
+    if queued is None:
+        queued = settings.capture_mode == "queued"
+    if queued:
+        try:
+            job = await capture_queue.submit(request.content, request.input_type, request.metadata)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return CaptureResponse(
+            success=True,
+            message="📥 已保存到收件箱，正在分类",
+            file_path=job["file_path"],
+            capture_id=job["id"],
+            status=job["status"]
         )
 
-        if not classification.get("success"):
-            # Fallback if AI classification fails
-            classification = {
-                "category": "note",
-                "title": request.content[:50],
-                "target_folder": settings.ideas_path,
-                "suggested_tags": []
-            }
-
-        # Determine target folder based on category
-        category = classification.get("category", "note")
-        folder_map = {
-            "work_log": settings.daily_logs_path,
-            "idea": settings.ideas_path,
-            "task": settings.tasks_path,
-            "project_update": settings.projects_path,
-            "article": settings.writing_path,
-        }
-
-        target_folder = folder_map.get(category, settings.ideas_path)
-
-        # Prepare metadata
-        metadata = {
-            "type": category,
-            "tags": classification.get("suggested_tags", []),
-            "ai_confidence": classification.get("confidence", 0),
-            "input_type": request.input_type
-        }
+    try:
+        # Classify the input using AI
+        classification = await ai_processor.classify_capture(request.content)
 
-        if request.metadata:
-            metadata.update(request.metadata)
+        category, classification, note = prepare_capture(
+            request.content, classification, request.input_type, request.metadata
+        )
 
         # Create the note
-        result = obsidian.create_note(
-            content=request.content,
-            title=classification.get("title", request.content[:50]),
-            folder=target_folder,
-            metadata=metadata
-        )
+        result = await run_in_vault(obsidian.create_note, **note)
 
         return CaptureResponse(
             success=True,
@@ -139,6 +144,78 @@ async def capture_input(request: CaptureRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/capture/batch", response_model=BatchCaptureResponse)
+async def capture_batch(request: BatchCaptureRequest):
+    """
+    Capture many inputs at once, e.g. an imported backlog of messages
+
+    Items are classified together in as few model calls as possible and
+    written with bounded parallelism. One item failing does not fail the
+    batch; each item reports its own result or error.
+    """
+    if len(request.items) > settings.capture_batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.capture_batch_max_items} items per batch"
+        )
+
+    try:
+        classifications = await ai_processor.classify_batch([item.content for item in request.items])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    writes = asyncio.Semaphore(settings.capture_write_concurrency)
+
+    async def save(index: int, item: CaptureRequest, classification: dict) -> BatchCaptureItem:
+        try:
+            _, classification, note = prepare_capture(
+                item.content, classification, item.input_type, item.metadata
+            )
+            async with writes:
+                # Items of one batch often share a title; never let them overwrite each other
+                result = await run_in_vault(obsidian.create_note, **note, unique=True)
+            return BatchCaptureItem(
+                index=index,
+                success=True,
+                file_path=result["file_path"],
+                classification=classification
+            )
+        except Exception as e:
+            return BatchCaptureItem(index=index, success=False, classification=classification, error=str(e))
+
+    items = await asyncio.gather(*(
+        save(i, item, classification)
+        for i, (item, classification) in enumerate(zip(request.items, classifications))
+    ))
+    succeeded = sum(1 for item in items if item.success)
+    return BatchCaptureResponse(
+        total=len(items),
+        succeeded=succeeded,
+        failed=len(items) - succeeded,
+        items=items
+    )
+
+
+@app.get("/api/capture/queue")
+async def get_capture_queue():
+    """Queued capture stats: queue depth, retries and captures by status"""
+    return capture_queue.stats()
+
+
+@app.get("/api/capture/{capture_id}")
+async def get_capture_status(capture_id: str):
+    """
+    Status of a queued capture
+
+    status is pending, processing, retrying, filed or failed; file_path is
+    where the note currently lives (the inbox until it is filed).
+    """
+    job = capture_queue.status(capture_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown capture: {capture_id}")
+    return job
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_with_vault(request: ChatRequest):
     """
@@ -150,23 +227,10 @@ async def chat_with_vault(request: ChatRequest):
     - Provide insights and suggestions
     """
     try:
-        # Convert Pydantic models to dict for AI processor
-        history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.conversation_history
-        ]
-
-        # Get vault context if requested
-        vault_context = None
-        if request.include_context:
-            # Get recent notes for context
-            recent_notes = obsidian.list_notes(limit=10)
-            vault_context = "最近的笔记:\n" + "\n".join([
-                f"- {note['title']}" for note in recent_notes[:5]
-            ])
+        history, vault_context = await chat_inputs(request)
 
         # Generate response
-        response_text = ai_processor.chat_response(
+        response_text = await ai_processor.chat_response(
             message=request.message,
             conversation_history=history,
             vault_context=vault_context
@@ -181,135 +245,289 @@ async def chat_with_vault(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: Request, chat: ChatRequest):
+    """
+    Streaming variant of /api/chat over Server-Sent Events
+
+    Sends a token event per content delta as the model generates it, then
+    a done event with finish_reason, token usage, ttft_ms (time to first
+    token) and duration_ms, or an error event. When the client disconnects
+    the upstream model request is closed.
+    """
+    try:
+        history, vault_context = await chat_inputs(chat)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def event_stream():
+        events = ai_processor.chat_stream(chat.message, history, vault_context)
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                data = json.dumps({k: v for k, v in event.items() if k != "type"}, ensure_ascii=False)
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def chat_inputs(request: ChatRequest) -> tuple:
+    """Conversation history as plain dicts and, if requested, retrieved vault context"""
+    # Convert Pydantic models to dict for AI processor
+    history = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.conversation_history
+    ]
+
+    # Get vault context if requested: the note passages most relevant to the message
+    vault_context = None
+    if request.include_context:
+        vault_context = await run_in_vault(retrieval_index.context_for, request.message)
+    return history, vault_context
+
+
+# Rolling windows, in days including today, for the timeline's filter shortcut
+TIME_FILTER_DAYS = {"today": 1, "week": 7, "month": 30}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Split a listing's fields= query value into note summary fields
+
+    Args:
+        fields: Comma-separated names from NoteSummary.FIELDS (None for all)
+
+    Returns:
+        The names in order without repeats, or None for all fields
+
+    Raises:
+        HTTPException: 400 for an empty selection or unknown names
+    """
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in NoteSummary.FIELDS]
+    if not names or unknown:
+        problem = f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields given"
+        raise HTTPException(
+            status_code=400, detail=f"{problem}; choose from {', '.join(NoteSummary.FIELDS)}"
+        )
+    return names
+
+
 @app.get("/api/timeline", response_model=TimelineResponse)
 async def get_timeline(
     folder: Optional[str] = None,
     limit: int = 50,
-    filter: Optional[str] = None
+    filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    date_field: str = "created",
+    fields: Optional[str] = None
 ):
     """
-    Get timeline of notes
+    Get timeline of notes, newest first
 
     Args:
         folder: Filter by folder (optional)
         limit: Maximum number of items
         filter: Time filter: today, week, month (optional)
+        cursor: next_cursor from the previous page (optional)
+        from: First day to include, YYYY-MM-DD (optional)
+        to: Last day to include, YYYY-MM-DD (optional)
+        date_field: Frontmatter date the range applies to: created or modified
+        fields: Comma-separated item fields to return, e.g. file_path,title,modified
+            (optional, all by default)
     """
+    if filter is not None and filter not in TIME_FILTER_DAYS:
+        raise HTTPException(status_code=400, detail=f"Unknown filter: {filter}")
+    if date_field not in ("created", "modified"):
+        raise HTTPException(status_code=400, detail=f"Unknown date_field: {date_field}")
+    selected = parse_fields(fields)
+
+    if filter is not None:
+        today = date.today()
+        from_date = from_date or today - timedelta(days=TIME_FILTER_DAYS[filter] - 1)
+        to_date = to_date or today
+
     try:
-        # Apply time filter if specified
-        if filter == "today":
-            # Only get today's notes
-            today = datetime.now().strftime("%Y-%m-%d")
-            notes = obsidian.list_notes(folder=folder, limit=limit * 2)
-            notes = [n for n in notes if n.get("created", "").startswith(today)]
+        if from_date is None and to_date is None:
+            notes, next_cursor = await run_in_vault(
+                obsidian.list_notes_page, folder=folder, limit=limit, cursor=cursor, fields=selected
+            )
         else:
-            notes = obsidian.list_notes(folder=folder, limit=limit)
+            # Exact range from the date-bucketed index, dated and ordered by date_field
+            notes, next_cursor = await run_in_vault(
+                obsidian.list_notes_page, folder=folder, limit=limit, cursor=cursor,
+                sort_by=date_field, start=from_date, end=to_date, fields=selected
+            )
+
+        if selected is not None:
+            # Partial items do not fit NoteItem, so they skip the response model
+            return JSONResponse(jsonable_encoder({
+                "items": notes,
+                "total": len(notes),
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor
+            }))
 
         # Convert to response model
-        items = [NoteItem(**note) for note in notes[:limit]]
+        items = [NoteItem(**note) for note in notes]
 
         return TimelineResponse(
             items=items,
             total=len(items),
-            has_more=len(notes) > limit
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/dashboard", response_model=DashboardResponse)
-async def get_dashboard():
+@app.get("/api/search", response_model=SearchResponse)
+async def search_notes(
+    q: str,
+    folder: Optional[str] = None,
+    tag: Optional[str] = None,
+    limit: int = 20
+):
     """
-    Get dashboard data including stats, active projects, and recent items
+    Full-text search over note titles, tags and bodies
+
+    Args:
+        q: Query text; wrap text in double quotes to require an exact phrase
+        folder: Only search notes under this folder (optional)
+        tag: Only search notes with this tag (optional)
+        limit: Maximum number of results
     """
     try:
-        # Get today's statistics
-        today = datetime.now().strftime("%Y-%m-%d")
-        today_notes = obsidian.list_notes(limit=1000)
-        today_entries = [n for n in today_notes if n.get("created", "").startswith(today)]
-
-        # Get week statistics
-        week_entries = today_notes[:50]  # Simplified
-
-        # Get active projects
-        projects_notes = obsidian.list_notes(folder=settings.projects_path, limit=20)
-        active_projects = []
-        for note in projects_notes:
-            if note.get("metadata", {}).get("status") != "completed":
-                active_projects.append(ProjectSummary(
-                    name=note["title"],
-                    status=note.get("metadata", {}).get("status", "active"),
-                    progress=note.get("metadata", {}).get("progress", 0),
-                    last_update=note.get("modified"),
-                    folder_path=note["file_path"]
-                ))
-
-        # Get active writing
-        writing_notes = obsidian.list_notes(folder=settings.writing_path, limit=10)
-        active_articles = []
-        for note in writing_notes:
-            active_articles.append(ArticleSummary(
-                title=note["title"],
-                word_count=len(note.get("preview", "")),
-                status=note.get("metadata", {}).get("status", "draft"),
-                last_update=note.get("modified"),
-                folder_path=note["file_path"]
-            ))
-
-        # Get today's daily log
-        daily_log = obsidian.get_daily_log()
-
-        # Compile statistics
-        stats = DashboardStats(
-            today_entries=len(today_entries),
-            today_work_time=0.0,  # TODO: Calculate from logs
-            active_projects=len(active_projects),
-            active_articles=len(active_articles),
-            week_entries=len(week_entries)
+        result = await run_in_vault(search_index.search, q, limit=limit, folder=folder, tag=tag)
+        return SearchResponse(
+            query=q,
+            items=[SearchResult(**jsonable_encoder(item)) for item in result["items"]],
+            total=result["total"],
+            took_ms=result["took_ms"]
         )
 
-        # Recent items
-        recent_items = [NoteItem(**note) for note in today_notes[:10]]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-        return DashboardResponse(
-            stats=stats,
-            daily_log=daily_log,
-            active_projects=active_projects[:5],
-            active_articles=active_articles[:5],
-            recent_items=recent_items
+@app.get("/api/retrieve")
+async def retrieve_context(q: str, k: Optional[int] = None, budget: Optional[int] = None):
+    """
+    Note passages the chat would receive as context for a message
+
+    Args:
+        q: Message text
+        k: Maximum number of chunks (default: RETRIEVAL_TOP_K)
+        budget: Token budget for the chunks (default: RETRIEVAL_TOKEN_BUDGET)
+    """
+    try:
+        return await run_in_vault(
+            retrieval_index.retrieve,
+            q,
+            k=k or settings.retrieval_top_k,
+            token_budget=budget or settings.retrieval_token_budget
         )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/notes/{file_path:path}/related")
+async def get_related_notes(file_path: str, k: int = Query(10, ge=1, le=MAX_NEIGHBORS)):
+    """
+    Notes most similar to a note, by estimated Jaccard similarity of their terms
+
+    Args:
+        file_path: Note path relative to vault root
+        k: Number of related notes
+    """
+    try:
+        result = await run_in_vault(related_index.related, file_path, k=k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Note not found: {file_path}")
+    return {"file_path": file_path, **jsonable_encoder(result)}
+
+
+@app.get("/api/dashboard", response_model=DashboardResponse)
+async def get_dashboard(fast: bool = False):
+    """
+    Get dashboard data including stats, active projects, and recent items
+
+    Served from incrementally maintained aggregates. With fast=true the last
+    snapshot is returned as is; snapshot_age tells how old it is.
+    """
+    try:
+        snapshot, age = await run_in_vault(dashboard_store.snapshot, fast=fast)
+        return DashboardResponse(**snapshot, snapshot_age=round(age, 3))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/daily-log/entries")
+async def append_daily_log(request: DailyLogEntryRequest):
+    """
+    Append a timestamped entry to today's daily log
+
+    Goes to the end of the work log section (or the given heading) without
+    rewriting the rest of the log; concurrent appends are serialized.
+    """
+    try:
+        section = {"section": request.section} if request.section else {}
+        return await run_in_vault(obsidian.append_daily_log, request.content, **section)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/voice")
 async def transcribe_voice(audio: UploadFile = File(...)):
     """
     Transcribe voice input to text using Whisper API
 
-    Accepts audio file and returns transcribed text
+    Accepts audio file and returns transcribed text. The upload is copied
+    to disk in chunks and rejected past the voice_max_upload_bytes setting.
     """
+    suffix = os.path.splitext(audio.filename or "")[1] or ".webm"
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as temp_file:
-            content = await audio.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
+        temp_path, audio_hash = await run_in_vault(
+            spool_upload, audio.file, settings.voice_max_upload_bytes, suffix
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
+    try:
         # Transcribe using Whisper
-        result = ai_processor.transcribe_audio(temp_path)
-
-        # Clean up temp file
-        os.unlink(temp_path)
+        try:
+            # Retried uploads of the same recording are answered from the cache
+            # or share the transcription already running
+            result = await ai_processor.transcribe_audio(temp_path, audio_hash)
+        finally:
+            # Clean up temp file
+            await run_in_vault(os.unlink, temp_path)
 
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
 
         return {
             "success": True,
-            "text": result["text"]
+            "text": result["text"],
+            "segments": result["segments"],
+            "cached": result["cached"]
         }
 
     except Exception as e:
@@ -317,25 +535,102 @@ async def transcribe_voice(audio: UploadFile = File(...)):
 
 
 @app.get("/api/projects")
-async def get_active_projects():
-    """Get list of active projects"""
+async def get_active_projects(fields: Optional[str] = None):
+    """
+    Get list of active projects
+
+    Args:
+        fields: Comma-separated fields to return per project (optional, all by default)
+    """
+    selected = parse_fields(fields)
     try:
-        projects = obsidian.list_notes(folder=settings.projects_path, limit=50)
+        projects = await run_in_vault(
+            obsidian.list_notes, folder=settings.projects_path, limit=50, fields=selected
+        )
         return {"projects": projects}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/articles")
-async def get_active_articles():
-    """Get list of articles in progress"""
+async def get_active_articles(fields: Optional[str] = None):
+    """
+    Get list of articles in progress
+
+    Args:
+        fields: Comma-separated fields to return per article (optional, all by default)
+    """
+    selected = parse_fields(fields)
     try:
-        articles = obsidian.list_notes(folder=settings.writing_path, limit=50)
+        articles = await run_in_vault(
+            obsidian.list_notes, folder=settings.writing_path, limit=50, fields=selected
+        )
         return {"articles": articles}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/events")
+async def stream_vault_events(request: Request):
+    """
+    Stream vault changes as Server-Sent Events
+
+    Each event is named after its kind (created, modified, deleted, moved)
+    and carries the change plus, for notes that still exist, the note
+    summary in the same shape as timeline items.
+    """
+    queue, callback = vault_watcher.subscribe_queue(asyncio.get_running_loop())
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                payload = event.to_dict()
+                if event.kind != "deleted" and not event.is_directory:
+                    note = await run_in_vault(obsidian.index.get, event.dest_path or event.file_path)
+                    payload["note"] = note.to_dict() if note else None
+                data = json.dumps(jsonable_encoder(payload), ensure_ascii=False)
+                yield f"event: {event.kind}\ndata: {data}\n\n"
+        finally:
+            vault_watcher.unsubscribe(callback)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the model result caches and local classification"""
+    return {
+        "classification": ai_processor.classification_cache.stats(),
+        "history_summary": ai_processor.history_summary_cache.stats(),
+        "transcripts": {
+            **ai_processor.transcript_cache.stats(),
+            "deduplicated": ai_processor.transcripts_deduplicated
+        },
+        "capture_routes": ai_processor.capture_routes
+    }
+
+
+@app.post("/api/index/rebuild")
+async def rebuild_index():
+    """Force a full rebuild of the note metadata index"""
+    try:
+        stats = await run_in_vault(obsidian.rebuild_index)
+        return {"success": True, **stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
@@ -353,6 +648,15 @@ async def internal_error_handler(request, exc):
     )
 
 
+def warm_caches():
+    """Bring the note index, search, retrieval and related-notes indexes and dashboard aggregates up to date"""
+    obsidian.warm_index()
+    search_index.build()
+    retrieval_index.build()
+    related_index.build()
+    dashboard_store.build()
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -366,6 +670,29 @@ async def startup_event():
     print(f"📚 API Docs: http://{settings.host}:{settings.port}/docs")
     print("=" * 60 + "\n")
 
+    # File captures queued before a restart, and any queued from now on
+    pending = await capture_queue.start()
+    if pending:
+        print(f"📥 Resuming {pending} queued captures")
+
+    # Watch the vault for external edits (Obsidian, iCloud sync, scripts)
+    if vault_watcher.start():
+        obsidian.attach_watcher(vault_watcher)
+
+    # Parse and index the vault in the background; requests are served lazily meanwhile
+    threading.Thread(target=warm_caches, daemon=True).start()
+
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Run on application shutdown"""
+    vault_watcher.stop()
+    await capture_queue.stop()
+    vault_executor.shutdown(wait=True)
+    await ai_processor.gateway.close()
+    obsidian.index.save()
+
 
 if __name__ == "__main__":
     import uvicorn
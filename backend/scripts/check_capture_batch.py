@@ -0,0 +1,115 @@
+"""
+Compare /api/capture/batch with one /api/capture call per item
+
+Runs the app against the local OpenAI stub (scripts/stub_openai_server.py)
+with a fresh vault and cache, the local classifier off so every item needs
+the model, and a fixed model latency. Single captures are all sent at once,
+so both paths get the same gateway concurrency and rate limit.
+
+Usage (from backend/):
+    python scripts/check_capture_batch.py [--items 500] [--single-items 100]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+MODEL_LATENCY = 0.3
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+port = free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="batch-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="batch-cache-")
+os.environ["LOCAL_CLASSIFIER_ENABLED"] = "false"
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "600")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from stub_openai_server import app as stub_app, state  # noqa: E402
+from main import app  # noqa: E402
+from core.ai_processor import ai_processor  # noqa: E402
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def message(run: str, i: int) -> str:
+    return f"{run} imported message {i}: 想到一个关于知识管理的点子，把每天的输入整理成卡片 #{i}"
+
+
+async def main(items: int, single_items: int) -> int:
+    state.delay = MODEL_LATENCY
+    async with httpx.AsyncClient(app=app, base_url="http://backend", timeout=None) as client:
+        requests_before = state.requests
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/api/capture", json={"content": message("single", i)}) for i in range(single_items)
+        ))
+        single_took = time.perf_counter() - started
+        single_ok = sum(1 for r in responses if r.status_code == 200)
+        single_calls = state.requests - requests_before
+
+        requests_before = state.requests
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/capture/batch",
+            json={"items": [{"content": message("batch", i)} for i in range(items)]}
+        )
+        batch_took = time.perf_counter() - started
+        batch_calls = state.requests - requests_before
+        body = response.json()
+
+    await ai_processor.gateway.close()
+
+    single_rate = single_ok / single_took
+    batch_rate = body["succeeded"] / batch_took
+    vault = Path(os.environ["OBSIDIAN_VAULT_PATH"])
+    # Batch items must never overwrite each other, even with identical titles
+    written = len({item["file_path"] for item in body["items"] if (vault / item["file_path"]).exists()})
+    print(f"single: {single_ok}/{single_items} items in {single_took:.1f}s with {single_calls} model calls "
+          f"({single_rate:.1f} items/s)")
+    print(f"batch:  {body['succeeded']}/{items} items in {batch_took:.1f}s with {batch_calls} model calls "
+          f"({batch_rate:.1f} items/s), {body['failed']} failed")
+    print(f"speedup {batch_rate / single_rate:.1f}x, {written} distinct batch notes on disk")
+
+    failed = (
+        body["failed"] > 0
+        or single_ok != single_items
+        or written != items
+        or batch_rate < 10 * single_rate
+    )
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=500, help="items in the batch")
+    parser.add_argument("--single-items", type=int, default=100, help="items captured one call each")
+    args = parser.parse_args()
+
+    server = start_stub()
+    code = asyncio.run(main(args.items, args.single_items))
+    server.should_exit = True
+    sys.exit(code)
@@ -0,0 +1,133 @@
+"""
+Exercise write-first (queued) capture against the local OpenAI stub
+
+Checks that:
+- a queued capture returns well before the model answers, with the note in the inbox
+- the background worker files it into the category folder with patched frontmatter
+- a capture whose classification keeps failing is retried, then left in the inbox as failed
+- captures still queued at shutdown are resumed from the journal by a new queue
+
+Usage (from backend/):
+    python scripts/check_capture_queue.py
+"""
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+MODEL_LATENCY = 1.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+port = free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="queue-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="queue-cache-")
+os.environ["LOCAL_CLASSIFIER_ENABLED"] = "false"
+os.environ["CAPTURE_MODE"] = "queued"
+os.environ["CAPTURE_QUEUE_MAX_ATTEMPTS"] = "3"
+os.environ["CAPTURE_QUEUE_RETRY_DELAY"] = "0.1"
+os.environ["LLM_MAX_RETRIES"] = "0"
+
+import frontmatter  # noqa: E402
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from stub_openai_server import app as stub_app, state  # noqa: E402
+from main import app  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.obsidian import obsidian  # noqa: E402
+from core.ai_processor import ai_processor  # noqa: E402
+from core.capture import CaptureQueue, capture_queue  # noqa: E402
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def wait_for(queue: CaptureQueue, capture_id: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.status(capture_id)
+        if job["status"] in ("filed", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    return queue.status(capture_id)
+
+
+async def main() -> int:
+    failed = False
+    vault = settings.full_vault_path
+    await capture_queue.start()
+
+    async with httpx.AsyncClient(app=app, base_url="http://backend", timeout=None) as client:
+        state.delay, state.fail_rate = MODEL_LATENCY, 0.0
+        started = time.perf_counter()
+        body = (await client.post("/api/capture", json={"content": "想到一个点子\n把输入整理成卡片"})).json()
+        took = time.perf_counter() - started
+        in_inbox = body["file_path"].startswith(settings.inbox_path) and (vault / body["file_path"]).exists()
+        print(f"queued capture answered in {took * 1000:.0f}ms (model takes {MODEL_LATENCY:.0f}s), "
+              f"status {body['status']}, in inbox: {in_inbox}")
+        failed |= took > MODEL_LATENCY / 2 or not in_inbox
+
+        job = await wait_for(capture_queue, body["capture_id"])
+        note = frontmatter.load(vault / job["file_path"]) if job["status"] == "filed" else None
+        print(f"filed: {job['status']} -> {job['file_path']} ({job['category']}), "
+              f"inbox note removed: {not (vault / body['file_path']).exists()}")
+        failed |= (
+            note is None
+            or not job["file_path"].startswith(settings.ideas_path)
+            or note["capture_status"] != "filed"
+            or note["type"] != "idea"
+            or (vault / body["file_path"]).exists()
+        )
+
+        state.delay, state.fail_rate = 0.0, 1.0
+        body = (await client.post("/api/capture", json={"content": "model is down"})).json()
+        job = await wait_for(capture_queue, body["capture_id"])
+        note = frontmatter.load(vault / job["file_path"])
+        print(f"model down: {job['status']} after {job['attempts']} attempts, still in inbox "
+              f"({note['capture_status']}): {job['error'][:60]!r}")
+        failed |= job["status"] != "failed" or job["attempts"] != 3 or note["capture_status"] != "failed"
+
+        stats = (await client.get("/api/capture/queue")).json()
+        print(f"queue stats: {stats}")
+        failed |= stats["depth"] != 0 or stats["filed"] != 1 or stats["failed"] != 1
+
+    # Shut down with a capture still waiting for the model, then resume it from the journal
+    state.delay, state.fail_rate = MODEL_LATENCY, 0.0
+    job = await capture_queue.submit("resume me after a restart")
+    await capture_queue.stop()
+    resumed = CaptureQueue(obsidian, ai_processor, capture_queue.journal_path, retry_delay=0.1)
+    count = await resumed.start()
+    job = await wait_for(resumed, job["id"])
+    print(f"restart: resumed {count} capture(s), {job['status']} -> {job['file_path']}")
+    failed |= count != 1 or job["status"] != "filed"
+    await resumed.stop()
+
+    await ai_processor.gateway.close()
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    server = start_stub()
+    code = asyncio.run(main())
+    server.should_exit = True
+    sys.exit(code)
@@ -0,0 +1,118 @@
+"""
+Check that chat prompts stay flat as a conversation grows
+
+Plays a long session through /api/chat against the local OpenAI stub,
+sending the full history each turn like the app does, and checks that:
+- the prompt the model receives stops growing once history is compacted
+- each history segment is summarized once (one summarize call per segment)
+- replaying the same session hits the summary cache and makes no new calls
+- turn latency does not grow with the session
+
+Usage (from backend/):
+    python scripts/check_chat_history.py [--turns 80]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+stub_port = free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="history-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="history-cache-")
+os.environ["WATCHER_BACKEND"] = "off"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from stub_openai_server import app as stub_app, state  # noqa: E402
+from core.config import settings  # noqa: E402
+from main import app  # noqa: E402
+
+DELAY = 0.02
+MESSAGE = "今天复盘了项目进度，讨论了下一步的计划和风险。" * 6
+
+
+def serve(asgi_app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def play_session(client: httpx.AsyncClient, turns: int) -> list:
+    """Run a session; returns (prompt chars, seconds) per turn"""
+    history, results = [], []
+    for turn in range(turns):
+        message = f"第{turn}轮: {MESSAGE}"
+        started = time.perf_counter()
+        response = await client.post("/api/chat", json={
+            "message": message, "conversation_history": history, "include_context": False
+        })
+        response.raise_for_status()
+        results.append((state.prompt_chars[-1], time.perf_counter() - started))
+        history += [{"role": "user", "content": message},
+                    {"role": "assistant", "content": response.json()["response"]}]
+    return results
+
+
+async def run(turns: int) -> int:
+    failed = False
+    state.delay = DELAY
+    server = serve(stub_app, stub_port)
+    async with httpx.AsyncClient(app=app, base_url="http://backend", timeout=30) as client:
+        results = await play_session(client, turns)
+        summaries = state.summaries
+        await play_session(client, turns)
+        replay_summaries = state.summaries - summaries
+    server.should_exit = True
+
+    prompts = [chars for chars, _ in results]
+    half = len(results) // 2
+    early, late = results[:half], results[half:]
+    print(f"{turns} turns: prompt chars first {prompts[0]}, peak {max(prompts)}, last {prompts[-1]}")
+    for label, part in (("first half", early), ("second half", late)):
+        chars = [c for c, _ in part]
+        seconds = sorted(s for _, s in part)
+        print(f"  {label}: mean prompt {sum(chars) / len(chars):.0f} chars, "
+              f"p50 latency {seconds[len(seconds) // 2] * 1000:.0f}ms")
+
+    # Without compaction the prompt would grow by two messages every turn
+    uncompacted = prompts[0] + (turns - 1) * 2 * (len(MESSAGE) + 10)
+    flat = max(p for p, _ in late) <= 1.1 * max(p for p, _ in early)
+    print(f"uncompacted last prompt would be ~{uncompacted} chars; flat: {flat}")
+
+    keep = 2 * settings.chat_history_keep_turns
+    segment = 2 * settings.chat_history_segment_turns
+    expected = (2 * (turns - 1) - keep) // segment
+    print(f"summarize calls: {summaries} (one per segment: {expected}), on replay: {replay_summaries}")
+
+    late_p50 = sorted(s for _, s in late)[len(late) // 2]
+    early_p50 = sorted(s for _, s in early)[len(early) // 2]
+    failed |= not flat or summaries != expected or replay_summaries != 0 or late_p50 > 2 * early_p50 + 0.05
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=80)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.turns)))
@@ -0,0 +1,118 @@
+"""
+Exercise /api/chat/stream against the local OpenAI stub
+
+Runs the backend and the stub on local ports and checks that:
+- the first token arrives long before /api/chat would answer
+- the stream ends with a done event carrying token usage
+- a client that disconnects mid-stream makes the backend close the upstream request
+
+Usage (from backend/):
+    python scripts/check_chat_stream.py
+"""
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+TOKENS = 40
+TOKEN_DELAY = 0.05
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+stub_port, backend_port = free_port(), free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="stream-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="stream-cache-")
+os.environ["WATCHER_BACKEND"] = "off"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from stub_openai_server import app as stub_app, state  # noqa: E402
+from main import app  # noqa: E402
+
+
+def serve(asgi_app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def sse_events(response: httpx.Response):
+    """Parse (event, data) pairs from an SSE response"""
+    kind, data = None, None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            kind = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+        elif not line and kind:
+            yield kind, data
+            kind, data = None, None
+
+
+def main() -> int:
+    failed = False
+    state.stream_tokens, state.token_delay = TOKENS, TOKEN_DELAY
+    servers = [serve(stub_app, stub_port), serve(app, backend_port)]
+    base = f"http://127.0.0.1:{backend_port}"
+    chat = {"message": "hello", "include_context": False}
+
+    with httpx.Client(base_url=base, timeout=30) as client:
+        # A non-streamed reply arrives only once the whole generation is done
+        state.delay = TOKENS * TOKEN_DELAY
+        started = time.perf_counter()
+        client.post("/api/chat", json=chat).raise_for_status()
+        blocking = time.perf_counter() - started
+        state.delay = 0.0
+
+        started = time.perf_counter()
+        first_token, tokens, done = None, 0, None
+        with client.stream("POST", "/api/chat/stream", json=chat) as response:
+            for kind, data in sse_events(response):
+                if kind == "token":
+                    tokens += 1
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                elif kind == "done":
+                    done = data
+        print(f"/api/chat took {blocking * 1000:.0f}ms; stream: first token after {first_token * 1000:.0f}ms, "
+              f"{tokens} tokens")
+        print(f"done event: {done}")
+        failed |= first_token is None or first_token > blocking / 4 or tokens != TOKENS
+        failed |= not done or done["usage"].get("completion_tokens") != TOKENS or done["finish_reason"] != "stop"
+
+        cancelled_before = state.streams_cancelled
+        with client.stream("POST", "/api/chat/stream", json=chat) as response:
+            for n, (kind, _) in enumerate(sse_events(response)):
+                if n == 3:
+                    break  # leaving the block closes the connection
+        deadline = time.monotonic() + 5
+        while state.streams_cancelled == cancelled_before and time.monotonic() < deadline:
+            time.sleep(0.05)
+        cancelled = state.streams_cancelled - cancelled_before
+        print(f"disconnect after 3 tokens: upstream streams cancelled: {cancelled}")
+        failed |= cancelled != 1
+
+    for server in servers:
+        server.should_exit = True
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Benchmark daily log appends and check that concurrent appends are kept
+
+Appends the same number of entries to one day's log through the old
+read-modify-write path (get_daily_log + update_note) and through
+append_daily_log, reporting time and bytes written (wchar from
+/proc/self/io), then appends from several threads and processes at once
+and checks that every entry lands in the work log exactly once.
+
+Usage (from backend/):
+    python scripts/check_daily_log.py [--appends 1000]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="daily-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="daily-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from core.obsidian import obsidian, WORK_LOG_HEADING  # noqa: E402
+
+ENTRY = "Reviewed the capture queue metrics and wrote up follow-ups for the team"
+
+
+def bytes_written() -> int:
+    with open("/proc/self/io") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("wchar"))
+
+
+def old_append(entry: str, day: datetime) -> None:
+    """The previous way to add an entry: rewrite the whole note"""
+    log = obsidian.get_daily_log(day)
+    content = log["content"].replace(WORK_LOG_HEADING, f"{WORK_LOG_HEADING}\n- {entry}", 1)
+    obsidian.update_note(log["file_path"], content=content)
+
+
+def work_log_entries(day: datetime) -> list:
+    content = obsidian.get_daily_log(day)["content"]
+    section = content.split(WORK_LOG_HEADING, 1)[1].split("\n## ", 1)[0]
+    return [line for line in section.splitlines() if line.startswith("- ")]
+
+
+def timed(label: str, count: int, append) -> float:
+    started, written = time.perf_counter(), bytes_written()
+    for i in range(count):
+        append(i)
+    seconds = time.perf_counter() - started
+    written = bytes_written() - written
+    print(f"{label}: {count} appends in {seconds:.2f}s ({count / seconds:.0f}/s), "
+          f"{written / 1e6:.1f} MB written ({written / count / 1e3:.1f} KB per append)")
+    return seconds
+
+
+def process_appends(day: datetime, worker: int, count: int) -> None:
+    for i in range(count):
+        obsidian.append_daily_log(f"process {worker} entry {i}", date=day)
+
+
+def main(appends: int) -> int:
+    failed = False
+
+    old_day, new_day = datetime(2024, 1, 1), datetime(2024, 1, 2)
+    old = timed("read-modify-write", appends, lambda i: old_append(f"{ENTRY} #{i}", old_day))
+    new = timed("append_daily_log ", appends, lambda i: obsidian.append_daily_log(f"{ENTRY} #{i}", date=new_day))
+    entries = work_log_entries(new_day)
+    in_order = [entry.rsplit("#", 1)[1] for entry in entries] == [str(i) for i in range(appends)]
+    print(f"speedup {old / new:.1f}x; entries in order under the work log: {in_order}")
+    failed |= not in_order
+
+    # Concurrency: threads of this process and separate processes on one log
+    day = datetime(2024, 1, 3)
+    per_worker = appends // 8
+    threads = [
+        threading.Thread(target=lambda w=w: [
+            obsidian.append_daily_log(f"thread {w} entry {i}", date=day) for i in range(per_worker)
+        ])
+        for w in range(4)
+    ]
+    processes = [
+        multiprocessing.get_context("fork").Process(target=process_appends, args=(day, w, per_worker))
+        for w in range(4)
+    ]
+    # Fork before any thread is running, so no child inherits a held lock
+    for worker in processes + threads:
+        worker.start()
+    for worker in threads + processes:
+        worker.join()
+    entries = work_log_entries(day)
+    expected = {f"{kind} {w} entry {i}" for kind in ("thread", "process") for w in range(4) for i in range(per_worker)}
+    found = [entry.split(" ", 2)[2] for entry in entries]
+    complete = sorted(found) == sorted(expected)
+    print(f"4 threads + 4 processes x {per_worker}: {len(found)} entries of {len(expected)}, "
+          f"none lost or duplicated: {complete}")
+    failed |= not complete
+
+    content = obsidian.get_daily_log(day)["content"]
+    intact = content.rstrip().endswith("## 📊 Summary") and "## 💭 Thoughts and Ideas" in content
+    print(f"later sections intact: {intact}")
+    failed |= not intact
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--appends", type=int, default=1000)
+    args = parser.parse_args()
+    sys.exit(main(args.appends))
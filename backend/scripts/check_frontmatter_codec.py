@@ -0,0 +1,185 @@
+"""
+Check that the note codec matches python-frontmatter and benchmark both
+
+Runs every Markdown note under the given vaults, the repository's own
+Markdown files, notes written by create_note and a batch of generated
+edge-case headers through core.note_codec and python-frontmatter, and
+checks that both give the same metadata (types included) and content,
+and that dumping each post gives the same text. Then times loads and
+dumps both ways on the vault notes.
+
+Usage (from backend/):
+    python scripts/check_frontmatter_codec.py [--vault /tmp/big] [--fuzz 20000]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="codec-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="codec-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+import frontmatter  # noqa: E402
+from core import note_codec  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.obsidian import obsidian  # noqa: E402
+
+REPO = Path(__file__).resolve().parent.parent.parent
+
+# Scalars that are easy to get wrong: YAML 1.1 booleans, numbers, dates,
+# indicators, quotes, comments, wide text and long lines
+TRICKY = [
+    "", " ", "yes", "No", "on", "OFF", "y", "null", "Null", "~", "true", "True",
+    "0", "-1", "+5", "007", "0x1F", "0o17", "0b101", "1_000", "10:30", "190:20:30",
+    "1.5", "-.5", ".inf", "-.Inf", ".NaN", "1e3", "6.02e+23", "1.0e-5",
+    "2024-05-05", "2024-05-05T10:00:00", "2024-05-05 10:00:00.5 +08:00",
+    "2025-02-01T23:00:00.123456", "2001-12-14t21:59:43.10-05:00",
+    "a: b", "a:b", "ends:", "x #y", "x#y", "#tag", "-", "- a", "-a", "--- x",
+    "'quoted'", "it's", "''", "\"dq\"", "[a]", "{a: 1}", "a, b", "&anchor", "*alias",
+    "!tag", "|", ">", "%x", "@x", "`x", "?x", "? x", "a]", "(x)", "x.", "x/y",
+    "trailing ", " leading", "two  spaces", "tab\there", "笔记 标题", "会议：记录",
+    "emoji 🎉", "naïve café", "line\nbreak", " ", "﻿",
+    "word " * 20, "x" * 100, "key: " + "y" * 90,
+]
+KEYS = ["title", "type", "tags", "status", "created", "modified", "ai_confidence",
+        "yes", "null", "1", "a-b", "a b", "_private", "Title", "x1"]
+
+
+def same(a, b) -> bool:
+    """Equal with equal types all the way down (True != 1 here)"""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and a != a:
+        return b != b
+    return a == b
+
+
+def compare(text: str) -> str:
+    """Empty string if both agree on this note, else what differs"""
+    try:
+        expected = frontmatter.loads(text)
+    except Exception as e:
+        try:
+            note_codec.loads(text)
+        except type(e):
+            return ""
+        return f"library raised {type(e).__name__}, codec did not"
+    got = note_codec.loads(text)
+    if not same(got.metadata, expected.metadata):
+        return f"metadata {got.metadata!r} != {expected.metadata!r}"
+    if got.content != expected.content:
+        return "content differs"
+    try:
+        dumped = frontmatter.dumps(expected)
+    except Exception:
+        return ""
+    if note_codec.dumps(got) != dumped:
+        return f"dumps {note_codec.dumps(got)!r} != {dumped!r}"
+    return ""
+
+
+def random_value(rng: random.Random):
+    kind = rng.random()
+    if kind < 0.45:
+        return rng.choice(TRICKY)
+    if kind < 0.6:
+        return rng.choice([0, 7, -3, 0.9, 1.0, 100.25, 1e20, True, False, None,
+                           datetime.date(2024, 5, 5), datetime.datetime(2024, 5, 5, 10, 0)])
+    if kind < 0.8:
+        return [rng.choice(TRICKY + [3, None, True]) for _ in range(rng.randint(0, 3))]
+    if kind < 0.85:
+        return {"nested": rng.choice(TRICKY)}
+    return " ".join(rng.choice(["meeting", "笔记", "plan", "v2", "API"]) for _ in range(rng.randint(1, 6)))
+
+
+def fuzz_notes(rng: random.Random, count: int):
+    """Notes dumped from random metadata, plus hand-written header lines"""
+    for _ in range(count):
+        metadata = {rng.choice(KEYS): random_value(rng) for _ in range(rng.randint(1, 6))}
+        post = frontmatter.Post("# Body\n\ntext", **metadata)
+        yield frontmatter.dumps(post)
+        lines = []
+        for key in metadata:
+            raw = rng.choice(TRICKY)
+            lines.append(rng.choice([f"{key}: {raw}", f"{key}:", f"- {raw}", f"{key}:  {raw}  ", f"{key}: '{raw}'"]))
+        ending = rng.choice(["---", "----", "--- ", "---\t", "-- -", "---x"])
+        yield "---\n" + "\n".join(lines) + f"\n{ending}\n\nbody\n---\nmore"
+
+
+def created_notes():
+    """Notes as the app writes them"""
+    for i, title in enumerate(["Plan", "笔记 标题", "yes", "2024-01-01", "a: b", "word " * 30]):
+        note = obsidian.create_note(
+            content=f"# {title}\n\nBody {i}", title=title, folder=settings.ideas_path,
+            metadata={"type": "idea", "tags": ["ai-generated", "笔记", "2024"],
+                      "ai_confidence": 0.9, "input_type": "text"},
+            unique=True
+        )
+        yield (settings.full_vault_path / note["file_path"]).read_text(encoding="utf-8")
+
+
+def bench(label: str, texts: list, load, dump) -> tuple:
+    started = time.perf_counter()
+    posts = [load(text) for text in texts]
+    loaded = time.perf_counter() - started
+    started = time.perf_counter()
+    for post in posts:
+        dump(post)
+    dumped = time.perf_counter() - started
+    print(f"  {label}: loads {loaded:.2f}s ({len(texts) / loaded:.0f}/s), dumps {dumped:.2f}s ({len(texts) / dumped:.0f}/s)")
+    return loaded, dumped
+
+
+def main(vaults: list, fuzz: int, bench_notes: int) -> int:
+    failed = False
+    corpora = {}
+    for vault in vaults:
+        paths = sorted(Path(vault).rglob("*.md"))
+        corpora[vault] = [path.read_text(encoding="utf-8") for path in paths]
+    corpora["repository Markdown"] = [
+        path.read_text(encoding="utf-8") for path in sorted(REPO.rglob("*.md")) if "node_modules" not in path.parts
+    ]
+    corpora["create_note"] = list(created_notes())
+    corpora["generated headers"] = list(fuzz_notes(random.Random(7), fuzz))
+
+    for name, texts in corpora.items():
+        problems = [(text, problem) for text in texts for problem in [compare(text)] if problem]
+        flat = sum(
+            1 for text in texts
+            if note_codec.FM_BOUNDARY.match(text.strip()) and note_codec.split(text.strip())
+            and note_codec.parse_flat(note_codec.split(text.strip())[0]) is not None
+        )
+        print(f"{name}: {len(texts)} notes, {flat} on the flat fast path, {len(problems)} differ")
+        for text, problem in problems[:3]:
+            print(f"  {text[:120]!r}\n    {problem}")
+        failed |= bool(problems)
+
+    texts = [text for vault in vaults for text in corpora[vault]][:bench_notes]
+    if texts:
+        print(f"benchmark on {len(texts)} vault notes")
+        old = bench("python-frontmatter", texts, frontmatter.loads, frontmatter.dumps)
+        new = bench("note_codec        ", texts, note_codec.loads, note_codec.dumps)
+        print(f"  speedup: loads {old[0] / new[0]:.1f}x, dumps {old[1] / new[1]:.1f}x")
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vault", action="append", default=[], help="Vault to check (repeatable)")
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--bench-notes", type=int, default=20000)
+    args = parser.parse_args()
+    sys.exit(main(args.vault, args.fuzz, args.bench_notes))
@@ -0,0 +1,159 @@
+"""
+Benchmark metadata-only update_note calls and check the patched notes
+
+Writes project notes with hand-ordered frontmatter (unknown fields, lists,
+a multi-line value) and long bodies, then updates status/progress on all
+of them through the previous full rewrite and through update_note, and
+checks that the patched notes:
+- load to the same metadata as the full rewrite would give
+- keep their key order, untouched lines and body byte for byte
+and reports time, bytes written (wchar from /proc/self/io) and how many
+lines each way changes per note.
+
+Usage (from backend/):
+    python scripts/check_frontmatter_patch.py [--notes 500]
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="patch-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="patch-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+import frontmatter  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.obsidian import obsidian  # noqa: E402
+
+HEADER = """---
+title: Project {i}
+status: active
+progress: 40
+owner: someone
+created: '2024-03-01T09:00:00.000000'
+modified: '2024-03-02T09:00:00.000000'
+tags:
+- project
+- q{quarter}
+links: {{repo: "https://example.com/{i}", board: null}}
+notes: |
+  Kick-off went well.
+  Next: milestones.
+custom_field: keep me
+---
+"""
+
+
+def bytes_written() -> int:
+    with open("/proc/self/io") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("wchar"))
+
+
+def full_rewrite(file_path: str, metadata: dict) -> None:
+    """The previous update_note: load, merge, dump the whole note, refresh the index"""
+    full_path = settings.full_vault_path / file_path
+    with open(full_path, "r", encoding="utf-8") as f:
+        post = frontmatter.load(f)
+    post.metadata.update(metadata)
+    with open(full_path, "w", encoding="utf-8") as f:
+        f.write(frontmatter.dumps(post))
+    obsidian.index.update_path(file_path)
+
+
+def split(text: str) -> tuple:
+    _, header, body = text.split("---\n", 2)
+    return header.splitlines(), body
+
+
+def timed(label: str, paths: list, update, metadata: dict) -> float:
+    started, written = time.perf_counter(), bytes_written()
+    for file_path in paths:
+        update(file_path, metadata)
+    seconds = time.perf_counter() - started
+    written = bytes_written() - written
+    print(f"  {label}: {seconds:.2f}s, {written / 1e6:.1f} MB written ({written / len(paths) / 1e3:.1f} KB per note)")
+    return seconds
+
+
+def main(notes: int) -> int:
+    failed = False
+    rng = random.Random(3)
+    folder = settings.ensure_path_exists(settings.projects_path)
+    paths = {"rewrite": [], "patch": []}
+    originals = {}
+    for i in range(notes):
+        body = "\n".join(
+            f"## Part {p}\n" + " ".join(rng.choice(["plan", "ship", "review", "metrics", "risk"]) for _ in range(400))
+            for p in range(8)
+        ) + "\n"
+        text = HEADER.format(i=i, quarter=i % 4 + 1) + body
+        for kind in paths:
+            file_path = f"{settings.projects_path}/{kind}-{i}.md"
+            (folder / f"{kind}-{i}.md").write_text(text, encoding="utf-8")
+            paths[kind].append(file_path)
+            originals[file_path] = text
+    obsidian.index.ensure_fresh(parse=False)
+    print(f"{notes} project notes, {len(originals[paths['patch'][0]]) / 1e3:.0f} KB each")
+
+    for label, metadata in (
+        ("same-length change (status active -> paused)", {"status": "paused"}),
+        ("length change (progress 40 -> 100, new field)", {"progress": 100, "reviewed": True}),
+    ):
+        print(label)
+        old = timed("full rewrite", paths["rewrite"], full_rewrite, metadata)
+        new = timed("update_note ", paths["patch"], lambda p, m: obsidian.update_note(p, metadata=m), metadata)
+        print(f"  speedup {old / new:.1f}x")
+
+    def changed_lines(file_path: str) -> int:
+        text = (settings.full_vault_path / file_path).read_text(encoding="utf-8")
+        diff = difflib.unified_diff(originals[file_path].splitlines(), text.splitlines(), n=0, lineterm="")
+        return sum(1 for line in diff if line[:1] in "+-" and line[:3] not in ("+++", "---"))
+
+    for kind, label in (("rewrite", "full rewrite"), ("patch", "update_note ")):
+        lines = [changed_lines(file_path) for file_path in paths[kind]]
+        print(f"{label}: {sum(lines) / len(lines):.1f} changed lines per note (diff against the original)")
+
+    mismatched = reordered = body_changed = 0
+    for rewritten, patched in zip(paths["rewrite"], paths["patch"]):
+        expected = frontmatter.loads((settings.full_vault_path / rewritten).read_text(encoding="utf-8"))
+        text = (settings.full_vault_path / patched).read_text(encoding="utf-8")
+        got = frontmatter.loads(text)
+        got.metadata.pop("modified")
+        expected.metadata.pop("modified")
+        mismatched += got.metadata != expected.metadata or got.content != expected.content
+
+        lines, body = split(text)
+        original_lines, original_body = split(originals[patched])
+        body_changed += body != original_body
+        keys = [line.split(":")[0] for line in lines if line[:1].isalpha()]
+        original_keys = [line.split(":")[0] for line in original_lines if line[:1].isalpha()]
+        changed = {"status", "progress", "modified"}
+        untouched = [line for line in original_lines if line.split(":")[0] not in changed]
+        reordered += keys != original_keys + ["reviewed"] or [
+            line for line in lines if line.split(":")[0] not in changed | {"reviewed"}
+        ] != untouched
+
+    print(f"metadata differs from full rewrite: {mismatched}, key order or untouched lines changed: "
+          f"{reordered}, body changed: {body_changed}")
+    failed |= bool(mismatched or reordered or body_changed)
+
+    leftovers = [name for name in os.listdir(folder) if name.endswith(".tmp")]
+    print(f"temp files left: {len(leftovers)}")
+    failed |= bool(leftovers)
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(main(args.notes))
@@ -0,0 +1,91 @@
+"""
+Measure note index memory and listing response sizes, and check fields=
+
+Parses every note of the vault into the metadata index and reports the
+resident memory it takes (VmRSS from /proc/self/status) and per note, then
+requests a page of /api/timeline, /api/projects and /api/articles with
+all fields and with a sparse fields= selection, reporting response sizes,
+and checks that sparse items carry exactly the requested fields with the
+same values as the full ones and that unknown fields are rejected.
+
+Usage (from backend/, with OBSIDIAN_VAULT_PATH set):
+    python scripts/check_listing_memory.py [--fields file_path,title,modified,tags]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="listing-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["WATCHER_BACKEND"] = "off"
+
+import httpx  # noqa: E402
+from main import app  # noqa: E402
+from core.obsidian import obsidian  # noqa: E402
+
+ENDPOINTS = {
+    "/api/timeline?limit=50": "items",
+    "/api/projects": "projects",
+    "/api/articles": "articles",
+}
+
+
+def resident_bytes() -> int:
+    gc.collect()
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS"))
+
+
+async def run(fields: str) -> int:
+    failed = False
+
+    before = resident_bytes()
+    started = time.perf_counter()
+    obsidian.warm_index()
+    took = time.perf_counter() - started
+    used = resident_bytes() - before
+    notes = len(obsidian.index)
+    print(f"index of {notes} notes: {used / 1e6:.1f} MB resident ({used / max(notes, 1):.0f} bytes per note), "
+          f"built in {took:.1f}s")
+
+    wanted = fields.split(",")
+    async with httpx.AsyncClient(app=app, base_url="http://backend", timeout=120) as client:
+        for url, key in ENDPOINTS.items():
+            full = await client.get(url)
+            sparse = await client.get(f"{url}{'&' if '?' in url else '?'}fields={fields}")
+            if full.status_code != 200 or sparse.status_code != 200:
+                print(f"{url}: status {full.status_code} / {sparse.status_code}")
+                failed = True
+                continue
+            full_items, sparse_items = full.json()[key], sparse.json()[key]
+            count = max(len(full_items), 1)
+            print(f"{url}: {len(full_items)} items, all fields {len(full.content) / 1e3:.1f} KB "
+                  f"({len(full.content) / count:.0f} B/item), fields={fields} {len(sparse.content) / 1e3:.1f} KB "
+                  f"({len(sparse.content) / count:.0f} B/item)")
+            matches = len(sparse_items) == len(full_items) and all(
+                list(item) == wanted and all(item[field] == whole[field] for field in wanted)
+                for item, whole in zip(sparse_items, full_items)
+            )
+            print(f"  sparse items have exactly the requested fields and the same values: {matches}")
+            failed |= not matches
+
+        rejected = await client.get("/api/timeline?fields=title,body")
+        print(f"unknown field: status {rejected.status_code}")
+        failed |= rejected.status_code != 400
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fields", default="file_path,title,modified,tags")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.fields)))
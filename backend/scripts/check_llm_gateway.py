@@ -0,0 +1,85 @@
+"""
+Exercise the LLM gateway against the local OpenAI stub
+
+Starts scripts/stub_openai_server.py in-process and checks that:
+- a burst of classifications survives injected 429/500 responses
+- in-flight calls never exceed the classify concurrency cap
+- a call slower than its deadline is abandoned on time
+
+Usage (from backend/):
+    python scripts/check_llm_gateway.py
+"""
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+BURST = 40
+CONCURRENCY = 5
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+port = free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("OBSIDIAN_VAULT_PATH", tempfile.mkdtemp(prefix="gateway-vault-"))
+# A fresh classification cache, so every classification reaches the stub
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="gateway-cache-")
+os.environ["LLM_CONCURRENCY"] = f'{{"classify": {CONCURRENCY}, "chat": 2, "summarize": 2, "transcribe": 1}}'
+os.environ["LLM_DEADLINES"] = '{"classify": 30, "chat": 1, "summarize": 30, "transcribe": 30}'
+os.environ["LLM_REQUESTS_PER_MINUTE"] = "6000"
+
+import uvicorn  # noqa: E402
+from stub_openai_server import app, state  # noqa: E402
+from core.ai_processor import ai_processor  # noqa: E402
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def main() -> int:
+    failed = False
+
+    state.delay, state.fail_rate = 0.05, 0.3
+    results = await asyncio.gather(*(ai_processor.classify_input(f"idea {i}") for i in range(BURST)))
+    succeeded = sum(1 for r in results if r.get("success"))
+    print(f"burst: {succeeded}/{BURST} classified, {state.failures} injected failures retried, "
+          f"peak in flight {state.peak_in_flight} (cap {CONCURRENCY})")
+    if succeeded != BURST or state.failures == 0 or not 0 < state.peak_in_flight <= CONCURRENCY:
+        failed = True
+
+    state.delay, state.fail_rate = 3.0, 0.0
+    started = time.perf_counter()
+    reply = await ai_processor.chat_response("hello", [])
+    took = time.perf_counter() - started
+    print(f"deadline: chat gave up after {took:.2f}s (deadline 1s): {reply[:40]!r}")
+    if took > 1.5:
+        failed = True
+
+    await ai_processor.gateway.close()
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    server = start_stub()
+    code = asyncio.run(main())
+    server.should_exit = True
+    sys.exit(code)
@@ -0,0 +1,77 @@
+"""
+Check that slow model calls do not block other requests
+
+Runs the app in-process against a throwaway vault, makes the chat model
+take MODEL_DELAY seconds to answer a capture, and asserts that timeline
+and health requests issued meanwhile all finish before the capture does.
+
+Usage (from backend/):
+    python scripts/check_nonblocking.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+MODEL_DELAY = 2.0
+CONCURRENT_REQUESTS = 20
+
+vault_dir = tempfile.mkdtemp(prefix="nonblocking-vault-")
+os.environ["OBSIDIAN_VAULT_PATH"] = vault_dir
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="nonblocking-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for i in range(200):
+    note = Path(vault_dir) / "01_Execution" / f"note_{i}.md"
+    note.parent.mkdir(parents=True, exist_ok=True)
+    note.write_text(f"---\ntitle: Note {i}\ntype: note\n---\n\nBody of note {i}\n", encoding="utf-8")
+
+import httpx  # noqa: E402
+from main import app  # noqa: E402
+from core.ai_processor import ai_processor  # noqa: E402
+
+
+async def slow_completion(**kwargs):
+    await asyncio.sleep(MODEL_DELAY)
+    content = '{"category": "idea", "confidence": 0.9, "title": "Slow idea", "suggested_tags": []}'
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+async def main() -> int:
+    ai_processor.client.chat.completions.create = slow_completion
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+        started = time.perf_counter()
+
+        async def timed(coro):
+            response = await coro
+            return response, time.perf_counter() - started
+
+        capture = asyncio.create_task(timed(client.post("/api/capture", json={"content": "a slow idea"})))
+        await asyncio.sleep(0.1)  # let the capture reach the model call
+        others = [timed(client.get("/api/timeline", params={"limit": 20})) for _ in range(CONCURRENT_REQUESTS)]
+        others.append(timed(client.get("/health")))
+        results = await asyncio.gather(*others)
+        capture_response, capture_done = await capture
+
+    failures = [r.status_code for r, _ in results if r.status_code != 200]
+    slowest = max(done for _, done in results)
+    print(f"capture: HTTP {capture_response.status_code} after {capture_done:.2f}s")
+    print(f"{len(results)} concurrent requests: slowest finished after {slowest:.2f}s")
+
+    if capture_response.status_code != 200 or failures:
+        print(f"FAIL: unexpected status codes {failures or capture_response.status_code}")
+        return 1
+    if slowest >= capture_done or slowest >= MODEL_DELAY / 2:
+        print("FAIL: requests waited for the model call")
+        return 1
+    print("OK: the event loop kept serving requests during the model call")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
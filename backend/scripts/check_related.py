@@ -0,0 +1,103 @@
+"""
+Check the related-notes engine on a generated vault with known topics
+
+Writes notes drawn from topic vocabularies (plus words shared by all
+topics) into a temporary vault, builds the index and checks that:
+- neighbours come from the same topic
+- a new note is linked both ways without a rebuild, and a deleted one disappears
+and reports build and query times.
+
+Usage (from backend/):
+    python scripts/check_related.py [--notes 3000] [--topics 100]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="related-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="related-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from core.config import settings  # noqa: E402
+from core.obsidian import obsidian  # noqa: E402
+from core.related import related_index  # noqa: E402
+
+SHARED = ["today", "note", "idea", "work", "meeting", "project", "plan", "review"]
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+
+
+def note_text(rng: random.Random, vocabulary: list) -> str:
+    words = rng.sample(vocabulary, 25) + rng.sample(SHARED, 4)
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+def main(notes: int, topics: int) -> int:
+    rng = random.Random(7)
+    vocabularies = [[word(rng) for _ in range(60)] for _ in range(topics)]
+    topic_of = {}
+    folder = settings.get_full_path(settings.ideas_path)
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(notes):
+        topic = i % topics
+        path = folder / f"note-{i}.md"
+        path.write_text(f"---\ntitle: note {i}\n---\n{note_text(rng, vocabularies[topic])}\n", encoding="utf-8")
+        topic_of[f"{settings.ideas_path}/note-{i}.md"] = topic
+
+    stats = related_index.build()
+    print(f"built: {stats}")
+
+    failed = False
+    timings, same, total = [], 0, 0
+    for file_path in rng.sample(sorted(topic_of), 200):
+        result = related_index.related(file_path, k=5)
+        timings.append(result["took_ms"])
+        for item in result["items"]:
+            total += 1
+            same += topic_of[item["file_path"]] == topic_of[file_path]
+    timings.sort()
+    precision = same / total if total else 0.0
+    print(f"same-topic precision@5: {precision:.3f} over {total} neighbours; "
+          f"query p50 {timings[len(timings) // 2]:.2f}ms, max {timings[-1]:.2f}ms")
+    failed |= precision < 0.95 or total < 200 * 4
+
+    topic = 3
+    created = obsidian.create_note(
+        content=note_text(rng, vocabularies[topic]), title="fresh note", folder=settings.ideas_path, unique=True
+    )
+    new_path = created["file_path"]
+    own = related_index.related(new_path, k=5)
+    own_ok = bool(own["items"]) and all(topic_of[item["file_path"]] == topic for item in own["items"])
+    backlinked = any(
+        new_path in {item["file_path"] for item in related_index.related(item["file_path"], k=20)["items"]}
+        for item in own["items"]
+    )
+    print(f"new note: neighbours in its topic: {own_ok}, linked back from a neighbour: {backlinked}")
+
+    neighbour = own["items"][0]["file_path"] if own["items"] else None
+    (settings.full_vault_path / new_path).unlink()
+    obsidian.index.update_path(new_path)
+    gone = related_index.related(new_path) is None and (
+        neighbour is None or new_path not in {i["file_path"] for i in related_index.related(neighbour, k=20)["items"]}
+    )
+    print(f"deleted note dropped everywhere: {gone}")
+    failed |= not (own_ok and backlinked and gone)
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=3000)
+    parser.add_argument("--topics", type=int, default=100)
+    args = parser.parse_args()
+    sys.exit(main(args.notes, args.topics))
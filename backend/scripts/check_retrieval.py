@@ -0,0 +1,86 @@
+"""
+Measure chat-context retrieval on a vault and check incremental updates
+
+Builds the chunk index, times retrieval for queries cut from random notes
+(target: p95 under 30 ms), then writes, edits and deletes a note and checks
+that retrieval follows without a rebuild.
+
+Usage (from backend/, with OBSIDIAN_VAULT_PATH set):
+    python scripts/check_retrieval.py [--queries 200]
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.config import settings  # noqa: E402
+from core.obsidian import obsidian  # noqa: E402
+from core.retrieval import retrieval_index  # noqa: E402
+
+TARGET_MS = 30.0
+MARKER = "zebracrossingmarker"
+
+
+def sample_queries(count: int) -> list:
+    """Chat-like messages: a stretch of text from a random note plus a question"""
+    paths = obsidian.index.paths()
+    queries = []
+    while len(queries) < count and paths:
+        note = obsidian.index.get(random.choice(paths))
+        text = " ".join(note.content.split()) if note else ""
+        if len(text) < 40:
+            continue
+        start = random.randrange(0, len(text) - 30)
+        queries.append(f"{text[start:start + random.randint(20, 80)]} 这个怎么理解？")
+    return queries
+
+
+def paths_for(query: str) -> set:
+    return {item["file_path"] for item in retrieval_index.retrieve(query)["items"]}
+
+
+def main(count: int) -> int:
+    failed = False
+    stats = retrieval_index.build()
+    print(f"built: {stats}")
+
+    timings = []
+    budget_ok = True
+    for query in sample_queries(count):
+        result = retrieval_index.retrieve(query, k=settings.retrieval_top_k,
+                                          token_budget=settings.retrieval_token_budget)
+        timings.append(result["took_ms"])
+        budget_ok &= result["tokens"] <= settings.retrieval_token_budget
+    timings.sort()
+    p50, p95 = timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+    print(f"{len(timings)} queries: p50 {p50:.1f}ms, p95 {p95:.1f}ms, max {timings[-1]:.1f}ms "
+          f"(target p95 < {TARGET_MS:.0f}ms), within token budget: {budget_ok}")
+    failed |= p95 > TARGET_MS or not budget_ok
+
+    note = obsidian.create_note(
+        content=f"# Setup\nnothing here\n\n# Findings\nThe {MARKER} appears only in this section.",
+        title="retrieval check", folder=settings.ideas_path, unique=True
+    )
+    result = retrieval_index.retrieve(MARKER)
+    created = bool(result["items"]) and result["items"][0]["file_path"] == note["file_path"]
+    print(f"new note retrieved: {created}, heading {result['items'][0]['heading'] if result['items'] else None!r}")
+
+    obsidian.update_note(note["file_path"], content="# Setup\nnothing to see any more")
+    edited = note["file_path"] not in paths_for(MARKER)
+    (settings.full_vault_path / note["file_path"]).unlink()
+    obsidian.index.update_path(note["file_path"])
+    deleted = note["file_path"] not in paths_for("nothing to see any more")
+    print(f"edit dropped old text: {edited}, delete dropped note: {deleted}")
+    failed |= not (created and edited and deleted)
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(main(args.queries))
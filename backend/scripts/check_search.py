@@ -0,0 +1,190 @@
+"""
+Measure full-text search latency on a generated vault and check results
+
+Writes mostly-Chinese notes (Zipf-distributed characters from a vocabulary
+of 3500, with some English words mixed in) across a few folders into a
+temporary vault, builds the search index and runs a mix of queries: lone CJK characters,
+bigrams and longer CJK words, English words, several terms at once,
+quoted phrases and folder/tag filters. Reports p50/p95/p99 latency per
+kind and overall, and checks that:
+- a note with a malformed YAML header is skipped without failing the build
+- a note whose header breaks after indexing drops out of results without
+  failing the search
+- overall p99 stays under the budget
+- a lone character finds the notes containing it
+- every result of a phrase query contains the phrase, and no note whose
+  body contains it is missed
+
+Usage (from backend/):
+    python scripts/check_search.py [--notes 50000] [--queries 600] [--budget-ms 50]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="search-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="search-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["WATCHER_BACKEND"] = "off"
+
+from core.config import settings  # noqa: E402
+from core.search import search_index  # noqa: E402
+from core.tokenizer import normalize  # noqa: E402
+
+# Common characters, most frequent first
+CHARS = (
+    "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后"
+    "小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长"
+    "知民样现分将外但身些与高意进把法此实回二理美点月明其种声全工己话儿者向情部正名定女问力机给等几很业最"
+    "间新什打便位因重被走电四第门相次东政海口使教西再平真听世气信北少关并内加化由却代军产入先山五太水万市"
+    "眼体别处总才场师书比住员九笑性通目华报立马命张活难神数件安表原车白应路期叫死常提感金何更反合放做系计"
+    "或司利受光王果亲界及今京务制解各任至清物台象记边共风战干接它许八特觉望直服毛林题建南度统色字请交爱让"
+)
+# Then less common ones, for a vocabulary about the size of everyday Chinese
+CHARS += "".join(c for c in map(chr, range(0x4E00, 0x4E00 + 4000)) if c not in CHARS)[:3500 - len(CHARS)]
+WORDS = ["meeting", "design", "backend", "vault", "python", "api", "obsidian", "search", "index", "fastapi"]
+FOLDERS = ["00_Foundation", "01_Execution/Projects", "01_Execution/Daily_Operations/Ideas", "02_Intelligence/Articles"]
+TAGS = ["obsidian", "work", "reading", "plan", "idea"]
+
+
+def body(rng: random.Random, cum_weights: list) -> str:
+    parts = []
+    for _ in range(rng.randint(20, 60)):
+        if rng.random() < 0.15:
+            parts.append(f" {rng.choice(WORDS)} ")
+        else:
+            parts.append("".join(rng.choices(CHARS, cum_weights=cum_weights, k=rng.randint(3, 12))))
+    return "".join(parts)
+
+
+def write_vault(rng: random.Random, notes: int) -> list:
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(CHARS))))
+    texts = []
+    for folder in FOLDERS:
+        settings.get_full_path(folder).mkdir(parents=True, exist_ok=True)
+    for i in range(notes):
+        folder = FOLDERS[i % len(FOLDERS)]
+        text = body(rng, cum_weights)
+        tags = rng.sample(TAGS, 2)
+        header = f"---\ntitle: 笔记 {i}\ntype: note\ntags:\n- {tags[0]}\n- {tags[1]}\n---\n\n"
+        settings.get_full_path(f"{folder}/note-{i}.md").write_text(header + text, encoding="utf-8")
+        texts.append(text)
+    # Unclosed flow sequence: the YAML parser raises on this header
+    settings.get_full_path(f"{FOLDERS[0]}/broken.md").write_text(
+        "---\ntitle: [broken\ntags: x\n---\n\nbroken header\n", encoding="utf-8"
+    )
+    return texts
+
+
+def queries(rng: random.Random, texts: list, count: int) -> list:
+    """(kind, query, folder, tag) tuples, drawn from the generated text"""
+    def cjk_run(length: int) -> str:
+        while True:
+            text = rng.choice(texts)
+            start = rng.randrange(len(text) - length)
+            run = text[start:start + length]
+            if all(c in CHARS for c in run):
+                return run
+
+    makers = {
+        "char": lambda: (cjk_run(1), None, None),
+        "bigram": lambda: (cjk_run(2), None, None),
+        "word": lambda: (cjk_run(rng.randint(3, 4)), None, None),
+        "english": lambda: (rng.choice(WORDS), None, None),
+        "terms": lambda: (f"{cjk_run(2)} {rng.choice(WORDS)} {cjk_run(1)}", None, None),
+        "phrase": lambda: (f'"{cjk_run(rng.randint(2, 5))}"', None, None),
+        "phrase+terms": lambda: (f'"{cjk_run(3)}" {rng.choice(WORDS)}', None, None),
+        # Frequent words that are rarely next to each other: the most notes to verify
+        "word phrase": lambda: (f'"{rng.choice(WORDS)} {rng.choice(WORDS)}"', None, None),
+        "filtered": lambda: (cjk_run(2), rng.choice(FOLDERS), rng.choice([None] + TAGS)),
+    }
+    kinds = list(makers)
+    return [(kind, *makers[kind]()) for kind in (kinds[i % len(kinds)] for i in range(count))]
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(notes: int, count: int, budget_ms: float) -> int:
+    rng = random.Random(7)
+    started = time.perf_counter()
+    texts = write_vault(rng, notes)
+    print(f"wrote {notes} notes in {time.perf_counter() - started:.1f}s")
+    built = search_index.build()
+    print(f"built: {built}")
+
+    failed = False
+    if built["documents"] != notes:
+        print(f"  indexed {built['documents']} documents, expected {notes} (broken.md skipped)")
+        failed = True
+    planned = queries(rng, texts, count)
+    for _, query, folder, tag in planned[:50]:
+        search_index.search(query, folder=folder, tag=tag)  # warm-up
+
+    timings = {}
+    for kind, query, folder, tag in planned:
+        started = time.perf_counter()
+        result = search_index.search(query, folder=folder, tag=tag)
+        timings.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+        if kind == "char" and result["total"] == 0:
+            print(f"  lone character {query!r} found nothing")
+            failed = True
+        if "phrase" in kind:
+            phrase = normalize(query.split('"')[1])
+            for item in result["items"]:
+                text = settings.get_full_path(item["file_path"]).read_text(encoding="utf-8")
+                if phrase not in normalize(text):
+                    print(f"  {item['file_path']} does not contain {phrase!r}")
+                    failed = True
+
+    # Recall of phrase search against a scan of every note body
+    for _, query, _, _ in [q for q in planned if q[0] == "phrase"][:10]:
+        phrase = normalize(query.split('"')[1])
+        expected = {i for i, text in enumerate(texts) if phrase in normalize(text)}
+        found = search_index.search(query, limit=notes)["items"]
+        missed = expected - {int(item["file_path"].rsplit("-", 1)[1][:-3]) for item in found}
+        if missed:
+            print(f"  {query} missed {len(missed)} of {len(expected)} notes")
+            failed = True
+
+    # Header broken after indexing, before the note index has re-read the note
+    edited = f"{FOLDERS[0]}/note-0.md"
+    settings.get_full_path(edited).write_text(f"---\ntitle: [unclosed\n---\n\n{texts[0]}", encoding="utf-8")
+    search_index._on_note_changed(edited)
+    try:
+        found = [item["file_path"] for item in search_index.search("笔记 0", limit=notes)["items"]]
+        if edited in found:
+            print(f"  {edited} with a malformed header is still in the results")
+            failed = True
+    except Exception as e:
+        print(f"  search failed after {edited} got a malformed header: {e!r}")
+        failed = True
+
+    every = [t for values in timings.values() for t in values]
+    for kind, values in list(timings.items()) + [("all", every)]:
+        print(f"{kind:>12}: p50 {percentile(values, 0.5):6.2f}ms  p95 {percentile(values, 0.95):6.2f}ms  "
+              f"p99 {percentile(values, 0.99):6.2f}ms  max {max(values):6.2f}ms  ({len(values)} queries)")
+    p99 = percentile(every, 0.99)
+    print(f"p99 {p99:.2f}ms against a budget of {budget_ms:.0f}ms")
+    failed |= p99 >= budget_ms
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=600)
+    parser.add_argument("--budget-ms", type=float, default=50)
+    args = parser.parse_args()
+    sys.exit(main(args.notes, args.queries, args.budget_ms))
@@ -0,0 +1,140 @@
+"""
+Exercise /api/voice with long recordings against the local OpenAI stub
+
+Generates a WAV of tone "words" (see the stub transcriber) with short
+gaps between words and longer pauses between sentences, and checks that:
+- a long recording is split into segments and the stitched transcript has
+  every word once, in order (no word cut at a segment boundary)
+- concurrent segment transcription beats one call for the whole file
+- an upload over the size cap is rejected with 413
+
+Usage (from backend/):
+    python scripts/check_voice.py [--minutes 10] [--segment 60]
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+stub_port = free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="voice-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="voice-cache-")
+os.environ["WATCHER_BACKEND"] = "off"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from stub_openai_server import app as stub_app, state, TONE_BASE, TONE_STEP  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.ai_processor import ai_processor  # noqa: E402
+from main import app  # noqa: E402
+
+RATE = 16000
+TRANSCRIBE_RATE = 0.01  # stub seconds per audio second: 10 minutes take 6 s in one call
+
+
+def serve(asgi_app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def recording(minutes: float, rng: random.Random) -> tuple:
+    """(WAV bytes, expected transcript) of tone words with a little background noise"""
+    parts, words, seconds = [], [], 0.0
+    while seconds < minutes * 60:
+        for _ in range(rng.randint(3, 8)):
+            k = rng.randint(0, 40)
+            length = rng.uniform(0.25, 0.6)
+            t = np.arange(int(length * RATE)) / RATE
+            parts.append(8000 * np.sin(2 * np.pi * (TONE_BASE + k * TONE_STEP) * t))
+            gap = rng.uniform(0.08, 0.2)
+            parts.append(np.zeros(int(gap * RATE)))
+            words.append(f"w{k}")
+            seconds += length + gap
+        pause = rng.uniform(0.6, 1.5)
+        parts.append(np.zeros(int(pause * RATE)))
+        seconds += pause
+    samples = np.concatenate(parts)
+    samples += np.random.RandomState(1).normal(0, 30, len(samples))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(samples.astype(np.int16).tobytes())
+    return buffer.getvalue(), " ".join(words)
+
+
+async def upload(client: httpx.AsyncClient, audio: bytes) -> tuple:
+    started = time.perf_counter()
+    response = await client.post("/api/voice", files={"audio": ("recording.wav", audio, "audio/wav")})
+    return response, time.perf_counter() - started
+
+
+async def run(minutes: float, segment: float) -> int:
+    failed = False
+    state.transcribe_rate = TRANSCRIBE_RATE
+    server = serve(stub_app, stub_port)
+    audio, expected = recording(minutes, random.Random(5))
+    print(f"recording: {minutes:.0f} min, {len(audio) / 1e6:.1f} MB, {len(expected.split())} words")
+
+    async with httpx.AsyncClient(app=app, base_url="http://backend", timeout=600) as client:
+        settings.voice_segment_seconds = minutes * 120
+        response, whole = await upload(client, audio)
+        response.raise_for_status()
+        print(f"one call: {whole:.2f}s, segments {response.json()['segments']}")
+
+        # Same recording again: transcribe it rather than answer from the cache
+        ai_processor.transcript_cache.clear()
+        settings.voice_segment_seconds = segment
+        response, split = await upload(client, audio)
+        response.raise_for_status()
+        body = response.json()
+        exact = body["text"] == expected
+        print(f"{segment:.0f}s segments: {split:.2f}s, segments {body['segments']}, "
+              f"transcript exact: {exact} ({whole / split:.1f}x faster)")
+        failed |= not exact or body["segments"] < 2 or split >= whole
+
+        settings.voice_max_upload_bytes = len(audio) - 1
+        leftovers = set(os.listdir(tempfile.gettempdir()))
+        response, _ = await upload(client, audio)
+        leaked = set(os.listdir(tempfile.gettempdir())) - leftovers
+        print(f"over the cap: HTTP {response.status_code}, temp files left: {len(leaked)}")
+        failed |= response.status_code != 413 or bool(leaked)
+    server.should_exit = True
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--segment", type=float, default=60)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.minutes, args.segment)))
@@ -0,0 +1,162 @@
+"""
+Check transcript caching and deduplication of retried voice uploads
+
+Against the local OpenAI stub, checks that:
+- identical uploads sent at the same time (client retries) make one
+  transcription and all get its transcript
+- a later retry is answered from the cache without a transcription call
+- the cache survives a restart (a fresh processor reading the same file)
+- a different recording is still transcribed
+- the shared transcription survives its first uploader going away (the
+  request cancelled and its upload deleted) while a retry waits on it
+and prints the cache stats served by /api/cache/stats.
+
+Usage (from backend/):
+    python scripts/check_voice_cache.py [--retries 5]
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+stub_port = free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["OBSIDIAN_VAULT_PATH"] = tempfile.mkdtemp(prefix="voice-vault-")
+os.environ["BACKEND_CACHE_DIR"] = tempfile.mkdtemp(prefix="voice-cache-")
+os.environ["WATCHER_BACKEND"] = "off"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from stub_openai_server import app as stub_app, state, TONE_BASE, TONE_STEP  # noqa: E402
+from core.ai_processor import AIProcessor, ai_processor  # noqa: E402
+from main import app  # noqa: E402
+
+RATE = 16000
+
+
+def serve(asgi_app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def recording(words: list) -> bytes:
+    """WAV of one tone burst per word index, half a second each with a short gap"""
+    t = np.arange(int(0.5 * RATE)) / RATE
+    gap = np.zeros(int(0.2 * RATE))
+    parts = []
+    for k in words:
+        parts += [8000 * np.sin(2 * np.pi * (TONE_BASE + k * TONE_STEP) * t), gap]
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def write_temp(audio: bytes) -> str:
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    with os.fdopen(fd, "wb") as f:
+        f.write(audio)
+    return path
+
+
+async def upload(client: httpx.AsyncClient, audio: bytes) -> dict:
+    response = await client.post("/api/voice", files={"audio": ("retry.wav", audio, "audio/wav")})
+    response.raise_for_status()
+    return response.json()
+
+
+async def run(retries: int) -> int:
+    failed = False
+    state.delay = 0.5
+    server = serve(stub_app, stub_port)
+    audio = recording([1, 2, 3, 4])
+
+    async with httpx.AsyncClient(app=app, base_url="http://backend", timeout=60) as client:
+        results = await asyncio.gather(*(upload(client, audio) for _ in range(retries)))
+        texts = {result["text"] for result in results}
+        calls = state.transcriptions
+        print(f"{retries} concurrent identical uploads: {calls} transcription call(s), transcripts {texts}")
+        failed |= calls != 1 or texts != {"w1 w2 w3 w4"}
+
+        started = time.perf_counter()
+        later = await upload(client, audio)
+        took = (time.perf_counter() - started) * 1000
+        print(f"later retry: cached {later['cached']}, {took:.0f}ms, "
+              f"transcription calls {state.transcriptions - calls}")
+        failed |= not later["cached"] or state.transcriptions != calls
+
+        other = await upload(client, recording([5, 6]))
+        print(f"different recording: {other['text']!r}, cached {other['cached']}")
+        failed |= other["text"] != "w5 w6" or other["cached"]
+
+        stats = (await client.get("/api/cache/stats")).json()["transcripts"]
+        print(f"stats: {stats}")
+        failed |= stats["deduplicated"] != retries - 1
+
+    abandoned = recording([7, 8])
+    first_path, retry_path = write_temp(abandoned), write_temp(abandoned)
+    abandoned_hash = hashlib.sha256(abandoned).hexdigest()
+    first = asyncio.ensure_future(ai_processor.transcribe_audio(first_path, abandoned_hash))
+    while not ai_processor._transcriptions:
+        await asyncio.sleep(0)
+    # The first request goes away as soon as its transcription is started:
+    # /api/voice deletes its upload on the way out
+    first.cancel()
+    try:
+        await first
+    except asyncio.CancelledError:
+        pass
+    os.unlink(first_path)
+    retry = asyncio.ensure_future(ai_processor.transcribe_audio(retry_path, abandoned_hash))
+    result = await retry
+    os.unlink(retry_path)
+    leftovers = [name for name in os.listdir(tempfile.gettempdir()) if name.startswith(Path(first_path).stem + "-")]
+    print(f"first uploader gone mid-transcription: retry got {result['text']!r}, "
+          f"task's copy left behind: {bool(leftovers)}")
+    failed |= result["text"] != "w7 w8" or bool(leftovers)
+
+    calls = state.transcriptions
+    restarted = AIProcessor()
+    path = write_temp(audio)
+    result = await restarted.transcribe_audio(path, hashlib.sha256(audio).hexdigest())
+    os.unlink(path)
+    print(f"after restart: cached {result['cached']}, text {result['text']!r}")
+    failed |= not result["cached"] or state.transcriptions != calls
+    server.should_exit = True
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--retries", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.retries)))
@@ -0,0 +1,208 @@
+"""
+Local stand-in for the OpenAI API
+
+Serves chat completions (single and batched classifications, summaries
+and streamed replies) and audio transcriptions with configurable
+latency and injected 429/500 failures, and records the peak number of
+concurrent requests. WAV uploads are "transcribed" offline: each tone
+burst becomes the word w<k> for a tone of TONE_BASE + k * TONE_STEP Hz,
+which lets checks verify segment order and cut points. Point the backend at it with
+OPENAI_BASE_URL=http://127.0.0.1:8787/v1.
+
+Usage (from backend/):
+    python scripts/stub_openai_server.py --port 8787 --delay 0.2 --fail-rate 0.3
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+import wave
+
+import numpy as np
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SUMMARIZE_SYSTEM_PROMPT = "你是一个擅长总结的助理。"
+
+# Tone "words" understood by the stub transcriber
+TONE_BASE = 300.0
+TONE_STEP = 25.0
+TONE_BLOCK = 0.01  # seconds per loudness block
+
+
+class StubState:
+    """Knobs and counters shared by the stub endpoints"""
+
+    def __init__(self, delay: float = 0.0, fail_rate: float = 0.0, retry_after: float = 0.1,
+                 stream_tokens: int = 20, token_delay: float = 0.05):
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.stream_tokens = stream_tokens
+        self.token_delay = token_delay
+        self.streams_completed = 0
+        self.streams_cancelled = 0
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.summaries = 0
+        self.transcribe_rate = 0.0  # extra seconds per second of WAV audio transcribed
+        self.transcriptions = 0
+        self.prompt_chars = []  # total message characters of each chat request
+
+
+state = StubState()
+app = FastAPI(title="OpenAI stub")
+
+
+async def simulate():
+    state.requests += 1
+    state.in_flight += 1
+    state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+    try:
+        await asyncio.sleep(state.delay)
+        if random.random() < state.fail_rate:
+            state.failures += 1
+            if random.random() < 0.8:
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": {"message": "Rate limit reached", "type": "requests"}},
+                    headers={"retry-after": str(state.retry_after)}
+                )
+            return JSONResponse(status_code=500, content={"error": {"message": "Stub server error"}})
+        return None
+    finally:
+        state.in_flight -= 1
+
+
+def stub_classification(prompt: str) -> dict:
+    """Classification answer; a JSON array prompt (batch capture) gets one result per id"""
+    result = {
+        "category": "idea",
+        "confidence": 0.9,
+        "title": "Stub title",
+        "suggested_tags": ["stub"],
+        "target_folder": "01_Execution/Daily_Operations/Ideas",
+        "summary": "Stub summary"
+    }
+    try:
+        items = json.loads(prompt)
+    except ValueError:
+        return result
+    if not isinstance(items, list):
+        return result
+    return {"results": [{"id": item["id"], **result, "title": item["content"][:20]} for item in items]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    state.prompt_chars.append(sum(len(m.get("content") or "") for m in body.get("messages", [])))
+    failure = await simulate()
+    if failure is not None:
+        return failure
+
+    if body.get("stream"):
+        return StreamingResponse(stream_chunks(body), media_type="text/event-stream")
+
+    if body.get("response_format", {}).get("type") == "json_object":
+        content = json.dumps(stub_classification(body["messages"][-1]["content"]), ensure_ascii=False)
+    elif body["messages"][0]["content"] == SUMMARIZE_SYSTEM_PROMPT:
+        state.summaries += 1
+        content = "Stub summary of the conversation so far"
+    else:
+        content = "Stub reply"
+    return {
+        "id": f"chatcmpl-stub-{state.requests}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+    }
+
+
+async def stream_chunks(body: dict):
+    """Chat completion chunks, one token per token_delay; counts streams the client abandons"""
+    include_usage = body.get("stream_options", {}).get("include_usage")
+    base = {"id": f"chatcmpl-stub-{state.requests}", "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": body.get("model", "stub")}
+    completed = False
+    try:
+        for i in range(state.stream_tokens):
+            await asyncio.sleep(state.token_delay)
+            delta = {"role": "assistant", "content": f"tok{i} "} if i == 0 else {"content": f"tok{i} "}
+            chunk = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+        if include_usage:
+            usage = {"prompt_tokens": 10, "completion_tokens": state.stream_tokens,
+                     "total_tokens": 10 + state.stream_tokens}
+            yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+        completed = True
+    finally:
+        if completed:
+            state.streams_completed += 1
+        else:
+            state.streams_cancelled += 1
+
+
+def stub_transcript(audio: bytes) -> tuple:
+    """(text, seconds of audio) for a WAV of tone bursts; anything else is "Stub transcript" """
+    try:
+        with wave.open(io.BytesIO(audio), "rb") as reader:
+            rate, width = reader.getframerate(), reader.getsampwidth()
+            frames = reader.readframes(reader.getnframes())
+    except (wave.Error, EOFError):
+        return "Stub transcript", 0.0
+    if width != 2:
+        return "Stub transcript", 0.0
+
+    samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32)
+    block = int(rate * TONE_BLOCK)
+    blocks = len(samples) // block
+    loud = np.abs(samples[:blocks * block].reshape(blocks, block)).max(axis=1) > 1000
+    words = []
+    start = None
+    for i, is_loud in enumerate(np.append(loud, False)):
+        if is_loud and start is None:
+            start = i
+        elif not is_loud and start is not None:
+            burst = samples[start * block:i * block]
+            spectrum = np.abs(np.fft.rfft(burst))
+            frequency = np.argmax(spectrum) * rate / len(burst)
+            words.append(f"w{round((frequency - TONE_BASE) / TONE_STEP)}")
+            start = None
+    return " ".join(words), len(samples) / rate
+
+
+@app.post("/v1/audio/transcriptions")
+async def audio_transcriptions(request: Request):
+    form = await request.form()
+    text, seconds = stub_transcript(await form["file"].read())
+    failure = await simulate()
+    if failure is not None:
+        return failure
+    await asyncio.sleep(seconds * state.transcribe_rate)
+    state.transcriptions += 1
+    return {"text": text}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered 429/500")
+    args = parser.parse_args()
+
+    state.delay = args.delay
+    state.fail_rate = args.fail_rate
+    uvicorn.run(app, host=args.host, port=args.port)
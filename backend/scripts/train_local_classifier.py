@@ -0,0 +1,116 @@
+"""
+Train the local capture classifier from the vault and report how it does
+
+Labels come from each note's `type` frontmatter. A stable hash of the note
+path holds out a fraction of notes for the report:
+- overall and per-class accuracy
+- how accurate each keyword rule is on the notes it matches, and how
+  accurate the model is at the threshold on the rest
+- how many captures would be answered locally, counting only the rules
+  and model that reach MIN_PRECISION
+- prediction latency
+
+The saved model is then trained on every note.
+
+Usage (from backend/):
+    python scripts/train_local_classifier.py [--holdout 0.2] [--threshold 0.9] [--report-only]
+"""
+import argparse
+import statistics
+import sys
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.config import settings  # noqa: E402
+from core.obsidian import obsidian  # noqa: E402
+from core.ai_processor import LOCAL_CLASSIFIER_FILE  # noqa: E402
+from core.local_classifier import LocalClassifier, MIN_PRECISION, labeled_examples  # noqa: E402
+
+
+def read_text(file_path: str) -> str:
+    with open(obsidian.vault_path / file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def is_holdout(file_path: str, fraction: float) -> bool:
+    return zlib.crc32(file_path.encode("utf-8")) % 1000 < fraction * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Train the local capture classifier")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction of notes held out for the report")
+    parser.add_argument("--threshold", type=float, default=settings.local_classifier_threshold)
+    parser.add_argument("--output", type=Path, default=settings.full_cache_path / LOCAL_CLASSIFIER_FILE)
+    parser.add_argument("--report-only", action="store_true", help="evaluate without saving a model")
+    args = parser.parse_args()
+
+    obsidian.index.ensure_fresh(parse=False)
+    train, held_out = [], []
+    for file_path, example in obsidian.scanner.map(obsidian.index.paths(), read_text, labeled_examples, label="notes"):
+        if isinstance(example, Exception) or example is None:
+            continue
+        (held_out if is_holdout(file_path, args.holdout) else train).append(example)
+
+    if not train or not held_out:
+        print(f"Not enough labeled notes: {len(train)} for training, {len(held_out)} held out")
+        return 1
+    print(f"Labeled notes: {len(train)} for training, {len(held_out)} held out")
+    print(f"Classes: {dict(Counter(label for label, _, _ in train))}")
+
+    classifier = LocalClassifier(args.threshold).fit(train)
+
+    correct = 0
+    per_class: dict = {}
+    # Hits and answers per keyword rule (by category) and for the model at the threshold
+    per_source: dict = {}
+    latencies = []
+    for label, features, rule in held_out:
+        started = time.perf_counter()
+        predicted, confidence, source = classifier.score(features, rule)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hit = predicted == label
+        correct += hit
+        stats = per_class.setdefault(label, [0, 0])
+        stats[0] += hit
+        stats[1] += 1
+        if confidence >= args.threshold:
+            stats = per_source.setdefault(f"rule:{rule}" if source == "rule" else "model", [0, 0])
+            stats[0] += hit
+            stats[1] += 1
+
+    total = len(held_out)
+    print(f"\nHeld-out accuracy: {correct / total:.1%} ({correct}/{total})")
+    for label, (hits, count) in sorted(per_class.items()):
+        print(f"  {label:<15} {hits / count:.1%} ({hits}/{count})")
+
+    precision = {source: hits / count for source, (hits, count) in per_source.items()}
+    print(f"At threshold {args.threshold}, precision of local answers (needs {MIN_PRECISION:.0%}):")
+    answered = 0
+    for source, (hits, count) in sorted(per_source.items()):
+        enabled = precision[source] >= MIN_PRECISION
+        answered += count if enabled else 0
+        print(f"  {source:<15} {precision[source]:.1%} ({hits}/{count}){'' if enabled else '  off'}")
+    print(f"Answers {answered / total:.1%} of held-out captures locally")
+    latencies.sort()
+    print(f"Latency: p50 {statistics.median(latencies):.3f} ms, "
+          f"p99 {latencies[max(0, int(len(latencies) * 0.99) - 1)]:.3f} ms per prediction (features extracted)")
+
+    if args.report_only:
+        return 0
+    final = LocalClassifier(args.threshold).fit(train + held_out)
+    final.precision = precision.get("model", 0.0)
+    final.rule_precision = {
+        source.split(":", 1)[1]: value for source, value in precision.items() if source.startswith("rule:")
+    }
+    final.save(args.output)
+    print(f"\nSaved model trained on {len(train) + len(held_out)} notes to {args.output}")
+    print("Restart the backend to load it.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -91,6 +91,30 @@ class APIClient {
 		});
 	}
 
+	/**
+	 * POST /api/capture/batch - Capture many items at once
+	 * @param {Array<Object>} items - Capture data, same shape as capture()
+	 * @returns {Promise<Object>} Totals and a per-item result or error
+	 */
+	async captureBatch(items) {
+		return this._request('/api/capture/batch', {
+			method: 'POST',
+			headers: {
+				'Content-Type': 'application/json'
+			},
+			body: JSON.stringify({ items })
+		});
+	}
+
+	/**
+	 * GET /api/capture/:id - Status of a queued capture
+	 * @param {string} captureId - capture_id returned by capture() in queued mode
+	 * @returns {Promise<Object>} Status (pending, processing, retrying, filed, failed) and current file_path
+	 */
+	async getCaptureStatus(captureId) {
+		return this._request(`/api/capture/${encodeURIComponent(captureId)}`);
+	}
+
 	/**
 	 * POST /api/capture/voice - Voice capture
 	 * @param {Blob} audioBlob - Audio file blob
@@ -113,13 +137,78 @@ class APIClient {
 	 * @param {number} params.limit - Number of entries
 	 * @param {number} params.skip - Skip entries
 	 * @param {string} params.type - Filter by type
-	 * @returns {Promise<Array>} Timeline entries
+	 * @param {string} params.cursor - next_cursor from the previous page
+	 * @param {string} params.filter - today, week or month
+	 * @param {string} params.from - First day to include (YYYY-MM-DD)
+	 * @param {string} params.to - Last day to include (YYYY-MM-DD)
+	 * @returns {Promise<Object>} Timeline page with items and next_cursor
 	 */
 	async getTimeline(params = {}) {
 		const query = new URLSearchParams(params);
 		return this._request(`/api/timeline?${query}`);
 	}
 
+	/**
+	 * GET /api/events - Subscribe to live vault changes (Server-Sent Events)
+	 * @param {Function} onEvent - Called with (kind, payload) for created/modified/deleted/moved
+	 * @returns {Function} Unsubscribe function
+	 */
+	subscribeToVaultEvents(onEvent) {
+		const source = new EventSource(this.baseURL + '/api/events');
+		const kinds = ['created', 'modified', 'deleted', 'moved'];
+
+		for (const kind of kinds) {
+			source.addEventListener(kind, (event) => {
+				onEvent(kind, JSON.parse(event.data));
+			});
+		}
+
+		return () => source.close();
+	}
+
+	/**
+	 * POST /api/chat/stream - Chat reply streamed as Server-Sent Events
+	 * @param {Object} data - Chat request (message, conversation_history, include_context)
+	 * @param {Function} onEvent - Called with (kind, payload) for token, done and error events
+	 * @param {AbortSignal} signal - Abort to stop the stream (also stops generation upstream)
+	 * @returns {Promise<void>} Resolves when the stream ends
+	 */
+	async chatStream(data, onEvent, signal) {
+		const response = await fetch(this.baseURL + '/api/chat/stream', {
+			method: 'POST',
+			headers: {
+				'Content-Type': 'application/json'
+			},
+			body: JSON.stringify(data),
+			signal
+		});
+
+		if (!response.ok) {
+			const error = await response.json().catch(() => ({}));
+			throw new Error(error.detail || `HTTP ${response.status}`);
+		}
+
+		const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+		let buffer = '';
+		for (;;) {
+			const { value, done } = await reader.read();
+			if (done) break;
+			buffer += value;
+
+			// Events are separated by a blank line
+			let boundary;
+			while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+				const block = buffer.slice(0, boundary);
+				buffer = buffer.slice(boundary + 2);
+				const kind = block.match(/^event: (.*)$/m)?.[1];
+				const payload = block.match(/^data: (.*)$/m)?.[1];
+				if (kind && payload) {
+					onEvent(kind, JSON.parse(payload));
+				}
+			}
+		}
+	}
+
 	/**
 	 * GET /api/stats/type-distribution - Get type distribution stats
 	 * @returns {Promise<Object>} Type distribution data